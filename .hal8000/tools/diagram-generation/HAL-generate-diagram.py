@@ -15,14 +15,28 @@ Examples:
 /HAL-generate-diagram process-flow "HAL Brainstorming Workflow"
 /HAL-generate-diagram swimlane "User-HAL-Agent Interaction" --template=basic
 /HAL-generate-diagram bpmn "System Architecture" --custom="path/to/spec.md"
+
+Batch (every .mmd/.puml under a tree, unchanged sources skipped):
+/HAL-generate-diagram --batch data/diagrams
+/HAL-generate-diagram --batch docs/src --output-dir docs/img --format svg
+
+Render Server (keeps one browser warm across calls):
+/HAL-generate-diagram server start
+/HAL-generate-diagram server status
+/HAL-generate-diagram server stop
 """
 
 import argparse
+import hashlib
 import sys
 import os
 from pathlib import Path
 import subprocess
 import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # HAL System Paths
@@ -31,6 +45,16 @@ TOOLS_DIR = HAL_ROOT / ".claude" / "tools" / "diagram-generation"
 TEMPLATES_DIR = TOOLS_DIR / "templates"
 OUTPUT_DIR = HAL_ROOT / "data" / "diagrams"
 
+# Persistent mermaid render server (render-server.mjs in hal8000-mermaid)
+RENDER_SERVER_CONTAINER = "hal8000-mermaid-server"
+RENDER_SERVER_PORT = 8190
+RENDER_SERVER_URL = f"http://127.0.0.1:{RENDER_SERVER_PORT}"
+
+# Batch mode: source types, manifest name, cache key version (bump to re-render all)
+BATCH_EXTENSIONS = {".mmd", ".puml"}
+RENDER_MANIFEST = "render-manifest.json"
+RENDER_CACHE_VERSION = 1
+
 # Supported diagram types and their tools
 DIAGRAM_TOOLS = {
     "process-flow": "mermaid",
@@ -167,8 +191,127 @@ stop
 
     return templates.get(diagram_type, "")
 
-def generate_diagram(diagram_type, title, content, output_format="png", width=None, height=None, scale=None):
-    """Generate diagram using appropriate tool with quality options."""
+def render_server_status(timeout=0.5):
+    """Return the render server's health dict, or None if it is not answering."""
+    try:
+        with urllib.request.urlopen(f"{RENDER_SERVER_URL}/health", timeout=timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+def start_render_server(pages=4, timeout=60):
+    """Start the long-lived render server container and wait for /health."""
+    if render_server_status():
+        print(f"[OK] Render server already running at {RENDER_SERVER_URL}")
+        return True
+
+    # Remove a stopped container left over from a previous run
+    subprocess.run(["docker", "rm", "-f", RENDER_SERVER_CONTAINER],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    cmd = [
+        "docker", "run", "-d",
+        "--name", RENDER_SERVER_CONTAINER,
+        "-p", f"127.0.0.1:{RENDER_SERVER_PORT}:{RENDER_SERVER_PORT}",
+        "-e", f"HAL_RENDER_PAGES={pages}",
+        "--entrypoint", "node",
+        "hal8000-mermaid:latest",
+        "/opt/hal-renderer/render-server.mjs"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not start render server: {result.stderr.strip()}")
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if render_server_status():
+            print(f"[OK] Render server ready at {RENDER_SERVER_URL} ({pages} concurrent pages)")
+            return True
+        time.sleep(1)
+
+    raise RuntimeError(f"Render server did not become ready within {timeout}s "
+                       f"(check: docker logs {RENDER_SERVER_CONTAINER})")
+
+def stop_render_server():
+    """Stop and remove the render server container."""
+    result = subprocess.run(["docker", "rm", "-f", RENDER_SERVER_CONTAINER],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"[INFO] Render server not running ({result.stderr.strip()})")
+        return False
+    print("[OK] Render server stopped")
+    return True
+
+def render_via_server(content, output_file, output_format="png", width=None, height=None,
+                      scale=None, timeout=120):
+    """
+    Render mermaid source with the running render server and write the result.
+
+    Raises ValueError if the server rejects the diagram (bad source or
+    options) and RuntimeError if the server fails or is unreachable.
+    """
+    payload = {"source": content, "format": output_format, "scale": scale or 2}
+    if width:
+        payload["width"] = width
+    if height:
+        payload["height"] = height
+
+    request = urllib.request.Request(
+        f"{RENDER_SERVER_URL}/render",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = response.read()
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", str(e))
+        except ValueError:
+            message = str(e)
+        if 400 <= e.code < 500:
+            raise ValueError(message)
+        raise RuntimeError(message)
+    except (urllib.error.URLError, OSError) as e:
+        raise RuntimeError(f"Render server unreachable: {e}")
+
+    tmp_file = output_file.with_name(f".{output_file.name}.tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+    os.replace(tmp_file, output_file)
+    return output_file
+
+def mmdc_command(source_file, output_file, width=None, height=None, scale=None):
+    """Build the one-shot hal8000-mermaid docker command for one diagram."""
+    # Container mounts source and output directories as volumes
+    # Use absolute WSL paths directly (Docker Desktop handles WSL path translation)
+    cmd = [
+        "docker", "run", "--rm",
+        "-v", f"{str(Path(source_file).parent)}:/workspace/temp:rw",
+        "-v", f"{str(Path(output_file).parent)}:/workspace/output:rw",
+        "hal8000-mermaid:latest",
+        "-i", f"/workspace/temp/{Path(source_file).name}",
+        "-o", f"/workspace/output/{Path(output_file).name}"
+    ]
+
+    # Add quality options if specified
+    if width:
+        cmd.extend(["--width", str(width)])
+    if height:
+        cmd.extend(["--height", str(height)])
+
+    # Default high quality settings
+    cmd.extend(["--scale", str(scale or 2)])  # Default 2x for better quality
+    return cmd
+
+def generate_diagram(diagram_type, title, content, output_format="png", width=None, height=None, scale=None,
+                     use_server=True):
+    """Generate diagram using appropriate tool with quality options.
+
+    Mermaid diagrams go to the render server when it is running and fall
+    back to a one-shot hal8000-mermaid container otherwise.
+    """
     tool = DIAGRAM_TOOLS.get(diagram_type)
     if not tool:
         raise ValueError(f"Unsupported diagram type: {diagram_type}")
@@ -186,29 +329,22 @@ def generate_diagram(diagram_type, title, content, output_format="png", width=No
         with open(source_file, 'w', encoding='utf-8') as f:
             f.write(content)
 
+        # Reuse the persistent render server when it is running
+        if use_server and render_server_status():
+            try:
+                render_via_server(content, output_file, output_format, width, height, scale)
+                print(f"[OK] Diagram generated: {output_file} (render server)")
+                print(f"[SRC] Source saved: {source_file}")
+                return str(output_file)
+            except ValueError as e:
+                print(f"[ERROR] Error generating diagram: {e}")
+                print(f"   Source: {source_file}")
+                return None
+            except RuntimeError as e:
+                print(f"[WARNING] Render server failed ({e}), using one-shot container")
+
         # Execute mermaid CLI via Docker container
-        # Container mounts temp and output directories as volumes
-        # Use absolute WSL paths directly (Docker Desktop handles WSL path translation)
-        cmd = [
-            "docker", "run", "--rm",
-            "-v", f"{str(TOOLS_DIR / 'temp')}:/workspace/temp:rw",
-            "-v", f"{str(OUTPUT_DIR)}:/workspace/output:rw",
-            "hal8000-mermaid:latest",
-            "-i", f"/workspace/temp/{source_file.name}",
-            "-o", f"/workspace/output/{output_file.name}"
-        ]
-
-        # Add quality options if specified
-        if width:
-            cmd.extend(["--width", str(width)])
-        if height:
-            cmd.extend(["--height", str(height)])
-        if scale:
-            cmd.extend(["--scale", str(scale)])
-
-        # Default high quality settings
-        if not scale:
-            cmd.extend(["--scale", "2"])  # Default 2x for better quality
+        cmd = mmdc_command(source_file, output_file, width, height, scale)
 
     elif tool == "plantuml":
         source_file = TOOLS_DIR / "temp" / f"{safe_title}_{timestamp}.puml"
@@ -237,6 +373,174 @@ def generate_diagram(diagram_type, title, content, output_format="png", width=No
         print(f"   Please install {tool} CLI tool")
         return None
 
+def render_options_hash(content, output_format, width, height, scale):
+    """Cache key: sha256 of the source plus every option that changes the output."""
+    options = {
+        "format": output_format,
+        "width": width,
+        "height": height,
+        "scale": scale or 2,
+        "version": RENDER_CACHE_VERSION
+    }
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+def find_diagram_sources(batch_dir):
+    """All .mmd/.puml files under batch_dir, skipping hidden directories."""
+    batch_dir = Path(batch_dir)
+    return sorted(
+        path for path in batch_dir.rglob("*")
+        if path.is_file()
+        and path.suffix in BATCH_EXTENSIONS
+        and not any(part.startswith(".") for part in path.relative_to(batch_dir).parts)
+    )
+
+def load_render_manifest(output_dir):
+    """Previous render-manifest.json entries keyed by relative source path."""
+    manifest_path = Path(output_dir) / RENDER_MANIFEST
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("diagrams", {})
+    except (OSError, ValueError):
+        return {}
+
+def render_source(source_file, output_file, output_format, width, height, scale, use_server):
+    """Render one .mmd/.puml file to output_file; raises on failure."""
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    if source_file.suffix == ".puml":
+        # PlantUML renders locally (the container only ships mermaid-cli)
+        with open(source_file, "rb") as src, open(output_file, "wb") as dst:
+            result = subprocess.run(["plantuml", f"-t{output_format}", "-pipe"],
+                                    stdin=src, stdout=dst, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            output_file.unlink(missing_ok=True)
+            raise RuntimeError(result.stderr.decode("utf-8", "replace").strip() or "plantuml failed")
+        return
+
+    if use_server:
+        with open(source_file, "r", encoding="utf-8") as f:
+            render_via_server(f.read(), output_file, output_format, width, height, scale)
+        return
+
+    result = subprocess.run(mmdc_command(source_file, output_file, width, height, scale),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"mmdc exited with code {result.returncode}")
+
+def render_batch(batch_dir, output_dir=None, output_format="png", width=None, height=None,
+                 scale=None, workers=4, use_server=True, force=False):
+    """
+    Render every .mmd/.puml under batch_dir in parallel, skipping unchanged ones.
+
+    Outputs mirror the source tree under output_dir (default: next to the
+    sources) as <name>.<format>, without timestamps. A source is skipped
+    when its content+options hash matches render-manifest.json and the
+    output still exists. Mermaid sources use the render server, which is
+    started for the batch (and stopped afterwards) if it is not running;
+    a source the server fails on (other than a rejected diagram) is
+    rendered in a one-shot container instead.
+
+    Returns the manifest dict written to <output_dir>/render-manifest.json.
+    """
+    batch_dir = Path(batch_dir).resolve()
+    output_dir = Path(output_dir).resolve() if output_dir else batch_dir
+    if not batch_dir.is_dir():
+        raise FileNotFoundError(f"Batch directory not found: {batch_dir}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    previous = {} if force else load_render_manifest(output_dir)
+    diagrams = {}
+    pending = []
+
+    for source_file in find_diagram_sources(batch_dir):
+        relative = source_file.relative_to(batch_dir)
+        output_file = (output_dir / relative).with_suffix(f".{output_format}")
+        with open(source_file, "r", encoding="utf-8") as f:
+            content_hash = render_options_hash(f.read(), output_format, width, height, scale)
+
+        entry = {
+            "source": str(source_file),
+            "output": str(output_file),
+            "hash": content_hash
+        }
+        cached = previous.get(str(relative))
+        if (cached and cached.get("hash") == content_hash and cached.get("status") == "ok"
+                and output_file.exists()):
+            entry.update(status="ok", cached=True, rendered=cached.get("rendered"),
+                         seconds=cached.get("seconds"))
+        else:
+            pending.append((relative, source_file, output_file))
+        diagrams[str(relative)] = entry
+
+    skipped = len(diagrams) - len(pending)
+    print(f"[BATCH] {len(diagrams)} diagrams in {batch_dir}: "
+          f"{len(pending)} to render, {skipped} unchanged")
+
+    started_server = False
+    needs_mermaid = any(source.suffix == ".mmd" for _, source, _ in pending)
+    if use_server and needs_mermaid and not render_server_status():
+        try:
+            started_server = start_render_server(pages=workers)
+        except RuntimeError as e:
+            print(f"[WARNING] {e} - using one-shot containers")
+    server_up = use_server and needs_mermaid and render_server_status() is not None
+
+    def render_one(item):
+        relative, source_file, output_file = item
+        begin = time.time()
+        try:
+            try:
+                render_source(source_file, output_file, output_format, width, height, scale, server_up)
+            except RuntimeError as e:
+                # The server failed or went away mid-batch: render this one
+                # in a one-shot container, as single-file mode does
+                if not (server_up and source_file.suffix == ".mmd"):
+                    raise
+                print(f"[WARNING] Render server failed for {relative} ({e}), using one-shot container")
+                render_source(source_file, output_file, output_format, width, height, scale, False)
+            return relative, {"status": "ok", "cached": False,
+                              "rendered": datetime.now().isoformat(timespec="seconds"),
+                              "seconds": round(time.time() - begin, 3)}
+        except Exception as e:
+            return relative, {"status": "error", "cached": False, "error": str(e),
+                              "seconds": round(time.time() - begin, 3)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for relative, result in pool.map(render_one, pending):
+                diagrams[str(relative)].update(result)
+                marker = "[OK]" if result["status"] == "ok" else "[ERROR]"
+                print(f"{marker} {relative} ({result['seconds']}s)"
+                      + (f": {result['error']}" if result["status"] != "ok" else ""))
+    finally:
+        if started_server:
+            stop_render_server()
+
+    manifest = {
+        "version": RENDER_CACHE_VERSION,
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "source_dir": str(batch_dir),
+        "options": {"format": output_format, "width": width, "height": height, "scale": scale or 2},
+        "statistics": {
+            "total": len(diagrams),
+            "rendered": sum(1 for d in diagrams.values() if d["status"] == "ok" and not d["cached"]),
+            "cached": skipped,
+            "failed": sum(1 for d in diagrams.values() if d["status"] != "ok")
+        },
+        "diagrams": diagrams
+    }
+    manifest_path = output_dir / RENDER_MANIFEST
+    tmp_path = manifest_path.with_name(f".{RENDER_MANIFEST}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest
+
 def substitute_template_variables(content, title, **kwargs):
     """Replace template variables with actual values."""
     # Basic substitutions
@@ -257,7 +561,39 @@ def substitute_template_variables(content, title, **kwargs):
 
     return result
 
+def server_main(argv):
+    """Handle the 'server' subcommand: start, stop or inspect the render server."""
+    parser = argparse.ArgumentParser(
+        prog="HAL-generate-diagram.py server",
+        description="Manage the persistent mermaid render server"
+    )
+    parser.add_argument("action", choices=["start", "stop", "status"])
+    parser.add_argument("--pages",
+                       type=int,
+                       default=4,
+                       help="Diagrams rendered concurrently (default: 4)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == "start":
+            start_render_server(pages=args.pages)
+        elif args.action == "stop":
+            stop_render_server()
+        else:
+            status = render_server_status()
+            if not status:
+                print("[INFO] Render server not running")
+                return 1
+            print(json.dumps(status, indent=2))
+        return 0
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        return 1
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "server":
+        return server_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description="Generate professional workflow diagrams",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -265,10 +601,12 @@ def main():
     )
 
     parser.add_argument("diagram_type",
+                       nargs="?",
                        choices=list(DIAGRAM_TOOLS.keys()),
                        help="Type of diagram to generate")
 
     parser.add_argument("title",
+                       nargs="?",
                        help="Title for the diagram")
 
     parser.add_argument("--template", "-t",
@@ -298,8 +636,54 @@ def main():
                        type=float,
                        help="Scale factor for resolution (e.g., 2.0 for 2x, 4.0 for 4x)")
 
+    parser.add_argument("--no-server",
+                       action="store_true",
+                       help="Always use a one-shot container, even if the render server is running")
+
+    parser.add_argument("--batch",
+                       metavar="DIR",
+                       help="Render every .mmd/.puml under DIR (unchanged sources are skipped)")
+
+    parser.add_argument("--output-dir",
+                       help="Batch output root, mirroring the source tree (default: next to sources)")
+
+    parser.add_argument("--workers",
+                       type=int,
+                       default=4,
+                       help="Diagrams rendered in parallel in batch mode (default: 4)")
+
+    parser.add_argument("--force",
+                       action="store_true",
+                       help="Batch mode: ignore the render cache and re-render everything")
+
     args = parser.parse_args()
 
+    if args.batch:
+        try:
+            manifest = render_batch(
+                args.batch,
+                output_dir=args.output_dir,
+                output_format=args.format,
+                width=args.width,
+                height=args.height,
+                scale=args.scale,
+                workers=args.workers,
+                use_server=not args.no_server,
+                force=args.force
+            )
+        except Exception as e:
+            print(f"[ERROR] {e}")
+            return 1
+        stats = manifest["statistics"]
+        label = "[WARNING]" if stats["failed"] else "[SUCCESS]"
+        print(f"\n{label} Batch complete: {stats['rendered']} rendered, "
+              f"{stats['cached']} unchanged, {stats['failed']} failed")
+        print(f"   Manifest: {Path(args.output_dir or args.batch).resolve() / RENDER_MANIFEST}")
+        return 1 if stats["failed"] else 0
+
+    if not args.diagram_type or not args.title:
+        parser.error("diagram_type and title are required (or use --batch DIR)")
+
     # Ensure directories exist
     ensure_directories()
 
@@ -329,7 +713,8 @@ def main():
             args.format,
             width=getattr(args, 'width', None),
             height=getattr(args, 'height', None),
-            scale=getattr(args, 'scale', None)
+            scale=getattr(args, 'scale', None),
+            use_server=not args.no_server
         )
 
         if output_path:
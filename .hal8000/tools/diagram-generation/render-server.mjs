@@ -0,0 +1,213 @@
+#!/usr/bin/env node
+// HAL8000-Assistant Mermaid Render Server
+// Purpose: Keep one headless browser open and render diagrams on request
+// Architecture: Long-lived I/O device; HAL-generate-diagram.py is the driver
+//
+// Usage (inside hal8000-mermaid, started by `HAL-generate-diagram.py server start`):
+//   node /opt/hal-renderer/render-server.mjs
+//
+// API:
+//   GET  /health  -> {"status": "ok", "renders": N, "active": N, ...}
+//   POST /render  {"source": "...", "format": "png|svg|pdf", "width": 800,
+//                  "height": 600, "scale": 2, "backgroundColor": "white"}
+//                 -> rendered bytes (200) or {"error": "..."} (4xx/5xx)
+
+import http from 'node:http';
+import path from 'node:path';
+import { createRequire } from 'node:module';
+import { pathToFileURL } from 'node:url';
+
+const HOST = process.env.HAL_RENDER_HOST || '0.0.0.0';
+const PORT = Number(process.env.HAL_RENDER_PORT || 8190);
+const MAX_PAGES = Number(process.env.HAL_RENDER_PAGES || 4);
+const MAX_BODY_BYTES = 5 * 1024 * 1024;
+
+// mermaid-cli is installed globally in the image (npm install -g)
+const GLOBAL_MODULES = process.env.NODE_GLOBAL_MODULES || '/usr/local/lib/node_modules';
+const CLI_DIR = path.join(GLOBAL_MODULES, '@mermaid-js', 'mermaid-cli');
+
+const { renderMermaid } = await import(pathToFileURL(path.join(CLI_DIR, 'src', 'index.js')).href);
+const requireFromCli = createRequire(path.join(CLI_DIR, 'package.json'));
+const puppeteer = (await import(pathToFileURL(requireFromCli.resolve('puppeteer')).href)).default;
+
+const CONTENT_TYPES = {
+  png: 'image/png',
+  svg: 'image/svg+xml',
+  pdf: 'application/pdf'
+};
+
+const stats = { started: Date.now(), renders: 0, failures: 0, active: 0, browserLaunches: 0 };
+
+// One browser for the life of the server; relaunched if it crashes
+let browserPromise = null;
+
+function getBrowser() {
+  if (!browserPromise) {
+    stats.browserLaunches += 1;
+    browserPromise = puppeteer.launch({
+      headless: true,
+      args: ['--no-sandbox', '--disable-setuid-sandbox']
+    }).then((browser) => {
+      browser.on('disconnected', () => { browserPromise = null; });
+      return browser;
+    }).catch((error) => {
+      browserPromise = null;
+      throw error;
+    });
+  }
+  return browserPromise;
+}
+
+// Concurrency limit: at most MAX_PAGES renders (browser pages) at once
+const waiting = [];
+
+async function acquirePage() {
+  if (stats.active < MAX_PAGES) {
+    stats.active += 1;
+    return;
+  }
+  await new Promise((resolve) => waiting.push(resolve));
+}
+
+function releasePage() {
+  const next = waiting.shift();
+  if (next) {
+    next();
+  } else {
+    stats.active -= 1;
+  }
+}
+
+async function render(request) {
+  const format = request.format || 'png';
+  if (!CONTENT_TYPES[format]) {
+    throw Object.assign(new Error(`Unsupported format: ${format}`), { status: 400 });
+  }
+  if (typeof request.source !== 'string' || !request.source.trim()) {
+    throw Object.assign(new Error("'source' is required"), { status: 400 });
+  }
+
+  await acquirePage();
+  let browser = null;
+  try {
+    browser = await getBrowser();
+    // Same viewport defaults as mmdc (800x600, scale 1)
+    const { data } = await renderMermaid(browser, request.source, format, {
+      viewport: {
+        width: Number(request.width) || 800,
+        height: Number(request.height) || 600,
+        deviceScaleFactor: Number(request.scale) || 1
+      },
+      backgroundColor: request.backgroundColor || 'white',
+      mermaidConfig: request.mermaidConfig || {},
+      pdfFit: format === 'pdf'
+    });
+    stats.renders += 1;
+    return { format, data: Buffer.from(data) };
+  } catch (error) {
+    stats.failures += 1;
+    if (isDiagramError(error, browser)) {
+      error.status = 400;
+    }
+    throw error;
+  } finally {
+    releasePage();
+  }
+}
+
+// Mermaid reports bad diagrams as plain Errors thrown inside the page.
+// They are the caller's fault (400) and re-rendering them elsewhere cannot
+// help; a dead browser, timeout or protocol failure stays a 500.
+const MERMAID_ERROR = /Parse error|Lexical error|Syntax error|No diagram type detected|UnknownDiagramError|DiagramNotFound/i;
+const BROWSER_ERRORS = new Set(['TimeoutError', 'ProtocolError', 'TargetCloseError']);
+
+function isDiagramError(error, browser) {
+  if (MERMAID_ERROR.test(String(error && error.message))) {
+    return true;
+  }
+  // Browser#connected replaced isConnected() in puppeteer 22
+  const connected = browser && (typeof browser.isConnected === 'function' ? browser.isConnected() : browser.connected);
+  return Boolean(connected && error && !BROWSER_ERRORS.has(error.name));
+}
+
+function readBody(req) {
+  return new Promise((resolve, reject) => {
+    const chunks = [];
+    let size = 0;
+    req.on('data', (chunk) => {
+      size += chunk.length;
+      if (size > MAX_BODY_BYTES) {
+        reject(Object.assign(new Error('Request too large'), { status: 413 }));
+        req.destroy();
+        return;
+      }
+      chunks.push(chunk);
+    });
+    req.on('end', () => resolve(Buffer.concat(chunks).toString('utf-8')));
+    req.on('error', reject);
+  });
+}
+
+function sendJson(res, status, payload) {
+  const body = JSON.stringify(payload);
+  res.writeHead(status, { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(body) });
+  res.end(body);
+}
+
+const server = http.createServer(async (req, res) => {
+  try {
+    if (req.method === 'GET' && req.url === '/health') {
+      sendJson(res, 200, {
+        status: 'ok',
+        uptime_seconds: Math.round((Date.now() - stats.started) / 1000),
+        renders: stats.renders,
+        failures: stats.failures,
+        active: stats.active,
+        queued: waiting.length,
+        max_pages: MAX_PAGES,
+        browser_launches: stats.browserLaunches
+      });
+      return;
+    }
+
+    if (req.method === 'POST' && req.url === '/render') {
+      const request = JSON.parse(await readBody(req));
+      const started = process.hrtime.bigint();
+      const { format, data } = await render(request);
+      res.writeHead(200, {
+        'Content-Type': CONTENT_TYPES[format],
+        'Content-Length': data.length,
+        'X-Render-Ms': String(Number(process.hrtime.bigint() - started) / 1e6)
+      });
+      res.end(data);
+      return;
+    }
+
+    sendJson(res, 404, { error: `Unknown endpoint: ${req.method} ${req.url}` });
+  } catch (error) {
+    const status = error instanceof SyntaxError ? 400 : (error.status || 500);
+    sendJson(res, status, { error: String(error.message || error) });
+  }
+});
+
+// Launch the browser before accepting requests so the first render is warm
+await getBrowser();
+
+server.listen(PORT, HOST, () => {
+  console.error(`[HAL-MERMAID] Render server listening on ${HOST}:${PORT} (max ${MAX_PAGES} pages)`);
+});
+
+async function shutdown() {
+  server.close();
+  if (browserPromise) {
+    try {
+      await (await browserPromise).close();
+    } catch {
+      // Browser already gone
+    }
+  }
+  process.exit(0);
+}
+
+process.on('SIGTERM', shutdown);
+process.on('SIGINT', shutdown);
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for how HAL-generate-diagram.py uses the render server: a diagram
+the server rejects (HTTP 400) is reported as an error, not re-rendered in
+a one-shot container, while a server failure (HTTP 500, or the server
+going away mid-batch) falls back to the container for that diagram.
+
+A local http.server plays the render server; docker is replaced by a stub
+that writes the output file.
+
+Run:
+    python3 -m pytest .hal8000/tools/diagram-generation/tests
+"""
+
+import importlib.util
+import io
+import json
+import subprocess
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+CLIENT_PY = Path(__file__).resolve().parents[1] / 'HAL-generate-diagram.py'
+spec = importlib.util.spec_from_file_location('hal_generate_diagram', CLIENT_PY)
+client = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(client)
+
+class FakeRenderServer:
+    """Answers /health, and /render with the next scripted (status, body)"""
+
+    def __init__(self, responses):
+        fake = self
+        self.responses = list(responses)
+        self.renders = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            def send(self, status, body, content_type='application/json'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self.send(200, json.dumps({'status': 'ok'}).encode())
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                fake.renders += 1
+                status, body = fake.responses.pop(0) if fake.responses else (200, b'PNG server')
+                if status == 200:
+                    self.send(200, body, 'image/png')
+                else:
+                    self.send(status, json.dumps({'error': body}).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class RenderServerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        (self.dir / 'temp').mkdir()
+        (self.dir / 'diagrams').mkdir()
+        self.docker_calls = []
+
+        def fake_docker(cmd, **kwargs):
+            self.docker_calls.append(cmd)
+            output = cmd[cmd.index('-o') + 1]
+            mount = cmd[cmd.index('-v', cmd.index('-v') + 1) + 1].split(':')[0]
+            (Path(mount) / Path(output).name).write_bytes(b'PNG container')
+            return subprocess.CompletedProcess(cmd, 0, stdout='', stderr='')
+
+        for target, value in (('TOOLS_DIR', self.dir), ('OUTPUT_DIR', self.dir / 'diagrams')):
+            patcher = mock.patch.object(client, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(client.subprocess, 'run', fake_docker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def serve(self, responses):
+        server = FakeRenderServer(responses)
+        self.addCleanup(server.close)
+        patcher = mock.patch.object(client, 'RENDER_SERVER_URL', server.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return server
+
+    def write_sources(self, count):
+        sources = self.dir / 'sources'
+        sources.mkdir()
+        for number in range(count):
+            (sources / f'd{number}.mmd').write_text(f'graph TD\n  A{number} --> B{number}\n')
+        return sources
+
+    def test_rejected_diagram_is_not_rerendered(self):
+        server = self.serve([(400, 'Parse error on line 2')])
+
+        with redirect_stdout(io.StringIO()) as out:
+            path = client.generate_diagram('process-flow', 'Broken', 'graph TD\n  A -->\n')
+
+        self.assertIsNone(path)
+        self.assertEqual(server.renders, 1)
+        self.assertEqual(self.docker_calls, [])
+        self.assertIn('Parse error on line 2', out.getvalue())
+
+    def test_server_failure_falls_back_to_container(self):
+        self.serve([(500, 'Target closed')])
+
+        with redirect_stdout(io.StringIO()) as out:
+            path = client.generate_diagram('process-flow', 'Flow', 'graph TD\n  A --> B\n')
+
+        self.assertEqual(Path(path).read_bytes(), b'PNG container')
+        self.assertEqual(len(self.docker_calls), 1)
+        self.assertIn('Render server failed (Target closed)', out.getvalue())
+
+    def test_batch_reports_rejected_diagram_without_container(self):
+        self.serve([(400, 'Parse error on line 2')])
+        sources = self.write_sources(1)
+
+        with redirect_stdout(io.StringIO()):
+            manifest = client.render_batch(sources, workers=1)
+
+        self.assertEqual(manifest['diagrams']['d0.mmd']['status'], 'error')
+        self.assertIn('Parse error', manifest['diagrams']['d0.mmd']['error'])
+        self.assertEqual(self.docker_calls, [])
+
+    def test_batch_falls_back_when_server_fails_mid_batch(self):
+        self.serve([(200, b'PNG server'), (500, 'Target closed'), (500, 'Target closed')])
+        sources = self.write_sources(3)
+
+        with redirect_stdout(io.StringIO()) as out:
+            manifest = client.render_batch(sources, workers=1)
+
+        statuses = {name: entry['status'] for name, entry in manifest['diagrams'].items()}
+        self.assertEqual(statuses, {'d0.mmd': 'ok', 'd1.mmd': 'ok', 'd2.mmd': 'ok'})
+        self.assertEqual((sources / 'd0.png').read_bytes(), b'PNG server')
+        self.assertEqual((sources / 'd2.png').read_bytes(), b'PNG container')
+        self.assertEqual(len(self.docker_calls), 2)
+        self.assertIn('Render server failed for d1.mmd', out.getvalue())
+
+    def test_batch_falls_back_when_server_is_gone(self):
+        server = self.serve([])
+        sources = self.write_sources(2)
+        real_status = client.render_server_status
+        checks = []
+
+        def status_then_stop():
+            # Healthy for both of the batch's checks, gone before the first render
+            health = real_status()
+            checks.append(health)
+            if len(checks) == 2:
+                server.close()
+            return health
+
+        with mock.patch.object(client, 'render_server_status', status_then_stop), \
+                redirect_stdout(io.StringIO()):
+            manifest = client.render_batch(sources, workers=1)
+
+        self.assertEqual(len(checks), 2)
+        self.assertEqual(manifest['statistics']['failed'], 0)
+        self.assertEqual(server.renders, 0)
+        self.assertEqual(len(self.docker_calls), 2)
+
+if __name__ == '__main__':
+    unittest.main()
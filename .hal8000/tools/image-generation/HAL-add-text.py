@@ -2,19 +2,30 @@
 """
 HAL8000-Assistant Text Overlay Tool
 
-Adds text overlay to existing images using ImageMagick (via Docker).
+Adds text overlay to existing images. Renders in-process with Pillow
+(text_overlay.py); ImageMagick via Docker is kept as a fallback.
 Fast and efficient - no image regeneration required.
 
 Usage:
     python3 HAL-add-text.py --input image.png --text "Title" --output titled.png
+    python3 HAL-add-text.py --input-dir shots/ --output-dir titled/ --text "Title"
+    python3 HAL-add-text.py --manifest overlays.jsonl --engine docker
 """
 
 import argparse
+import glob
+import json
+import shlex
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 
-def add_text_overlay(
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import text_overlay
+
+def add_text_overlay_docker(
     input_path,
     output_path,
     text,
@@ -41,12 +52,6 @@ def add_text_overlay(
     input_path = Path(input_path).resolve()
     output_path = Path(output_path).resolve()
 
-    if not input_path.exists():
-        raise FileNotFoundError(f"Input image not found: {input_path}")
-
-    # Ensure output directory exists
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
     # Get directories for volume mounts
     input_dir = input_path.parent
     output_dir = output_path.parent
@@ -73,11 +78,6 @@ def add_text_overlay(
         f'/output/{output_filename}'
     ]
 
-    print(f"Adding text overlay to {input_path}...", file=sys.stderr)
-    print(f"Text: '{text}'", file=sys.stderr)
-    print(f"Position: {position}, Size: {fontsize}, Color: {color}", file=sys.stderr)
-    print("", file=sys.stderr)
-
     # Run Docker command
     result = subprocess.run(cmd, capture_output=True, text=True)
 
@@ -86,6 +86,57 @@ def add_text_overlay(
         print(result.stderr, file=sys.stderr)
         raise RuntimeError(f"Docker container exited with code {result.returncode}")
 
+    return output_path
+
+def add_text_overlay(
+    input_path,
+    output_path,
+    text,
+    position='south',
+    fontsize=72,
+    color='white',
+    engine='auto'
+):
+    """
+    Add text overlay to existing image.
+
+    Args:
+        input_path: Path to existing image
+        output_path: Path to save result
+        text: Text to overlay
+        position: Position (north, south, east, west, center)
+        fontsize: Font size in points
+        color: Text color
+        engine: 'native' (Pillow), 'docker' (ImageMagick) or 'auto'
+
+    Returns:
+        Path to output image
+    """
+
+    # Resolve paths
+    input_path = Path(input_path).resolve()
+    output_path = Path(output_path).resolve()
+
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input image not found: {input_path}")
+
+    # Ensure output directory exists
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    engine = resolve_engine(engine)
+
+    print(f"Adding text overlay to {input_path}...", file=sys.stderr)
+    print(f"Text: '{text}'", file=sys.stderr)
+    print(f"Position: {position}, Size: {fontsize}, Color: {color}, Engine: {engine}",
+          file=sys.stderr)
+    print("", file=sys.stderr)
+
+    if engine == 'native':
+        text_overlay.add_text_overlay(input_path, output_path, text, position=position,
+                                      fontsize=fontsize, color=color)
+    else:
+        add_text_overlay_docker(input_path, output_path, text, position, fontsize, color)
+
     # Verify output exists
     if not output_path.exists():
         raise RuntimeError(f"Text overlay completed but output file not found: {output_path}")
@@ -97,6 +148,228 @@ def add_text_overlay(
 
     return output_path
 
+def resolve_engine(engine):
+    """
+    Pick the rendering engine.
+
+    'auto' uses Pillow when it is installed and Docker otherwise.
+
+    Raises:
+        RuntimeError: If 'native' is requested without Pillow
+    """
+    if engine == 'auto':
+        return 'native' if text_overlay.PIL_AVAILABLE else 'docker'
+    if engine == 'native' and not text_overlay.PIL_AVAILABLE:
+        raise RuntimeError("Native engine needs Pillow (pip install pillow) - or use --engine docker")
+    return engine
+
+def _overlay_job(input_path, output_path, text, position='south', fontsize=72, color='white'):
+    """Normalise one overlay job (absolute paths, validated position)"""
+    if position not in text_overlay.POSITIONS:
+        raise ValueError(f"Unknown position: {position}. Available: {text_overlay.POSITIONS}")
+    return {
+        'input': Path(input_path).resolve(),
+        'output': Path(output_path).resolve(),
+        'text': str(text),
+        'position': position,
+        'fontsize': int(fontsize),
+        'color': color
+    }
+
+def jobs_from_directory(input_dir, output_dir, text, position='south', fontsize=72, color='white'):
+    """One job per image in input_dir (not recursive), same file names in output_dir"""
+    input_dir = Path(input_dir).resolve()
+    if not input_dir.is_dir():
+        raise FileNotFoundError(f"Input directory not found: {input_dir}")
+
+    images = sorted(p for p in input_dir.iterdir()
+                    if p.is_file() and p.suffix.lower() in text_overlay.IMAGE_EXTENSIONS)
+    if not images:
+        raise RuntimeError(f"No images found in {input_dir}")
+
+    return [_overlay_job(image, Path(output_dir) / image.name, text, position, fontsize, color)
+            for image in images]
+
+def jobs_from_glob(pattern, output_dir, text, position='south', fontsize=72, color='white'):
+    """One job per image matching pattern (** allowed), same file names in output_dir"""
+    images = sorted(Path(p) for p in glob.glob(pattern, recursive=True)
+                    if Path(p).is_file() and Path(p).suffix.lower() in text_overlay.IMAGE_EXTENSIONS)
+    if not images:
+        raise RuntimeError(f"No images match {pattern}")
+
+    names = [image.name for image in images]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise RuntimeError(f"Glob matches several files with the same name: {', '.join(duplicates)}")
+
+    return [_overlay_job(image, Path(output_dir) / image.name, text, position, fontsize, color)
+            for image in images]
+
+def load_overlay_manifest(manifest_path, text=None, position='south', fontsize=72, color='white'):
+    """
+    Read a JSONL overlay manifest.
+
+    Each line is one job: input and output are required; text, position,
+    size and color are optional and default to the command-line values.
+    Relative paths resolve against the manifest's directory.
+
+    Returns:
+        List of job dicts with absolute paths
+    """
+    manifest_path = Path(manifest_path).resolve()
+    jobs = []
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entry = json.loads(line)
+            if not entry.get('input') or not entry.get('output'):
+                raise ValueError(f"{manifest_path}:{line_number}: job requires 'input' and 'output'")
+            job_text = entry.get('text', text)
+            if job_text is None:
+                raise ValueError(f"{manifest_path}:{line_number}: no 'text' (and no --text default)")
+            jobs.append(_overlay_job(
+                manifest_path.parent / entry['input'],
+                manifest_path.parent / entry['output'],
+                job_text,
+                entry.get('position', position),
+                entry.get('size', fontsize),
+                entry.get('color', color)
+            ))
+
+    if not jobs:
+        raise RuntimeError(f"No jobs in {manifest_path}")
+    return jobs
+
+def run_overlay_jobs_docker(jobs):
+    """
+    Run every overlay job in a single hal8000-image-gen container.
+
+    Each distinct host directory is mounted once (read-only unless it
+    receives outputs) and a generated shell script runs one convert per
+    image, timing each with date +%s%N, so per-image status survives.
+
+    Returns:
+        List of result dicts (input, output, status, seconds, error) in job order
+    """
+    # Map each distinct host directory to /data/<n>
+    mounts = {}
+    writable = set()
+    for job in jobs:
+        job['output'].parent.mkdir(parents=True, exist_ok=True)
+        for key in ('input', 'output'):
+            mounts.setdefault(str(job[key].parent), f'/data/{len(mounts)}')
+        writable.add(str(job['output'].parent))
+
+    def container_path(path):
+        return f"{mounts[str(path.parent)]}/{path.name}"
+
+    results = [{'input': str(job['input']), 'output': str(job['output'])} for job in jobs]
+
+    with tempfile.TemporaryDirectory(prefix='hal-overlay-batch-') as jobs_dir:
+        lines = [
+            '#!/bin/sh',
+            'run() {',
+            '    idx=$1; shift',
+            '    start=$(date +%s%N)',
+            '    if convert "$@" 2>"/jobs/err.$idx"; then status=ok; else status=error; fi',
+            '    end=$(date +%s%N)',
+            '    echo "$idx $status $((end - start))" >> /jobs/timings.txt',
+            '}'
+        ]
+        for index, job in enumerate(jobs):
+            if not job['input'].exists():
+                results[index].update(status='error', seconds=0.0,
+                                      error=f"Input image not found: {job['input']}")
+                continue
+            args = [
+                str(index), container_path(job['input']),
+                '-pointsize', str(job['fontsize']),
+                '-fill', job['color'],
+                '-stroke', 'black',
+                '-strokewidth', '3',
+                '-gravity', job['position'],
+                '-annotate', '+0+50', job['text'],
+                container_path(job['output'])
+            ]
+            lines.append('run ' + ' '.join(shlex.quote(arg) for arg in args))
+
+        script = Path(jobs_dir) / 'run.sh'
+        script.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+        cmd = [
+            'docker', 'run',
+            '--rm',
+            '--entrypoint', 'sh',  # Override Python entrypoint
+            '-v', f'{jobs_dir}:/jobs'
+        ]
+        for host_dir, mount in mounts.items():
+            cmd.extend(['-v', f'{host_dir}:{mount}' + ('' if host_dir in writable else ':ro')])
+        cmd.extend(['hal8000-image-gen:latest', '/jobs/run.sh'])
+
+        result = subprocess.run(cmd, capture_output=True, text=True)
+
+        timings_file = Path(jobs_dir) / 'timings.txt'
+        if result.returncode != 0 and not timings_file.exists():
+            print(result.stderr, file=sys.stderr)
+            raise RuntimeError(f"Docker container exited with code {result.returncode}")
+
+        if timings_file.exists():
+            for line in timings_file.read_text(encoding='utf-8').splitlines():
+                index, status, nanoseconds = line.split()
+                entry = results[int(index)]
+                entry['status'] = status
+                entry['seconds'] = round(int(nanoseconds) / 1e9, 4)
+                if status != 'ok':
+                    error_file = Path(jobs_dir) / f'err.{index}'
+                    entry['error'] = error_file.read_text(encoding='utf-8').strip() or 'convert failed'
+
+    for entry in results:
+        if 'status' not in entry:
+            entry.update(status='error', error='Not processed (container stopped early)')
+    return results
+
+def run_overlay_jobs(jobs, engine='auto', workers=None):
+    """
+    Render a list of overlay jobs with one engine in one pass.
+
+    The native engine renders in this process on a thread pool (fonts are
+    loaded once); the Docker engine processes every job in one container.
+
+    Args:
+        jobs: Job dicts from jobs_from_directory/jobs_from_glob/load_overlay_manifest
+        engine: 'native', 'docker' or 'auto'
+        workers: Thread count for the native engine (default: CPU count)
+
+    Returns:
+        List of result dicts (input, output, status, seconds, error) in job order
+    """
+    engine = resolve_engine(engine)
+    print(f"Adding text overlay to {len(jobs)} images ({engine})...", file=sys.stderr)
+
+    if engine == 'native':
+        return text_overlay.annotate_many(jobs, workers=workers)
+    return run_overlay_jobs_docker(jobs)
+
+def write_report(report_path, results, engine, elapsed):
+    """Write the per-image results and timings of a bulk run as JSON"""
+    report_path = Path(report_path).resolve()
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    succeeded = sum(1 for r in results if r['status'] == 'ok')
+    report = {
+        'engine': engine,
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'seconds': round(elapsed, 3),
+        'results': results
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report_path
+
 def main():
     parser = argparse.ArgumentParser(
         description='HAL8000-Assistant Text Overlay Tool - Add text to existing images',
@@ -112,6 +385,19 @@ Examples:
   Bottom caption:
     %(prog)s --input pic.png --text "Caption here" --position south --size 48 --output captioned.png
 
+  Whole directory in one process:
+    %(prog)s --input-dir shots/ --output-dir titled/ --text "DRAFT" --workers 8
+
+  Glob, one container for every image (no Pillow):
+    %(prog)s --input-glob "shots/**/*.png" --output-dir titled/ --text "DRAFT" --engine docker
+
+  Per-image text from a JSONL manifest, with a timing report:
+    %(prog)s --manifest overlays.jsonl --report overlays.report.json
+
+Manifest format (one JSON object per line, paths relative to the manifest):
+  {"input": "a.png", "output": "out/a.png", "text": "Scene 1", "position": "north", "size": 96}
+  text/position/size/color default to the command-line values
+
 Positions:
   north  - Top of image
   south  - Bottom of image (default)
@@ -119,9 +405,13 @@ Positions:
   west   - Left side
   center - Center of image
 
+Engines:
+  auto   - Pillow if installed, otherwise Docker (default)
+  native - Pillow, in-process (milliseconds per image, fonts cached)
+  docker - ImageMagick in the hal8000-image-gen container (one container per run)
+
 Notes:
   - Text has black stroke outline for readability
-  - Uses ImageMagick via Docker (fast, <1 second)
   - Original image unchanged (output to new file)
   - Supports all image formats (PNG, JPG, etc.)
         """
@@ -129,26 +419,49 @@ Notes:
 
     parser.add_argument(
         '--input',
-        required=True,
         help='Input image file path'
     )
 
     parser.add_argument(
         '--output',
-        required=True,
         help='Output image file path'
     )
 
+    parser.add_argument(
+        '--input-dir',
+        help='Annotate every image in this directory (use with --output-dir)'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        help='Directory for annotated images (same file names)'
+    )
+
+    parser.add_argument(
+        '--input-glob',
+        help='Annotate every image matching this glob, ** allowed (use with --output-dir)'
+    )
+
+    parser.add_argument(
+        '--manifest',
+        help='JSONL file of overlay jobs (input, output, optional text/position/size/color)'
+    )
+
+    parser.add_argument(
+        '--report',
+        help='JSON report of per-image status and timings for bulk runs '
+             '(default: <manifest>.report.json or <output-dir>/overlay-report.json)'
+    )
+
     parser.add_argument(
         '--text',
-        required=True,
-        help='Text to overlay on image'
+        help='Text to overlay on image (default text for --manifest jobs)'
     )
 
     parser.add_argument(
         '--position',
         default='south',
-        choices=['north', 'south', 'east', 'west', 'center'],
+        choices=text_overlay.POSITIONS,
         help='Text position (default: south - bottom)'
     )
 
@@ -165,17 +478,69 @@ Notes:
         help='Text color: white, black, red, blue, or hex #RRGGBB (default: white)'
     )
 
+    parser.add_argument(
+        '--engine',
+        default='auto',
+        choices=['auto', 'native', 'docker'],
+        help='Rendering engine (default: auto - Pillow, Docker fallback)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Threads for bulk runs with the native engine (default: CPU count)'
+    )
+
     args = parser.parse_args()
 
+    bulk_sources = [name for name in ('input_dir', 'input_glob', 'manifest') if getattr(args, name)]
+    if len(bulk_sources) > 1:
+        parser.error('Use only one of --input-dir, --input-glob and --manifest')
+    if bulk_sources:
+        if bulk_sources != ['manifest'] and not args.output_dir:
+            parser.error('--input-dir/--input-glob need --output-dir')
+        if bulk_sources != ['manifest'] and args.text is None:
+            parser.error('--text is required')
+    else:
+        if not (args.input and args.output):
+            parser.error('--input and --output are required (or --input-dir/--input-glob/--manifest)')
+        if args.text is None:
+            parser.error('--text is required')
+
     # Add text overlay
     try:
+        if bulk_sources:
+            style = {'position': args.position, 'fontsize': args.size, 'color': args.color}
+            if args.manifest:
+                jobs = load_overlay_manifest(args.manifest, text=args.text, **style)
+                report_path = args.report or Path(args.manifest).resolve().with_suffix('.report.json')
+            else:
+                if args.input_dir:
+                    jobs = jobs_from_directory(args.input_dir, args.output_dir, args.text, **style)
+                else:
+                    jobs = jobs_from_glob(args.input_glob, args.output_dir, args.text, **style)
+                report_path = args.report or Path(args.output_dir).resolve() / 'overlay-report.json'
+
+            engine = resolve_engine(args.engine)
+            started = time.perf_counter()
+            results = run_overlay_jobs(jobs, engine=engine, workers=args.workers)
+            report_path = write_report(report_path, results, engine, time.perf_counter() - started)
+
+            failed = [r for r in results if r['status'] != 'ok']
+            for r in failed:
+                print(f"✗ {r['input']}: {r['error']}", file=sys.stderr)
+            print(f"\n✓ Annotated {len(results) - len(failed)}/{len(results)} images", file=sys.stderr)
+            print(f"✓ Report: {report_path}", file=sys.stderr)
+            sys.exit(1 if failed else 0)
+
         add_text_overlay(
             input_path=args.input,
             output_path=args.output,
             text=args.text,
             position=args.position,
             fontsize=args.size,
-            color=args.color
+            color=args.color,
+            engine=args.engine
         )
         sys.exit(0)
     except Exception as e:
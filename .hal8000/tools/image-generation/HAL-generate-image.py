@@ -8,13 +8,271 @@ Architecture mirrors HAL-generate-diagram.py (proven pattern).
 Usage:
     python3 HAL-generate-image.py --prompt "a robot" --output image.png
     python3 HAL-generate-image.py --prompt "cyberpunk city" --model sdxl --steps 30 --output city.png
+    python3 HAL-generate-image.py --manifest jobs.jsonl --results results.jsonl
+    python3 HAL-generate-image.py worker start|stop|status
+    python3 HAL-generate-image.py cache stats|prune
 """
 
 import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
 from pathlib import Path
 
+# Model cache on D: drive (hybrid approach)
+MODEL_CACHE = Path('/mnt/d/~HAL8000-Assistant/.docker-cache/models')
+
+# Model registry shared with entrypoint.py (baked into the Docker image)
+MODEL_REGISTRY = Path(__file__).resolve().with_name('models.json')
+
+# Content-addressed image cache, next to the model cache
+IMAGE_CACHE = MODEL_CACHE.parent / 'images'
+IMAGE_CACHE_MAX_GB = float(os.environ.get('HAL_IMAGE_CACHE_MAX_GB', '5'))
+
+# Must match entrypoint.py - part of every cache key
+DEFAULT_NEGATIVE_PROMPT = 'text, watermark, blurry, low quality'
+SAMPLER_SETTINGS = {'cfg': 7.0, 'sampler_name': 'euler', 'scheduler': 'normal'}
+CACHE_KEY_VERSION = 1
+
+# Warm worker (entrypoint.py --serve) - keeps ComfyUI and the checkpoint resident
+WORKER_CONTAINER = 'hal8000-image-worker'
+WORKER_PORT = 8189
+WORKER_URL = f'http://127.0.0.1:{WORKER_PORT}'
+
+def load_model_names():
+    """Model names from models.json (falls back to the built-in pair)"""
+    try:
+        with open(MODEL_REGISTRY, 'r', encoding='utf-8') as f:
+            return list(json.load(f)['models'])
+    except (OSError, ValueError, KeyError):
+        return ['sdxl', 'sd15']
+
+def cache_key(job):
+    """
+    Content address for a generation request.
+
+    Hashes every parameter that affects the pixels: model, prompt, negative
+    prompt, size, steps, seed, sampler settings and any text overlay.
+    Only meaningful when the seed is pinned.
+    """
+    params = {
+        'version': CACHE_KEY_VERSION,
+        'model': job.get('model', 'sdxl'),
+        'prompt': job['prompt'],
+        'negative_prompt': job.get('negative_prompt') or DEFAULT_NEGATIVE_PROMPT,
+        'width': int(job.get('width', 1024)),
+        'height': int(job.get('height', 1024)),
+        'steps': int(job.get('steps', 20)),
+        'seed': int(job['seed']),
+        'sampler': SAMPLER_SETTINGS
+    }
+    if job.get('text'):
+        params['text'] = {
+            'text': job['text'],
+            'position': job.get('text_position', 'south'),
+            'size': int(job.get('text_size', 72)),
+            'color': job.get('text_color', 'white')
+        }
+
+    canonical = json.dumps(params, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _cache_path(key):
+    return IMAGE_CACHE / key[:2] / f'{key}.png'
+
+def _unshare(path):
+    """Unlink an output that is hard-linked to a cache entry before overwriting it"""
+    try:
+        if path.stat().st_nlink > 1:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+def cache_fetch(key, output_path):
+    """
+    Place a cached image at output_path (hard link, or copy across devices).
+
+    Returns:
+        True on a cache hit
+    """
+    cached = _cache_path(key)
+    if not cached.exists():
+        return False
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.exists():
+        output_path.unlink()
+    try:
+        os.link(cached, output_path)
+    except OSError:
+        shutil.copy2(cached, output_path)
+
+    # mtime doubles as last-used time for LRU eviction
+    os.utime(cached)
+    return True
+
+def cache_store(key, image_path):
+    """Copy a freshly generated image into the cache, then enforce the size cap"""
+    cached = _cache_path(key)
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cached.with_suffix('.tmp')
+    shutil.copy2(image_path, tmp)
+    os.replace(tmp, cached)
+    os.utime(cached)
+    cache_prune()
+
+def _cache_entries():
+    """(path, size, mtime) for every cached image"""
+    if not IMAGE_CACHE.exists():
+        return []
+    entries = []
+    for path in IMAGE_CACHE.glob('*/*.png'):
+        stat = path.stat()
+        entries.append((path, stat.st_size, stat.st_mtime))
+    return entries
+
+def cache_stats():
+    """Entry count, total size and cap of the image cache"""
+    entries = _cache_entries()
+    stats = {
+        'path': str(IMAGE_CACHE),
+        'entries': len(entries),
+        'total_mb': round(sum(size for _, size, _ in entries) / (1024 * 1024), 2),
+        'max_gb': IMAGE_CACHE_MAX_GB
+    }
+    if entries:
+        stats['oldest_used'] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(min(e[2] for e in entries)))
+        stats['newest_used'] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(max(e[2] for e in entries)))
+    return stats
+
+def cache_prune(max_gb=None):
+    """
+    Evict least recently used images until the cache fits under max_gb.
+
+    Returns:
+        (entries removed, bytes freed)
+    """
+    max_bytes = (IMAGE_CACHE_MAX_GB if max_gb is None else max_gb) * 1024 ** 3
+    entries = sorted(_cache_entries(), key=lambda entry: entry[2])
+    total = sum(size for _, size, _ in entries)
+
+    removed = freed = 0
+    for path, size, _ in entries:
+        if total <= max_bytes:
+            break
+        path.unlink()
+        total -= size
+        freed += size
+        removed += 1
+
+    return removed, freed
+
+def worker_status(timeout=0.5):
+    """
+    Query the warm worker's health endpoint.
+
+    Returns:
+        Status dict if a worker is answering, otherwise None
+    """
+    try:
+        with urllib.request.urlopen(f'{WORKER_URL}/health', timeout=timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+def start_worker(preload=('sdxl',), memory_budget_gb=None, timeout=180):
+    """
+    Start the warm worker container and wait until it answers /health.
+
+    Args:
+        preload: Models to load at startup
+        memory_budget_gb: Checkpoint memory budget (default: the worker's own)
+    """
+    if worker_status():
+        print(f"✓ Worker already running at {WORKER_URL}", file=sys.stderr)
+        return True
+
+    MODEL_CACHE.mkdir(parents=True, exist_ok=True)
+
+    # Remove a stopped container left over from a previous run
+    subprocess.run(['docker', 'rm', '-f', WORKER_CONTAINER],
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    cmd = [
+        'docker', 'run',
+        '-d',                                      # Detached, long-lived
+        '--name', WORKER_CONTAINER,
+        '--gpus', 'all',
+        '-p', f'127.0.0.1:{WORKER_PORT}:{WORKER_PORT}',
+        '-v', f'{MODEL_CACHE}:/models',
+        'hal8000-image-gen:latest',
+        '--serve', '--port', str(WORKER_PORT)
+    ]
+    for model in preload or []:
+        cmd.extend(['--preload', model])
+    if memory_budget_gb is not None:
+        cmd.extend(['--memory-budget-gb', str(memory_budget_gb)])
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not start worker: {result.stderr.strip()}")
+
+    print(f"Starting worker (preload: {', '.join(preload or []) or 'none'})...", file=sys.stderr)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if worker_status():
+            print(f"✓ Worker ready at {WORKER_URL}", file=sys.stderr)
+            return True
+        time.sleep(2)
+
+    raise RuntimeError(f"Worker did not become ready within {timeout}s "
+                       f"(check: docker logs {WORKER_CONTAINER})")
+
+def stop_worker():
+    """Stop and remove the warm worker container"""
+    result = subprocess.run(['docker', 'rm', '-f', WORKER_CONTAINER],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Worker not running ({result.stderr.strip()})", file=sys.stderr)
+        return False
+    print("✓ Worker stopped", file=sys.stderr)
+    return True
+
+def generate_image_via_worker(job, output_path, timeout=900):
+    """
+    Submit a job to the warm worker and write the returned PNG.
+
+    Raises:
+        urllib.error.URLError: If the worker cannot be reached
+        TimeoutError: If the worker does not answer within timeout seconds
+        RuntimeError: If the worker reports a generation error
+    """
+    request = urllib.request.Request(
+        f'{WORKER_URL}/generate',
+        data=json.dumps(job).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = response.read()
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode('utf-8', errors='replace')
+        raise RuntimeError(f"Worker error ({e.code}): {detail}")
+
+    Path(output_path).write_bytes(data)
+    return output_path
+
 def generate_image(
     prompt,
     output_path,
@@ -25,15 +283,22 @@ def generate_image(
     text=None,
     text_position='south',
     text_size=72,
-    text_color='white'
+    text_color='white',
+    use_worker=True,
+    seed=None,
+    negative_prompt=DEFAULT_NEGATIVE_PROMPT,
+    use_cache=True
 ):
     """
     Generate AI image using Docker container with GPU acceleration.
 
+    Submits to the warm worker when one is running; otherwise runs a
+    one-shot container (start server, load model, generate, exit).
+
     Args:
         prompt: Text description of desired image
         output_path: Where to save generated image (absolute or relative)
-        model: Which model to use ('sdxl', 'sd15')
+        model: Which model to use (a key in models.json, e.g. 'sdxl', 'sd15')
         width: Image width in pixels (default: 1024)
         height: Image height in pixels (default: 1024)
         steps: Generation steps - more = better quality but slower (default: 20)
@@ -41,6 +306,10 @@ def generate_image(
         text_position: Position of text overlay (default: 'south')
         text_size: Font size for text overlay (default: 72)
         text_color: Color of text overlay (default: 'white')
+        use_worker: Try the warm worker before a one-shot container (default: True)
+        seed: Sampler seed; pinning it makes the request cacheable (default: random)
+        negative_prompt: What to steer away from (default: text, watermark, blurry, low quality)
+        use_cache: Reuse/store images in the content-addressed cache (default: True)
 
     Returns:
         Path to generated image
@@ -54,19 +323,66 @@ def generate_image(
     output_dir = output_path.parent
     output_filename = output_path.name
 
-    # Model cache on D: drive (hybrid approach)
-    model_cache = Path('/mnt/d/~HAL8000-Assistant/.docker-cache/models')
-    model_cache.mkdir(parents=True, exist_ok=True)
-
     # Ensure output directory exists
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    job = {
+        'prompt': prompt,
+        'model': model,
+        'width': width,
+        'height': height,
+        'steps': steps,
+        'negative_prompt': negative_prompt
+    }
+    if seed is not None:
+        job['seed'] = seed
+    if text:
+        job.update({
+            'text': text,
+            'text_position': text_position,
+            'text_size': text_size,
+            'text_color': text_color
+        })
+
+    # Cache path: identical pinned-seed request -> no Docker at all
+    key = cache_key(job) if use_cache and seed is not None else None
+    if key and cache_fetch(key, output_path):
+        print(f"✓ Cache hit ({key[:12]}), no generation needed", file=sys.stderr)
+        return _report_output(output_path)
+
+    # Never write through a hard link into a cache entry
+    _unshare(output_path)
+
+    # Display generation info
+    print(f"Generating image with {model.upper()}...", file=sys.stderr)
+    print(f"Prompt: {prompt}", file=sys.stderr)
+    print(f"Output: {output_path}", file=sys.stderr)
+    print(f"Parameters: {width}x{height}, {steps} steps, seed {seed if seed is not None else 'random'}",
+          file=sys.stderr)
+    print("", file=sys.stderr)
+
+    # Warm path: worker keeps ComfyUI and the checkpoint loaded
+    if use_worker and worker_status():
+        try:
+            print(f"Using warm worker at {WORKER_URL}", file=sys.stderr)
+            generate_image_via_worker(job, output_path)
+            if key:
+                cache_store(key, output_path)
+            return _report_output(output_path)
+        except (urllib.error.URLError, OSError) as e:
+            # Worker went away or timed out mid-request - fall through to one-shot run
+            print(f"Worker unavailable ({getattr(e, 'reason', e)}), falling back to one-shot container",
+                  file=sys.stderr)
+
+    # Cold path: one-shot container
+    MODEL_CACHE.mkdir(parents=True, exist_ok=True)
+
     # Build Docker command
     cmd = [
         'docker', 'run',
         '--rm',                                    # Remove container after completion
         '--gpus', 'all',                           # Enable GPU access (RTX 3090)
-        '-v', f'{model_cache}:/models',            # Model cache (persistent)
+        '-v', f'{MODEL_CACHE}:/models',            # Model cache (persistent)
         '-v', f'{output_dir}:/output',             # Output directory
         'hal8000-image-gen:latest',                # Our Docker image
         '--prompt', prompt,
@@ -74,9 +390,13 @@ def generate_image(
         '--output', f'/output/{output_filename}',
         '--width', str(width),
         '--height', str(height),
-        '--steps', str(steps)
+        '--steps', str(steps),
+        '--negative-prompt', negative_prompt
     ]
 
+    if seed is not None:
+        cmd.extend(['--seed', str(seed)])
+
     # Add text overlay parameters if provided
     if text:
         cmd.extend(['--text', text])
@@ -84,13 +404,6 @@ def generate_image(
         cmd.extend(['--text-size', str(text_size)])
         cmd.extend(['--text-color', text_color])
 
-    # Display generation info
-    print(f"Generating image with {model.upper()}...", file=sys.stderr)
-    print(f"Prompt: {prompt}", file=sys.stderr)
-    print(f"Output: {output_path}", file=sys.stderr)
-    print(f"Parameters: {width}x{height}, {steps} steps", file=sys.stderr)
-    print("", file=sys.stderr)
-
     # Run container
     result = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
 
@@ -100,7 +413,13 @@ def generate_image(
         print(result.stderr, file=sys.stderr)
         raise RuntimeError(f"Docker container exited with code {result.returncode}")
 
-    # Verify output exists
+    _report_output(output_path)
+    if key:
+        cache_store(key, output_path)
+    return output_path
+
+def _report_output(output_path):
+    """Verify the generated image exists and print its summary"""
     if not output_path.exists():
         raise RuntimeError(f"Image generation completed but output file not found: {output_path}")
 
@@ -111,7 +430,265 @@ def generate_image(
 
     return output_path
 
+def load_manifest(manifest_path):
+    """
+    Read a JSONL job manifest.
+
+    Each line is one job: prompt and output are required; model, width,
+    height, steps, seed, negative_prompt, id and the text_* overlay fields
+    are optional. Relative outputs resolve against the manifest's directory.
+
+    Ids are normalised to strings (the worker and container report them as
+    strings) and must be unique within the manifest.
+
+    Returns:
+        List of job dicts with absolute host output paths
+    """
+    manifest_path = Path(manifest_path).resolve()
+    jobs = []
+    seen = {}
+
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            job = json.loads(line)
+            if not job.get('prompt') or not job.get('output'):
+                raise ValueError(f"{manifest_path}:{line_number}: job requires 'prompt' and 'output'")
+            job['id'] = str(job.get('id', line_number))
+            if job['id'] in seen:
+                raise ValueError(f"{manifest_path}:{line_number}: duplicate job id '{job['id']}' "
+                                 f"(first used on line {seen[job['id']]})")
+            seen[job['id']] = line_number
+            job['output'] = str((manifest_path.parent / job['output']).resolve())
+            jobs.append(job)
+
+    return jobs
+
+def _run_manifest_via_worker(jobs, timeout=3600):
+    """Send all jobs to the warm worker's /batch endpoint and write the images"""
+    payload = {'jobs': [{k: v for k, v in job.items() if k != 'output'} for job in jobs]}
+    request = urllib.request.Request(
+        f'{WORKER_URL}/batch',
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            results = json.loads(response.read())['results']
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode('utf-8', errors='replace')
+        raise RuntimeError(f"Worker error ({e.code}): {detail}")
+
+    outputs = {job['id']: job['output'] for job in jobs}
+    for result in results:
+        result['output'] = outputs[result['id']]
+        image = result.pop('image_b64', None)
+        if image is not None:
+            Path(result['output']).parent.mkdir(parents=True, exist_ok=True)
+            Path(result['output']).write_bytes(base64.b64decode(image))
+
+    return results
+
+def _run_manifest_via_container(jobs):
+    """Run every job in one container; each output directory is mounted once"""
+    MODEL_CACHE.mkdir(parents=True, exist_ok=True)
+
+    # Map each distinct host output directory to /output/<n>
+    mounts = {}
+    container_jobs = []
+    host_outputs = {}
+    for job in jobs:
+        output = Path(job['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        mount = mounts.setdefault(str(output.parent), f'/output/{len(mounts)}')
+        container_output = f'{mount}/{output.name}'
+        host_outputs[container_output] = job['output']
+        container_jobs.append(dict(job, output=container_output))
+
+    with tempfile.TemporaryDirectory(prefix='hal-image-batch-') as jobs_dir:
+        manifest = Path(jobs_dir) / 'manifest.jsonl'
+        with open(manifest, 'w', encoding='utf-8') as f:
+            for job in container_jobs:
+                f.write(json.dumps(job) + "\n")
+
+        cmd = [
+            'docker', 'run',
+            '--rm',
+            '--gpus', 'all',
+            '-v', f'{MODEL_CACHE}:/models',
+            '-v', f'{jobs_dir}:/jobs'
+        ]
+        for host_dir, mount in mounts.items():
+            cmd.extend(['-v', f'{host_dir}:{mount}'])
+        cmd.extend([
+            'hal8000-image-gen:latest',
+            '--manifest', '/jobs/manifest.jsonl',
+            '--results', '/jobs/results.jsonl'
+        ])
+
+        result = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+
+        results_file = Path(jobs_dir) / 'results.jsonl'
+        if not results_file.exists():
+            print(result.stderr, file=sys.stderr)
+            raise RuntimeError(f"Docker container exited with code {result.returncode}")
+
+        results = []
+        with open(results_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry['output'] = host_outputs.get(entry['output'], entry['output'])
+                    results.append(entry)
+
+    return results
+
+def generate_manifest(manifest_path, results_path=None, use_worker=True, use_cache=True):
+    """
+    Generate every job in a JSONL manifest with a single container run.
+
+    Jobs that share a model and resolution are queued together, and
+    unseeded jobs with the same prompt become real latent batches, so
+    container, server and model startup is paid once for the whole batch.
+
+    Args:
+        manifest_path: JSONL file, one job per line
+        results_path: JSONL file for per-job status (default: <manifest>.results.jsonl)
+        use_worker: Send the batch to the warm worker if one is running
+        use_cache: Serve pinned-seed jobs from the image cache when possible
+
+    Returns:
+        List of per-job result dicts
+    """
+    manifest_path = Path(manifest_path).resolve()
+    if results_path is None:
+        results_path = manifest_path.with_suffix('.results.jsonl')
+    results_path = Path(results_path).resolve()
+
+    jobs = load_manifest(manifest_path)
+    print(f"Batch: {len(jobs)} jobs from {manifest_path}", file=sys.stderr)
+
+    # Serve pinned-seed jobs from the cache; only the rest need a container
+    keys = {}
+    results = []
+    pending = []
+    for job in jobs:
+        key = cache_key(job) if use_cache and job.get('seed') is not None else None
+        if key and cache_fetch(key, job['output']):
+            results.append({'id': job['id'], 'output': job['output'], 'status': 'ok',
+                            'seed': int(job['seed']), 'cached': True})
+            continue
+        if key:
+            keys[job['id']] = key
+        _unshare(Path(job['output']))
+        pending.append(job)
+
+    if results:
+        print(f"Cache: {len(results)} hits, {len(pending)} to generate", file=sys.stderr)
+
+    generated = None
+    if pending and use_worker and worker_status():
+        try:
+            print(f"Using warm worker at {WORKER_URL}", file=sys.stderr)
+            generated = _run_manifest_via_worker(pending)
+        except (urllib.error.URLError, OSError) as e:
+            print(f"Worker unavailable ({getattr(e, 'reason', e)}), falling back to one-shot container",
+                  file=sys.stderr)
+
+    if pending and generated is None:
+        generated = _run_manifest_via_container(pending)
+
+    for result in generated or []:
+        if result['status'] == 'ok' and result['id'] in keys:
+            cache_store(keys[result['id']], result['output'])
+        results.append(result)
+
+    # Jobs the container never reported on (e.g. it crashed) count as failed
+    reported = {r['id'] for r in results}
+    for job in jobs:
+        if job['id'] not in reported:
+            results.append({'id': job['id'], 'output': job['output'], 'status': 'error',
+                            'error': 'no result reported'})
+
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_path, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+
+    ok = sum(1 for r in results if r['status'] == 'ok')
+    print(f"\n✓ {ok}/{len(results)} images generated", file=sys.stderr)
+    print(f"✓ Results: {results_path}", file=sys.stderr)
+
+    return results
+
+def cache_main(argv):
+    """Handle the 'cache' subcommand: show stats or prune the image cache"""
+    parser = argparse.ArgumentParser(
+        prog='HAL-generate-image.py cache',
+        description='Inspect or prune the content-addressed image cache'
+    )
+    parser.add_argument('action', choices=['stats', 'prune'])
+    parser.add_argument(
+        '--max-gb',
+        type=float,
+        help=f'Prune down to this size (default: {IMAGE_CACHE_MAX_GB}, 0 empties the cache)'
+    )
+    args = parser.parse_args(argv)
+
+    if args.action == 'stats':
+        print(json.dumps(cache_stats(), indent=2))
+    else:
+        removed, freed = cache_prune(args.max_gb)
+        print(f"✓ Removed {removed} cached images ({freed / (1024 * 1024):.1f} MB)", file=sys.stderr)
+    return 0
+
+def worker_main(argv):
+    """Handle the 'worker' subcommand: start, stop or inspect the warm worker"""
+    parser = argparse.ArgumentParser(
+        prog='HAL-generate-image.py worker',
+        description='Manage the warm image generation worker'
+    )
+    parser.add_argument('action', choices=['start', 'stop', 'status'])
+    parser.add_argument(
+        '--preload',
+        action='append',
+        choices=load_model_names() + ['none'],
+        help='Model to load when the worker starts, repeatable (default: sdxl)'
+    )
+    parser.add_argument(
+        '--memory-budget-gb',
+        type=float,
+        help='GB of checkpoints the worker keeps resident before LRU eviction (default: 16)'
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == 'start':
+            preload = [m for m in (args.preload or ['sdxl']) if m != 'none']
+            start_worker(preload=preload, memory_budget_gb=args.memory_budget_gb)
+        elif args.action == 'stop':
+            stop_worker()
+        else:
+            status = worker_status()
+            if not status:
+                print("Worker not running", file=sys.stderr)
+                return 1
+            print(json.dumps(status, indent=2))
+        return 0
+    except Exception as e:
+        print(f"\nFatal error: {e}", file=sys.stderr)
+        return 1
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        sys.exit(worker_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'cache':
+        sys.exit(cache_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
         description='HAL8000-Assistant AI Image Generation Tool',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -132,6 +709,23 @@ Examples:
   Maximum quality:
     %(prog)s --prompt "detailed portrait" --model sdxl --steps 50 --output portrait.png
 
+  Batch from a manifest (one container for all jobs):
+    %(prog)s --manifest jobs.jsonl --results results.jsonl
+
+    jobs.jsonl - one JSON object per line, e.g.:
+      {"prompt": "a robot", "output": "robot.png", "model": "sd15", "steps": 25}
+      {"prompt": "a city", "output": "city.png", "width": 1280, "height": 768, "seed": 42}
+
+  Reproducible + cached (same parameters and seed -> no Docker run):
+    %(prog)s --prompt "a robot" --seed 42 --output robot.png
+    %(prog)s cache stats
+    %(prog)s cache prune --max-gb 2
+
+  Warm worker (keeps ComfyUI + model loaded between calls):
+    %(prog)s worker start
+    %(prog)s --prompt "a robot" --output robot.png   # uses worker automatically
+    %(prog)s worker stop
+
 Models:
   sdxl    - Stable Diffusion XL (best quality, ~6.5GB, 3-5s on RTX 3090)
   sd15    - Stable Diffusion 1.5 (faster, ~4GB, 1-2s on RTX 3090)
@@ -142,26 +736,38 @@ Notes:
   - Subsequent runs use cached models (much faster)
   - Requires Docker with GPU support (nvidia-docker)
   - Container runs isolated, no host pollution
+  - Pinned-seed images are cached in /mnt/d/~HAL8000-Assistant/.docker-cache/images/
+    (LRU, capped at HAL_IMAGE_CACHE_MAX_GB, default 5)
+  - A running worker (see 'worker start') is used automatically;
+    without one, each call runs a one-shot container
         """
     )
 
     parser.add_argument(
         '--prompt',
-        required=True,
-        help='Text description of image to generate'
+        help='Text description of image to generate (required unless --manifest)'
     )
 
     parser.add_argument(
         '--output',
-        required=True,
         help='Output file path (e.g., image.png or /full/path/to/image.png)'
     )
 
+    parser.add_argument(
+        '--manifest',
+        help='JSONL job manifest: generate many images in one container run'
+    )
+
+    parser.add_argument(
+        '--results',
+        help='JSONL file for per-job results (default: <manifest>.results.jsonl)'
+    )
+
     parser.add_argument(
         '--model',
         default='sdxl',
-        choices=['sdxl', 'sd15'],
-        help='Model to use (default: sdxl for best quality)'
+        choices=load_model_names(),
+        help='Model to use, from models.json (default: sdxl for best quality)'
     )
 
     parser.add_argument(
@@ -185,6 +791,18 @@ Notes:
         help='Generation steps: more = better quality, slower (default: 20, range: 10-50)'
     )
 
+    parser.add_argument(
+        '--seed',
+        type=int,
+        help='Sampler seed for reproducible output (default: random); enables the image cache'
+    )
+
+    parser.add_argument(
+        '--negative-prompt',
+        default=DEFAULT_NEGATIVE_PROMPT,
+        help=f'What to avoid in the image (default: "{DEFAULT_NEGATIVE_PROMPT}")'
+    )
+
     parser.add_argument(
         '--text',
         help='Optional text to overlay on image'
@@ -210,8 +828,33 @@ Notes:
         help='Text color: white, black, red, blue, or hex #RRGGBB (default: white)'
     )
 
+    parser.add_argument(
+        '--no-worker',
+        action='store_true',
+        help='Always use a one-shot container, even if a warm worker is running'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Skip the image cache (always generate, do not store)'
+    )
+
     args = parser.parse_args()
 
+    if args.manifest:
+        try:
+            results = generate_manifest(args.manifest, args.results,
+                                        use_worker=not args.no_worker,
+                                        use_cache=not args.no_cache)
+            sys.exit(0 if all(r['status'] == 'ok' for r in results) else 1)
+        except Exception as e:
+            print(f"\nFatal error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if not args.prompt or not args.output:
+        parser.error("--prompt and --output are required (or use --manifest)")
+
     # Validate parameters
     if args.steps < 1 or args.steps > 100:
         parser.error("steps must be between 1 and 100")
@@ -234,7 +877,11 @@ Notes:
             text=args.text,
             text_position=args.text_position,
             text_size=args.text_size,
-            text_color=args.text_color
+            text_color=args.text_color,
+            use_worker=not args.no_worker,
+            seed=args.seed,
+            negative_prompt=args.negative_prompt,
+            use_cache=not args.no_cache
         )
         sys.exit(0)
     except Exception as e:
@@ -11,46 +11,276 @@ import sys
 import json
 import time
 import subprocess
+import tempfile
+import threading
 import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
+# Default port for the warm worker (--serve); ComfyUI itself stays on 8188
+WORKER_PORT = 8189
+
+COMFYUI_URL = "http://127.0.0.1:8188"
+COMFYUI_OUTPUT_DIR = Path("/app/ComfyUI/output")
+DEFAULT_NEGATIVE_PROMPT = "text, watermark, blurry, low quality"
+
+# Fixed sampler settings (HAL-generate-image.py keys its image cache on these)
+SAMPLER_SETTINGS = {"cfg": 7.0, "sampler_name": "euler", "scheduler": "normal"}
+
+# Batch limits: images per latent batch, sampler branches per queued workflow
+MAX_BATCH_SIZE = 4
+MAX_BRANCHES = 8
+
+# Model registry (filename, url, size, hash, memory footprint per model)
+MODEL_REGISTRY_PATH = Path(os.environ.get('HAL_MODEL_REGISTRY',
+                                          Path(__file__).resolve().with_name('models.json')))
+
+# Warm worker: checkpoints kept resident up to this many GB (LRU beyond it)
+MODEL_MEMORY_BUDGET_GB = float(os.environ.get('HAL_MODEL_MEMORY_GB', '16'))
+
+# ComfyUI --cache-lru entries reserved per resident checkpoint (one batch
+# workflow is at most 1 + 6 * MAX_BRANCHES node outputs)
+CACHE_LRU_PER_MODEL = 50
+
+# Model downloads: parallel Range connections and chunk size (resume granularity)
+DOWNLOAD_CONNECTIONS = int(os.environ.get('HAL_DOWNLOAD_CONNECTIONS', '4'))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+
+# JSON-lines progress on stderr (--progress-json or HAL_PROGRESS_JSON=1)
+PROGRESS_JSON = os.environ.get('HAL_PROGRESS_JSON') == '1'
+
 def log(message):
     """Print to stderr to keep stdout clean"""
     print(f"[HAL-IMAGE-GEN] {message}", file=sys.stderr)
 
-def download_model(url, output_path):
-    """Download a model file with progress reporting"""
+def emit_progress(event, **fields):
+    """
+    Report download progress.
+
+    Human-readable by default; one JSON object per line on stderr when
+    PROGRESS_JSON is set (--progress-json or HAL_PROGRESS_JSON=1).
+    """
+    if PROGRESS_JSON:
+        print(json.dumps(dict(event=event, **fields)), file=sys.stderr, flush=True)
+    elif event == 'progress':
+        percent = fields['downloaded'] * 100 / fields['total'] if fields['total'] else 0
+        sys.stderr.write(
+            f"\r[HAL-IMAGE-GEN] Progress: {percent:.1f}% "
+            f"({fields['downloaded'] / (1024 * 1024):.1f}/{fields['total'] / (1024 * 1024):.1f} MB, "
+            f"{fields['rate_mbps']:.1f} MB/s)"
+        )
+        sys.stderr.flush()
+    elif event == 'done':
+        sys.stderr.write("\n")
+        sys.stderr.flush()
+
+def probe_download(url, timeout=30):
+    """
+    Find the size of a remote file and whether it serves byte ranges.
+
+    Returns:
+        (total_size or None, supports_ranges)
+    """
+    request = urllib.request.Request(url, headers={'Range': 'bytes=0-0'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        content_range = response.headers.get('Content-Range', '')
+        if response.status == 206 and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            return (int(total) if total.isdigit() else None), True
+        length = response.headers.get('Content-Length')
+        return (int(length) if length else None), False
+
+def file_sha256(path, block_size=8 * 1024 * 1024):
+    """Stream a file through SHA-256"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def download_model(url, output_path, expected_size=None, expected_sha256=None,
+                   connections=DOWNLOAD_CONNECTIONS, chunk_size=DOWNLOAD_CHUNK_SIZE, timeout=60):
+    """
+    Download a model file safely.
+
+    Writes to <output>.part and only renames to the final path after the
+    size and SHA-256 match. When the server honours HTTP Range requests the
+    file is fetched as fixed-size chunks over several connections, and
+    finished chunks are recorded in <output>.part.json so an interrupted
+    download resumes where it stopped. Without Range support it falls back
+    to a single stream.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    output_path = Path(output_path)
+    part_path = output_path.with_name(output_path.name + '.part')
+    state_path = output_path.with_name(output_path.name + '.part.json')
+
     log(f"Downloading model to {output_path}...")
+    total, ranged = probe_download(url, timeout=timeout)
+    if expected_size and total and total != expected_size:
+        raise RuntimeError(f"Server reports {total} bytes, registry expects {expected_size}")
+    total = total or expected_size
 
-    def report_progress(block_num, block_size, total_size):
-        downloaded = block_num * block_size
-        if total_size > 0:
-            percent = min(downloaded * 100 / total_size, 100)
-            mb_downloaded = downloaded / (1024 * 1024)
-            mb_total = total_size / (1024 * 1024)
-            sys.stderr.write(f"\r[HAL-IMAGE-GEN] Progress: {percent:.1f}% ({mb_downloaded:.1f}/{mb_total:.1f} MB)")
-            sys.stderr.flush()
+    started = time.time()
+    lock = threading.Lock()
+    progress = {'downloaded': 0, 'last_report': 0.0}
+
+    def advance(nbytes):
+        with lock:
+            progress['downloaded'] += nbytes
+            now = time.time()
+            if now - progress['last_report'] >= 0.5:
+                progress['last_report'] = now
+                elapsed = max(now - started, 1e-6)
+                emit_progress('progress', file=output_path.name,
+                              downloaded=progress['downloaded'], total=total or 0,
+                              rate_mbps=round(progress['downloaded'] / elapsed / (1024 * 1024), 2))
+
+    if ranged and total:
+        chunks = [(start, min(start + chunk_size, total) - 1) for start in range(0, total, chunk_size)]
+
+        done = set()
+        if part_path.exists() and state_path.exists():
+            state = json.loads(state_path.read_text())
+            if state.get('url') == url and state.get('total') == total and state.get('chunk_size') == chunk_size:
+                done = {tuple(chunk) for chunk in state['done']}
+        elif part_path.exists():
+            have = part_path.stat().st_size
+            if have < total:
+                # Legacy truncated file: every chunk fully inside it is usable
+                done = {chunk for chunk in chunks if chunk[1] < have}
+            else:
+                # Full size without a chunk record: a finished download that
+                # failed verification, so nothing in it can be trusted
+                log(f"Discarding unverifiable {part_path.name}, downloading from scratch")
+                part_path.unlink()
+
+        with open(part_path, 'ab') as f:
+            f.truncate(total)
+
+        resumed = sum(end - start + 1 for start, end in done)
+        progress['downloaded'] = resumed
+        emit_progress('start', file=output_path.name, total=total, resumed=resumed,
+                      connections=connections, chunks=len(chunks))
+
+        def save_state():
+            state_path.write_text(json.dumps({
+                'url': url, 'total': total, 'chunk_size': chunk_size,
+                'done': sorted(done)
+            }))
+
+        def fetch(chunk):
+            start, end = chunk
+            request = urllib.request.Request(url, headers={'Range': f'bytes={start}-{end}'})
+            with urllib.request.urlopen(request, timeout=timeout) as response, open(part_path, 'r+b') as f:
+                if response.status != 206:
+                    raise RuntimeError(f"Range request ignored (HTTP {response.status})")
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining:
+                    block = response.read(min(1024 * 1024, remaining))
+                    if not block:
+                        raise RuntimeError(f"Connection closed early in bytes {start}-{end}")
+                    f.write(block)
+                    remaining -= len(block)
+                    advance(len(block))
+            with lock:
+                done.add(chunk)
+                save_state()
+
+        todo = [chunk for chunk in chunks if chunk not in done]
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as pool:
+            for future in [pool.submit(fetch, chunk) for chunk in todo]:
+                future.result()
 
-    urllib.request.urlretrieve(url, output_path, reporthook=report_progress)
-    sys.stderr.write("\n")
+    else:
+        # No Range support: one stream, from scratch
+        emit_progress('start', file=output_path.name, total=total or 0, resumed=0,
+                      connections=1, chunks=1)
+        with urllib.request.urlopen(url, timeout=timeout) as response, open(part_path, 'wb') as f:
+            for block in iter(lambda: response.read(1024 * 1024), b''):
+                f.write(block)
+                advance(len(block))
+
+    emit_progress('done', file=output_path.name, downloaded=progress['downloaded'],
+                  seconds=round(time.time() - started, 1))
+
+    # Verify before the file becomes visible under its real name
+    size = part_path.stat().st_size
+    if expected_size and size != expected_size:
+        raise RuntimeError(f"Size mismatch for {output_path.name}: got {size}, expected {expected_size}")
+
+    if expected_sha256:
+        log("Verifying SHA-256...")
+        digest = file_sha256(part_path)
+        if digest != expected_sha256:
+            part_path.unlink()
+            state_path.unlink(missing_ok=True)
+            raise RuntimeError(f"SHA-256 mismatch for {output_path.name}: got {digest}")
+        emit_progress('verified', file=output_path.name, sha256=digest)
+
+    os.replace(part_path, output_path)
+    state_path.unlink(missing_ok=True)
+    if expected_sha256:
+        write_verified_marker(output_path, expected_sha256)
     log(f"Download complete: {output_path}")
 
+def _marker_path(model_path):
+    return model_path.with_name(model_path.name + '.verified')
+
+def write_verified_marker(model_path, sha256):
+    """Remember that this exact file (size + mtime) passed the hash check"""
+    stat = model_path.stat()
+    _marker_path(model_path).write_text(json.dumps({
+        'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns
+    }))
+
+def is_verified(model_path, model_info):
+    """
+    Check a cached model against the registry.
+
+    Size is always checked. The SHA-256 is computed once and remembered in
+    a .verified marker keyed on size and mtime, so later runs stay cheap.
+    """
+    stat = model_path.stat()
+    if model_info.get('size_bytes') and stat.st_size != model_info['size_bytes']:
+        return False
+
+    expected = model_info.get('sha256')
+    if not expected:
+        return True
+
+    marker = _marker_path(model_path)
+    if marker.exists():
+        recorded = json.loads(marker.read_text())
+        if (recorded.get('sha256') == expected and recorded.get('size') == stat.st_size
+                and recorded.get('mtime_ns') == stat.st_mtime_ns):
+            return True
+
+    log(f"Verifying SHA-256 of {model_path.name} (one-time)...")
+    if file_sha256(model_path) != expected:
+        return False
+    write_verified_marker(model_path, expected)
+    return True
+
+def load_model_registry(path=None):
+    """Load the model table (models.json next to this script, or HAL_MODEL_REGISTRY)"""
+    path = Path(path or MODEL_REGISTRY_PATH)
+    with open(path, 'r', encoding='utf-8') as f:
+        registry = json.load(f)
+
+    if "models" not in registry:
+        raise ValueError(f"Invalid model registry {path} - missing 'models' key")
+
+    return registry["models"]
+
 def ensure_model(model_name, models_dir):
-    """Download model if not already cached"""
-
-    # Model registry
-    models = {
-        'sdxl': {
-            'filename': 'sd_xl_base_1.0.safetensors',
-            'url': 'https://huggingface.co/stabilityai/stable-diffusion-xl-base-1.0/resolve/main/sd_xl_base_1.0.safetensors',
-            'size_gb': 6.5
-        },
-        'sd15': {
-            'filename': 'v1-5-pruned-emaonly.safetensors',
-            'url': 'https://huggingface.co/runwayml/stable-diffusion-v1-5/resolve/main/v1-5-pruned-emaonly.safetensors',
-            'size_gb': 4.0
-        }
-    }
+    """Download model if not already cached (and verified)"""
+
+    models = load_model_registry()
 
     if model_name not in models:
         raise ValueError(f"Unknown model: {model_name}. Available: {list(models.keys())}")
@@ -59,23 +289,36 @@ def ensure_model(model_name, models_dir):
 
     # All models go in checkpoints/
     model_path = Path(models_dir) / 'checkpoints' / model_info['filename']
+    part_path = model_path.with_name(model_path.name + '.part')
 
     if model_path.exists():
-        log(f"Model {model_name} already cached at {model_path}")
-        return str(model_path)
+        if is_verified(model_path, model_info):
+            log(f"Model {model_name} already cached at {model_path}")
+            return str(model_path)
+
+        # Truncated or corrupt (e.g. an interrupted pre-.part download): resume it
+        log(f"Cached {model_name} failed verification, resuming download")
+        os.replace(model_path, part_path)
+        _marker_path(model_path).unlink(missing_ok=True)
 
     log(f"Model {model_name} not found. Downloading (~{model_info['size_gb']}GB)...")
     model_path.parent.mkdir(parents=True, exist_ok=True)
-    download_model(model_info['url'], str(model_path))
+    download_model(
+        model_info['url'],
+        str(model_path),
+        expected_size=model_info.get('size_bytes'),
+        expected_sha256=model_info.get('sha256')
+    )
 
     return str(model_path)
 
-def start_comfyui_server():
+
+def start_comfyui_server(extra_args=None):
     """Start ComfyUI server and wait for it to be ready"""
     log("Starting ComfyUI server...")
 
     proc = subprocess.Popen(
-        ["python3", "main.py", "--listen", "127.0.0.1", "--port", "8188"],
+        ["python3", "main.py", "--listen", "127.0.0.1", "--port", "8188"] + list(extra_args or []),
         cwd="/app/ComfyUI",
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL
@@ -99,68 +342,86 @@ def start_comfyui_server():
     proc.terminate()
     raise RuntimeError("ComfyUI server failed to start within 60 seconds")
 
-def generate_image_via_api(prompt, model_path, output_path, width=1024, height=1024, steps=20):
-    """Generate image using ComfyUI API"""
-    import requests
+def random_seed():
+    """Time-based seed, used when the caller does not pin one"""
+    return int(time.time() * 1000) % (2**32)
 
-    log(f"Generating image: '{prompt[:50]}...'")
-    log(f"Parameters: {width}x{height}, {steps} steps")
+def build_workflow(model_filename, width, height, branches):
+    """
+    Build a ComfyUI API workflow sharing one checkpoint loader.
 
-    # Get model filename
-    model_filename = Path(model_path).name
+    Each branch is a dict with prompt, negative_prompt, steps, seed,
+    batch_size and filename_prefix, and becomes its own
+    EmptyLatentImage -> KSampler -> VAEDecode -> SaveImage chain.
 
-    # Build workflow: SDXL/SD1.5 use CheckpointLoaderSimple
+    Returns:
+        (workflow, save_node_ids) - save node id per branch, in order
+    """
+    # SDXL/SD1.5 use CheckpointLoaderSimple
     workflow = {
-        "3": {
-            "inputs": {
-                "seed": int(time.time() * 1000) % (2**32),
-                "steps": steps,
-                "cfg": 7.0,
-                "sampler_name": "euler",
-                "scheduler": "normal",
-                "denoise": 1.0,
-                "model": ["4", 0],
-                "positive": ["6", 0],
-                "negative": ["7", 0],
-                "latent_image": ["5", 0]
-            },
-            "class_type": "KSampler"
-        },
         "4": {
             "inputs": {"ckpt_name": model_filename},
             "class_type": "CheckpointLoaderSimple"
-        },
-        "5": {
-            "inputs": {"width": width, "height": height, "batch_size": 1},
+        }
+    }
+    save_nodes = []
+
+    for index, branch in enumerate(branches):
+        base = 10 * (index + 1)
+        latent, positive, negative, sampler, decode, save = (str(base + i) for i in range(6))
+
+        workflow[latent] = {
+            "inputs": {"width": width, "height": height, "batch_size": branch['batch_size']},
             "class_type": "EmptyLatentImage"
-        },
-        "6": {
-            "inputs": {"text": prompt, "clip": ["4", 1]},
+        }
+        workflow[positive] = {
+            "inputs": {"text": branch['prompt'], "clip": ["4", 1]},
             "class_type": "CLIPTextEncode"
-        },
-        "7": {
-            "inputs": {"text": "text, watermark, blurry, low quality", "clip": ["4", 1]},
+        }
+        workflow[negative] = {
+            "inputs": {"text": branch['negative_prompt'], "clip": ["4", 1]},
             "class_type": "CLIPTextEncode"
-        },
-        "8": {
-            "inputs": {"samples": ["3", 0], "vae": ["4", 2]},
+        }
+        workflow[sampler] = {
+            "inputs": {
+                "seed": branch['seed'],
+                "steps": branch['steps'],
+                "cfg": SAMPLER_SETTINGS['cfg'],
+                "sampler_name": SAMPLER_SETTINGS['sampler_name'],
+                "scheduler": SAMPLER_SETTINGS['scheduler'],
+                "denoise": 1.0,
+                "model": ["4", 0],
+                "positive": [positive, 0],
+                "negative": [negative, 0],
+                "latent_image": [latent, 0]
+            },
+            "class_type": "KSampler"
+        }
+        workflow[decode] = {
+            "inputs": {"samples": [sampler, 0], "vae": ["4", 2]},
             "class_type": "VAEDecode"
-        },
-        "9": {
+        }
+        workflow[save] = {
             "inputs": {
-                "filename_prefix": "ComfyUI",
-                "images": ["8", 0]
+                "filename_prefix": branch['filename_prefix'],
+                "images": [decode, 0]
             },
             "class_type": "SaveImage"
         }
-    }
+        save_nodes.append(save)
+
+    return workflow, save_nodes
+
+def queue_prompt(workflow, client_id=None):
+    """Submit a workflow to ComfyUI and return its prompt_id"""
+    import requests
 
-    # Submit to API
     log("Submitting generation request...")
-    response = requests.post(
-        "http://127.0.0.1:8188/prompt",
-        json={"prompt": workflow}
-    )
+    payload = {"prompt": workflow}
+    if client_id:
+        # Routes this prompt's progress events to our websocket
+        payload["client_id"] = client_id
+    response = requests.post(f"{COMFYUI_URL}/prompt", json=payload)
 
     if response.status_code != 200:
         raise RuntimeError(f"API request failed: {response.text}")
@@ -171,53 +432,417 @@ def generate_image_via_api(prompt, model_path, output_path, width=1024, height=1
     if not prompt_id:
         raise RuntimeError(f"No prompt_id in response: {result}")
 
-    log(f"Generation queued (ID: {prompt_id}). Waiting for completion...")
+    return prompt_id
 
-    # Poll for completion
-    output_dir = Path("/app/ComfyUI/output")
+def fetch_history_outputs(prompt_id):
+    """Outputs for a prompt from /history, or None if it has not finished"""
+    import requests
 
-    # Timeout: 10 minutes (generous for first-time model load into VRAM)
-    max_wait = 600
+    hist_response = requests.get(f"{COMFYUI_URL}/history/{prompt_id}")
+    if hist_response.status_code == 200:
+        history = hist_response.json()
+        if prompt_id in history:
+            return history[prompt_id].get('outputs') or None
+    return None
 
+def poll_for_outputs(prompt_id, max_wait=600, initial_delay=0.25, max_delay=5.0):
+    """
+    Poll ComfyUI history until the prompt has outputs.
+
+    Fallback for when the websocket is unavailable. The delay starts short
+    and backs off exponentially, so fast jobs return quickly without
+    hammering the server on slow ones.
+
+    Returns:
+        Dict of node_id -> node output (as reported by /history)
+    """
+    log(f"Generation queued (ID: {prompt_id}). Polling for completion...")
     start_time = time.time()
+    delay = initial_delay
 
     while time.time() - start_time < max_wait:
-        # Check history endpoint
         try:
-            hist_response = requests.get(f"http://127.0.0.1:8188/history/{prompt_id}")
-            if hist_response.status_code == 200:
-                history = hist_response.json()
-                if prompt_id in history:
-                    outputs = history[prompt_id].get('outputs', {})
-                    if outputs:
-                        log("Generation complete!")
-
-                        # Find the generated image
-                        for node_id, node_output in outputs.items():
-                            if 'images' in node_output:
-                                for img in node_output['images']:
-                                    filename = img.get('filename')
-                                    if filename:
-                                        src_path = output_dir / filename
-                                        if src_path.exists():
-                                            # Move to desired output location
-                                            import shutil
-                                            shutil.copy2(src_path, output_path)
-                                            log(f"Image saved to {output_path}")
-                                            return output_path
+            outputs = fetch_history_outputs(prompt_id)
+            if outputs:
+                log("Generation complete!")
+                return outputs
         except Exception as e:
             log(f"Polling error (retrying): {e}")
 
-        time.sleep(2)
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
 
     raise RuntimeError(f"Image generation timed out after {max_wait}s")
 
+def connect_websocket(client_id):
+    """
+    Open ComfyUI's progress websocket.
+
+    Returns:
+        Connected websocket, or None if websocket-client is missing or the
+        connection fails (callers then fall back to polling)
+    """
+    try:
+        import websocket
+    except ImportError:
+        log("websocket-client not installed, using history polling")
+        return None
+
+    ws_url = COMFYUI_URL.replace("http://", "ws://", 1) + f"/ws?clientId={client_id}"
+    try:
+        ws = websocket.WebSocket()
+        ws.connect(ws_url, timeout=5)
+        return ws
+    except Exception as e:
+        log(f"Websocket unavailable ({e}), using history polling")
+        return None
+
+def wait_via_websocket(ws, prompt_id, save_nodes, max_wait=600, timings=None):
+    """
+    Follow execution events for a prompt until its SaveImage nodes finish.
+
+    Returns as soon as every node in save_nodes has reported 'executed',
+    logging sampler steps as they arrive. If execution ends with some save
+    nodes served from cache (no 'executed' event), outputs come from /history.
+    If a timings dict is given, it receives 'cached_nodes' and per-node
+    'node_seconds' (time from one node starting to the next).
+
+    Returns:
+        Dict of node_id -> node output
+    """
+    import websocket
+
+    log(f"Generation queued (ID: {prompt_id}). Waiting for completion...")
+    outputs = {}
+    pending = set(save_nodes)
+    deadline = time.time() + max_wait
+    progress_shown = False
+    node_seconds = {}
+    current_node, node_started = None, None
+    if timings is not None:
+        timings['node_seconds'] = node_seconds
+        timings['cached_nodes'] = []
+
+    while time.time() < deadline:
+        ws.settimeout(max(1, min(60, deadline - time.time())))
+        try:
+            message = ws.recv()
+        except websocket.WebSocketTimeoutException:
+            continue
+
+        if not isinstance(message, str):
+            continue  # Binary preview frames
+
+        event = json.loads(message)
+        data = event.get('data', {})
+        if data.get('prompt_id') not in (None, prompt_id):
+            continue
+
+        event_type = event.get('type')
+        if event_type == 'executing':
+            now = time.time()
+            if current_node is not None:
+                node_seconds[current_node] = round(now - node_started, 3)
+            current_node, node_started = data.get('node'), now
+        elif event_type == 'execution_cached' and timings is not None:
+            timings['cached_nodes'] = [str(node) for node in data.get('nodes', [])]
+
+        if event_type == 'progress':
+            sys.stderr.write(f"\r[HAL-IMAGE-GEN] Step {data['value']}/{data['max']}")
+            sys.stderr.flush()
+            progress_shown = True
+        elif event_type == 'executed':
+            outputs[str(data['node'])] = data.get('output', {})
+            pending.discard(str(data['node']))
+            if not pending:
+                break
+        elif event_type == 'execution_error':
+            raise RuntimeError(f"ComfyUI execution error: {data.get('exception_message', data)}")
+        elif event_type == 'executing' and data.get('node') is None:
+            # Prompt finished; missing save nodes were cached
+            outputs.update(fetch_history_outputs(prompt_id) or {})
+            break
+    else:
+        raise RuntimeError(f"Image generation timed out after {max_wait}s")
+
+    if progress_shown:
+        sys.stderr.write("\n")
+    log("Generation complete!")
+    return outputs
+
+def run_workflow(workflow, save_nodes, max_wait=600, timings=None):
+    """
+    Queue a workflow and wait for its SaveImage outputs.
+
+    Subscribes to the websocket before queueing so no events are missed;
+    falls back to history polling when the websocket is unavailable or drops
+    (node timings are only available over the websocket).
+
+    Returns:
+        Dict of node_id -> node output
+    """
+    import uuid
+
+    client_id = uuid.uuid4().hex
+    ws = connect_websocket(client_id)
+    prompt_id = queue_prompt(workflow, client_id=client_id if ws else None)
+
+    if ws is None:
+        return poll_for_outputs(prompt_id, max_wait=max_wait)
+
+    try:
+        return wait_via_websocket(ws, prompt_id, save_nodes, max_wait=max_wait, timings=timings)
+    except RuntimeError:
+        raise
+    except Exception as e:
+        log(f"Websocket dropped ({e}), falling back to history polling")
+        return poll_for_outputs(prompt_id, max_wait=max_wait)
+    finally:
+        ws.close()
+
+
+def output_images(outputs, node_id):
+    """Paths of the images a SaveImage node wrote, in batch order"""
+    images = outputs.get(node_id, {}).get('images', [])
+    paths = []
+    for img in images:
+        subfolder = img.get('subfolder') or ''
+        paths.append(COMFYUI_OUTPUT_DIR / subfolder / img['filename'])
+    return paths
+
+def generate_image_via_api(prompt, model_path, output_path, width=1024, height=1024, steps=20,
+                           seed=None, negative_prompt=DEFAULT_NEGATIVE_PROMPT, timings=None):
+    """Generate image using ComfyUI API"""
+    import shutil
+
+    log(f"Generating image: '{prompt[:50]}...'")
+    log(f"Parameters: {width}x{height}, {steps} steps")
+
+    workflow, save_nodes = build_workflow(
+        Path(model_path).name, width, height,
+        [{
+            'prompt': prompt,
+            'negative_prompt': negative_prompt,
+            'steps': steps,
+            'seed': random_seed() if seed is None else seed,
+            'batch_size': 1,
+            'filename_prefix': "ComfyUI"
+        }]
+    )
+
+    # Timeout: 10 minutes (generous for first-time model load into VRAM)
+    outputs = run_workflow(workflow, save_nodes, max_wait=600, timings=timings)
+
+    for src_path in output_images(outputs, save_nodes[0]):
+        if src_path.exists():
+            # Move to desired output location
+            shutil.copy2(src_path, output_path)
+            log(f"Image saved to {output_path}")
+            return output_path
+
+    raise RuntimeError(f"Generation finished but no image was found in outputs: {outputs}")
+
+def plan_batches(jobs, max_batch=MAX_BATCH_SIZE, max_branches=MAX_BRANCHES):
+    """
+    Group manifest jobs into ComfyUI workflows.
+
+    Jobs sharing (model, width, height) are queued together behind one
+    checkpoint loader. Within a group, unseeded jobs with the same prompt,
+    negative prompt and steps become one latent batch (EmptyLatentImage
+    batch_size > 1). Seeded jobs always get their own batch of one so the
+    image matches a single run with that seed.
+
+    Returns:
+        List of (model, width, height, branches) where each branch carries
+        the jobs it will produce, in batch order
+    """
+    groups = {}
+    for job in jobs:
+        key = (job['model'], job['width'], job['height'])
+        groups.setdefault(key, []).append(job)
+
+    # Keep groups of the same model adjacent so each checkpoint loads once
+    first_seen = {}
+    for model, _, _ in groups:
+        first_seen.setdefault(model, len(first_seen))
+    ordered = sorted(groups.items(), key=lambda item: first_seen[item[0][0]])
+
+    plans = []
+    for (model, width, height), group_jobs in ordered:
+        branches = []
+        open_branches = {}
+        for job in group_jobs:
+            if job.get('seed') is None:
+                branch_key = (job['prompt'], job['negative_prompt'], job['steps'])
+                branch = open_branches.get(branch_key)
+                if branch is None or len(branch['jobs']) >= max_batch:
+                    branch = {'jobs': [], 'seed': random_seed()}
+                    open_branches[branch_key] = branch
+                    branches.append(branch)
+            else:
+                branch = {'jobs': [], 'seed': job['seed']}
+                branches.append(branch)
+            branch['jobs'].append(job)
+
+        for start in range(0, len(branches), max_branches):
+            plans.append((model, width, height, branches[start:start + max_branches]))
+
+    return plans
+
+def normalize_job(record, line_number):
+    """Fill manifest defaults and validate one job record"""
+    if not record.get('prompt'):
+        raise ValueError(f"line {line_number}: job requires a 'prompt'")
+    if not record.get('output'):
+        raise ValueError(f"line {line_number}: job requires an 'output'")
+
+    seed = record.get('seed')
+    return {
+        'id': str(record.get('id', line_number)),
+        'prompt': record['prompt'],
+        'output': record['output'],
+        'model': record.get('model', 'sdxl'),
+        'width': int(record.get('width', 1024)),
+        'height': int(record.get('height', 1024)),
+        'steps': int(record.get('steps', 20)),
+        'seed': None if seed is None else int(seed),
+        'negative_prompt': record.get('negative_prompt', DEFAULT_NEGATIVE_PROMPT),
+        'text': record.get('text'),
+        'text_position': record.get('text_position', 'south'),
+        'text_size': int(record.get('text_size', 72)),
+        'text_color': record.get('text_color', 'white')
+    }
+
+def load_manifest(manifest_path):
+    """Read a JSONL job manifest (blank lines and # comments skipped)"""
+    jobs = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            jobs.append(normalize_job(json.loads(line), line_number))
+    return jobs
+
+def generate_batch(jobs, models_dir, on_result=None, pool=None):
+    """
+    Generate every job, sharing model loads and latent batches.
+
+    Each job's image is written to job['output']. Failures are recorded
+    per job rather than aborting the run. With a ModelPool, every workflow
+    first makes room for its checkpoint under the memory budget.
+
+    Returns:
+        List of result dicts (id, output, status, seed, batch_index,
+        batch_size, elapsed_s, error)
+    """
+    import shutil
+    import uuid
+
+    results = []
+
+    def record(job, status, **extra):
+        result = {'id': job['id'], 'output': job['output'], 'status': status}
+        result.update(extra)
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    plans = plan_batches(jobs)
+    log(f"Batch: {len(jobs)} jobs in {len(plans)} workflows")
+
+    for model, width, height, branches in plans:
+        started = time.time()
+        for index, branch in enumerate(branches):
+            branch['filename_prefix'] = f"hal_batch_{uuid.uuid4().hex[:8]}_{index}"
+
+        try:
+            model_path = ensure_model(model, models_dir)
+            if pool:
+                pool.acquire(model)
+            workflow, save_nodes = build_workflow(
+                Path(model_path).name, width, height,
+                [{
+                    'prompt': branch['jobs'][0]['prompt'],
+                    'negative_prompt': branch['jobs'][0]['negative_prompt'],
+                    'steps': branch['jobs'][0]['steps'],
+                    'seed': branch['seed'],
+                    'batch_size': len(branch['jobs']),
+                    'filename_prefix': branch['filename_prefix']
+                } for branch in branches]
+            )
+            log(f"Workflow: {model} {width}x{height}, "
+                f"{sum(len(b['jobs']) for b in branches)} images in {len(branches)} branches")
+            timings = {}
+            outputs = run_workflow(workflow, save_nodes, max_wait=600, timings=timings)
+            if pool:
+                pool.record_run(model, timings, time.time() - started)
+        except Exception as e:
+            log(f"ERROR: workflow failed: {e}")
+            for branch in branches:
+                for job in branch['jobs']:
+                    record(job, 'error', error=str(e))
+            continue
+
+        elapsed = round(time.time() - started, 2)
+        for branch, save_node in zip(branches, save_nodes):
+            images = output_images(outputs, save_node)
+            for position, job in enumerate(branch['jobs']):
+                try:
+                    if position >= len(images) or not images[position].exists():
+                        raise RuntimeError("image missing from ComfyUI outputs")
+                    Path(job['output']).parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(images[position], job['output'])
+                    if job.get('text'):
+                        add_text_overlay(
+                            image_path=job['output'],
+                            text=job['text'],
+                            position=job['text_position'],
+                            fontsize=job['text_size'],
+                            color=job['text_color']
+                        )
+                    # The seed seeds the whole latent batch: image N is
+                    # reproduced by the same seed and batch_size, taking image N
+                    record(job, 'ok', seed=branch['seed'], batch_index=position,
+                           batch_size=len(branch['jobs']), elapsed_s=elapsed)
+                except Exception as e:
+                    record(job, 'error', error=str(e))
+
+    ok = sum(1 for r in results if r['status'] == 'ok')
+    log(f"Batch complete: {ok}/{len(results)} succeeded")
+    return results
+
+def run_manifest(manifest_path, results_path, models_dir):
+    """Generate every job in a manifest and stream results to a JSONL file"""
+    jobs = load_manifest(manifest_path)
+
+    with open(results_path, 'w', encoding='utf-8') as results_file:
+        def write_result(result):
+            results_file.write(json.dumps(result) + "\n")
+            results_file.flush()
+
+        results = generate_batch(jobs, models_dir, on_result=write_result)
+
+    return results
+
+
 def add_text_overlay(image_path, text, position='south', fontsize=72, color='white'):
-    """Add text overlay to generated image using ImageMagick"""
+    """Add text overlay to generated image (Pillow in-process, ImageMagick fallback)"""
     import subprocess
 
     log(f"Adding text overlay: '{text}'")
 
+    try:
+        import text_overlay
+        if text_overlay.PIL_AVAILABLE:
+            text_overlay.add_text_overlay(image_path, image_path, text, position=position,
+                                          fontsize=fontsize, color=color,
+                                          strokewidth=2, offset=(0, 20))
+            log(f"Text overlay applied: '{text}'")
+            return
+    except ImportError:
+        pass
+
     # Temporary file for output
     temp_output = image_path + ".tmp"
 
@@ -244,24 +869,370 @@ def add_text_overlay(image_path, text, position='south', fontsize=72, color='whi
     shutil.move(temp_output, image_path)
     log(f"Text overlay applied: '{text}'")
 
+class ModelPool:
+    """
+    Memory-budgeted LRU accounting of the checkpoints ComfyUI keeps resident.
+
+    ComfyUI (started with --cache-lru) keeps loader outputs for several
+    checkpoints, so switching between resident models costs no reload.
+    This pool enforces the memory budget from the registry's memory_gb
+    figures and records load and evict times. ComfyUI has no per-checkpoint
+    unload, so an eviction frees its executor cache (/free) and every other
+    model is reloaded on its next use.
+    """
+
+    # Loader node id used by build_workflow()
+    LOADER_NODE = "4"
+
+    def __init__(self, registry, budget_gb=MODEL_MEMORY_BUDGET_GB):
+        from collections import OrderedDict
+
+        self.registry = registry
+        self.budget_gb = budget_gb
+        self.resident = OrderedDict()  # name -> {'memory_gb', 'loaded_at', 'uses'}
+        self.loads = []
+        self.evictions = []
+
+    def capacity(self):
+        """How many checkpoints fit in the budget (smallest first, at least 1)"""
+        used, count = 0.0, 0
+        for footprint in sorted(info.get('memory_gb', 0) for info in self.registry.values()):
+            if used + footprint > self.budget_gb:
+                break
+            used += footprint
+            count += 1
+        return max(1, count)
+
+    def used_gb(self):
+        return round(sum(entry['memory_gb'] for entry in self.resident.values()), 2)
+
+    def acquire(self, name):
+        """
+        Make room for a model before a job runs.
+
+        Returns:
+            List of evicted model names (empty on a hit or when it fits)
+        """
+        if name in self.resident:
+            self.resident.move_to_end(name)
+            self.resident[name]['uses'] += 1
+            return []
+
+        need = self.registry[name].get('memory_gb', 0)
+        victims = []
+        for victim in list(self.resident):
+            if self.used_gb() + need <= self.budget_gb:
+                break
+            victims.append(victim)
+            del self.resident[victim]
+
+        if victims:
+            started = time.time()
+            free_comfyui_memory()
+            seconds = round(time.time() - started, 3)
+            # The flush drops every cached checkpoint, not just the victims
+            flushed = victims + list(self.resident)
+            self.resident.clear()
+            for victim in flushed:
+                self.evictions.append({'model': victim, 'lru_victim': victim in victims,
+                                       'seconds': seconds, 'at': time.time()})
+            log(f"Evicted {', '.join(victims)} (LRU) to fit {name}; freed in {seconds}s")
+
+        self.resident[name] = {'memory_gb': need, 'loaded_at': None, 'uses': 1}
+        return victims
+
+    def record_run(self, name, timings, elapsed):
+        """Record the checkpoint load time observed for a model's first run"""
+        entry = self.resident.get(name)
+        if entry is None or entry['loaded_at'] is not None:
+            return
+        entry['loaded_at'] = time.time()
+
+        if self.LOADER_NODE in timings.get('cached_nodes', []):
+            seconds, source = 0.0, 'cached'
+        elif self.LOADER_NODE in timings.get('node_seconds', {}):
+            seconds, source = timings['node_seconds'][self.LOADER_NODE], 'measured'
+        else:
+            # Polling fallback: only the whole job time is known
+            seconds, source = round(elapsed, 3), 'job-upper-bound'
+        self.loads.append({'model': name, 'seconds': seconds, 'source': source, 'at': time.time()})
+        log(f"Loaded {name} in {seconds}s ({source})")
+
+    def stats(self):
+        return {
+            'budget_gb': self.budget_gb,
+            'used_gb': self.used_gb(),
+            'resident': list(self.resident),
+            'loads': self.loads[-20:],
+            'evictions': self.evictions[-20:]
+        }
+
+def free_comfyui_memory():
+    """Ask ComfyUI to unload models and clear its executor cache"""
+    import requests
+
+    requests.post(f"{COMFYUI_URL}/free", json={"unload_models": True, "free_memory": True})
+
+class WorkerState:
+    """Shared state for the warm worker: one ComfyUI server, one job at a time"""
+
+    def __init__(self, models_dir, pool=None):
+        self.models_dir = models_dir
+        self.pool = pool
+        self.lock = threading.Lock()
+        self.models_used = []
+        self.jobs_completed = 0
+        self.started_at = time.time()
+
+    def run_job(self, job):
+        """Generate one image for a job dict and return the PNG bytes"""
+        with self.lock:
+            model = job.get('model', 'sdxl')
+            model_path = ensure_model(model, self.models_dir)
+            if model not in self.models_used:
+                self.models_used.append(model)
+            if self.pool:
+                self.pool.acquire(model)
+            started = time.time()
+            timings = {}
+
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                output_path = os.path.join(tmp_dir, 'output.png')
+                generate_image_via_api(
+                    prompt=job['prompt'],
+                    model_path=model_path,
+                    output_path=output_path,
+                    width=int(job.get('width', 1024)),
+                    height=int(job.get('height', 1024)),
+                    steps=int(job.get('steps', 20)),
+                    seed=job.get('seed'),
+                    negative_prompt=job.get('negative_prompt', DEFAULT_NEGATIVE_PROMPT),
+                    timings=timings
+                )
+                if self.pool:
+                    self.pool.record_run(model, timings, time.time() - started)
+
+                if job.get('text'):
+                    add_text_overlay(
+                        image_path=output_path,
+                        text=job['text'],
+                        position=job.get('text_position', 'south'),
+                        fontsize=int(job.get('text_size', 72)),
+                        color=job.get('text_color', 'white')
+                    )
+
+                with open(output_path, 'rb') as f:
+                    data = f.read()
+
+            self.jobs_completed += 1
+            return data
+
+    def run_batch(self, records):
+        """Generate a list of job records; returns results with base64 PNG data"""
+        import base64
+
+        jobs = [normalize_job(dict(record, output='-'), index)
+                for index, record in enumerate(records, start=1)]
+
+        with self.lock, tempfile.TemporaryDirectory() as tmp_dir:
+            for index, job in enumerate(jobs):
+                job['output'] = os.path.join(tmp_dir, f"{index}.png")
+                if job['model'] not in self.models_used:
+                    self.models_used.append(job['model'])
+
+            results = generate_batch(jobs, self.models_dir, pool=self.pool)
+
+            for result in results:
+                if result['status'] == 'ok':
+                    with open(result['output'], 'rb') as f:
+                        result['image_b64'] = base64.b64encode(f.read()).decode('ascii')
+                    self.jobs_completed += 1
+                del result['output']
+
+        return results
+
+def make_worker_handler(state):
+    """Build the HTTP request handler bound to a WorkerState"""
+
+    class WorkerHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            log(f"worker: {format % args}")
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != '/health':
+                self._send_json(404, {'error': f'Unknown path: {self.path}'})
+                return
+            self._send_json(200, {
+                'status': 'ok',
+                'models_used': state.models_used,
+                'jobs_completed': state.jobs_completed,
+                'uptime_s': round(time.time() - state.started_at, 1),
+                'memory': state.pool.stats() if state.pool else None
+            })
+
+        def do_POST(self):
+            if self.path == '/batch':
+                self._handle_batch()
+                return
+            if self.path != '/generate':
+                self._send_json(404, {'error': f'Unknown path: {self.path}'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                job = json.loads(self.rfile.read(length) or b'{}')
+                if not job.get('prompt'):
+                    self._send_json(400, {'error': "Job requires a 'prompt'"})
+                    return
+                data = state.run_job(job)
+            except Exception as e:
+                log(f"ERROR: {e}")
+                self._send_json(500, {'error': str(e)})
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _handle_batch(self):
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                results = state.run_batch(payload.get('jobs', []))
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+            except Exception as e:
+                log(f"ERROR: {e}")
+                self._send_json(500, {'error': str(e)})
+                return
+            self._send_json(200, {'results': results})
+
+    return WorkerHandler
+
+def serve(host='0.0.0.0', port=WORKER_PORT, preload=None, models_dir="/models",
+          memory_budget_gb=MODEL_MEMORY_BUDGET_GB):
+    """
+    Run as a long-lived worker.
+
+    Keeps one ComfyUI server (and whatever checkpoint it last loaded) resident
+    and accepts jobs over HTTP:
+        GET  /health    -> worker status JSON
+        POST /generate  -> job JSON in, PNG bytes out
+        POST /batch     -> {"jobs": [...]} in, per-job results with base64 PNGs out
+
+    Several checkpoints stay resident up to memory_budget_gb (see ModelPool),
+    so mixed-model queues do not reload on every switch.
+    """
+    pool = ModelPool(load_model_registry(), budget_gb=memory_budget_gb)
+    state = WorkerState(models_dir, pool=pool)
+    cache_lru = CACHE_LRU_PER_MODEL * pool.capacity()
+    log(f"Memory budget {memory_budget_gb} GB: up to {pool.capacity()} resident checkpoints")
+    server_proc = start_comfyui_server(["--cache-lru", str(cache_lru)])
+
+    try:
+        for model in preload or []:
+            # Tiny 1-step render pulls the checkpoint into memory up front
+            log(f"Preloading model: {model}")
+            state.run_job({'prompt': 'warmup', 'model': model,
+                           'width': 256, 'height': 256, 'steps': 1})
+
+        httpd = ThreadingHTTPServer((host, port), make_worker_handler(state))
+        log(f"Worker ready on http://{host}:{port}")
+        httpd.serve_forever()
+
+    except KeyboardInterrupt:
+        log("Worker interrupted")
+
+    finally:
+        log("Shutting down ComfyUI server...")
+        server_proc.terminate()
+        try:
+            server_proc.wait(timeout=5)
+        except:
+            server_proc.kill()
+
 def main():
+    model_names = list(load_model_registry())
+
     parser = argparse.ArgumentParser(description='HAL8000-Assistant Image Generation Container')
-    parser.add_argument('--prompt', required=True, help='Image generation prompt')
-    parser.add_argument('--model', default='sdxl', choices=['sdxl', 'sd15'],
-                        help='Model to use')
-    parser.add_argument('--output', required=True, help='Output image path')
+    parser.add_argument('--prompt', help='Image generation prompt')
+    parser.add_argument('--model', default='sdxl', choices=model_names,
+                        help='Model to use (from models.json)')
+    parser.add_argument('--output', help='Output image path')
     parser.add_argument('--width', type=int, default=1024, help='Image width')
     parser.add_argument('--height', type=int, default=1024, help='Image height')
     parser.add_argument('--steps', type=int, default=20, help='Generation steps')
+    parser.add_argument('--seed', type=int, help='Sampler seed (default: time-based)')
+    parser.add_argument('--negative-prompt', default=DEFAULT_NEGATIVE_PROMPT,
+                        help='Negative prompt')
     parser.add_argument('--text', help='Optional text to overlay on image')
     parser.add_argument('--text-position', default='south',
                         choices=['north', 'south', 'east', 'west', 'center'],
                         help='Text position (default: south)')
     parser.add_argument('--text-size', type=int, default=72, help='Text font size (default: 72)')
     parser.add_argument('--text-color', default='white', help='Text color (default: white)')
+    parser.add_argument('--progress-json', action='store_true',
+                        help='Emit machine-readable JSON progress lines on stderr')
+    parser.add_argument('--manifest', help='JSONL job manifest to generate in one run')
+    parser.add_argument('--results', help='JSONL file for per-job results (with --manifest)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a warm worker instead of generating one image')
+    parser.add_argument('--host', default='0.0.0.0', help='Worker listen address (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=WORKER_PORT,
+                        help=f'Worker listen port (default: {WORKER_PORT})')
+    parser.add_argument('--preload', action='append', choices=model_names,
+                        help='Model to load when the worker starts (repeatable)')
+    parser.add_argument('--memory-budget-gb', type=float, default=MODEL_MEMORY_BUDGET_GB,
+                        help=f'Worker checkpoint memory budget (default: {MODEL_MEMORY_BUDGET_GB})')
 
     args = parser.parse_args()
 
+    if args.progress_json:
+        global PROGRESS_JSON
+        PROGRESS_JSON = True
+
+    if args.serve:
+        serve(host=args.host, port=args.port, preload=args.preload,
+              memory_budget_gb=args.memory_budget_gb)
+        sys.exit(0)
+
+    if args.manifest:
+        server_proc = None
+        try:
+            server_proc = start_comfyui_server()
+            results_path = args.results or f"{os.path.splitext(args.manifest)[0]}.results.jsonl"
+            results = run_manifest(args.manifest, results_path, "/models")
+            failed = sum(1 for r in results if r['status'] != 'ok')
+            log(f"Results written to {results_path}")
+            sys.exit(1 if failed else 0)
+        except Exception as e:
+            log(f"ERROR: {e}")
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            sys.exit(1)
+        finally:
+            if server_proc:
+                log("Shutting down ComfyUI server...")
+                server_proc.terminate()
+                try:
+                    server_proc.wait(timeout=5)
+                except:
+                    server_proc.kill()
+
+    if not args.prompt or not args.output:
+        parser.error("--prompt and --output are required unless --serve or --manifest is given")
+
     server_proc = None
 
     try:
@@ -278,7 +1249,9 @@ def main():
             output_path=args.output,
             width=args.width,
             height=args.height,
-            steps=args.steps
+            steps=args.steps,
+            seed=args.seed,
+            negative_prompt=args.negative_prompt
         )
 
         # 4. Add text overlay if requested
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Minimal fake ComfyUI server for the entrypoint tests.
+
+Serves POST /prompt, GET /history/<prompt_id> and the /ws progress
+websocket (RFC 6455 handshake plus unmasked server frames, no extensions).
+Each test scripts what a queued prompt produces:
+
+- events(prompt_id) -> list of websocket frames sent after /prompt:
+  a dict (sent as a JSON text frame), bytes (a binary preview frame) or
+  'close' (drop the connection)
+- outputs: what /history reports once history_after polls have been made
+
+A close frame from the client is answered, so websocket-client's close()
+returns immediately.
+"""
+
+import base64
+import hashlib
+import json
+import queue
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+def websocket_frame(opcode, payload):
+    """One unmasked, unfragmented server frame"""
+    header = bytes([0x80 | opcode])
+    if len(payload) < 126:
+        header += bytes([len(payload)])
+    elif len(payload) < 65536:
+        header += bytes([126]) + struct.pack('!H', len(payload))
+    else:
+        header += bytes([127]) + struct.pack('!Q', len(payload))
+    return header + payload
+
+class FakeComfyUI:
+    """Threaded fake server; start() returns its http:// base URL"""
+
+    def __init__(self, events=None, outputs=None, history_after=0, websocket=True):
+        self.events = events or (lambda prompt_id: [])
+        self.outputs = outputs or {}
+        self.history_after = history_after
+        self.websocket = websocket
+        self.prompts = []           # POST /prompt bodies
+        self.history_requests = 0
+        self.sockets = {}           # client_id -> frame queue
+        self.httpd = None
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def send_json(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if self.path != '/prompt':
+                    return self.send_json(404, {'error': 'not found'})
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                fake.prompts.append(body)
+                prompt_id = f'prompt-{len(fake.prompts)}'
+                self.send_json(200, {'prompt_id': prompt_id, 'number': len(fake.prompts)})
+
+                frames = fake.sockets.get(body.get('client_id'))
+                if frames is not None:
+                    for frame in fake.events(prompt_id):
+                        frames.put(frame)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith('/history/'):
+                    fake.history_requests += 1
+                    prompt_id = url.path[len('/history/'):]
+                    if fake.history_requests <= fake.history_after:
+                        return self.send_json(200, {})
+                    return self.send_json(200, {prompt_id: {'outputs': fake.outputs}})
+                if url.path == '/ws' and fake.websocket:
+                    return self.websocket_session(parse_qs(url.query).get('clientId', [''])[0])
+                self.send_json(404, {'error': 'not found'})
+
+            def websocket_session(self, client_id):
+                key = self.headers['Sec-WebSocket-Key']
+                accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+                self.send_response(101)
+                self.send_header('Upgrade', 'websocket')
+                self.send_header('Connection', 'Upgrade')
+                self.send_header('Sec-WebSocket-Accept', accept)
+                self.end_headers()
+                self.wfile.flush()
+
+                frames = fake.sockets[client_id] = queue.Queue()
+                threading.Thread(target=self.read_client_frames, args=(frames,), daemon=True).start()
+                self.wfile.write(websocket_frame(0x1, json.dumps(
+                    {'type': 'status', 'data': {'sid': client_id}}).encode()))
+                self.wfile.flush()
+                self.close_connection = True
+                while True:
+                    try:
+                        frame = frames.get(timeout=30)
+                    except queue.Empty:
+                        return
+                    try:
+                        if frame == 'close':
+                            self.wfile.write(websocket_frame(0x8, b''))
+                            self.wfile.flush()
+                            return
+                        if isinstance(frame, bytes):
+                            self.wfile.write(websocket_frame(0x2, frame))
+                        else:
+                            self.wfile.write(websocket_frame(0x1, json.dumps(frame).encode()))
+                        self.wfile.flush()
+                    except OSError:
+                        return
+
+            def read_client_frames(self, frames):
+                """Answer the client's close frame (other client frames are ignored)"""
+                try:
+                    while True:
+                        head = self.rfile.read(2)
+                        if len(head) < 2:
+                            break
+                        length = head[1] & 0x7f
+                        if length == 126:
+                            length = struct.unpack('!H', self.rfile.read(2))[0]
+                        elif length == 127:
+                            length = struct.unpack('!Q', self.rfile.read(8))[0]
+                        self.rfile.read(4 + length)     # mask key and payload
+                        if head[0] & 0x0f == 0x8:
+                            break
+                except OSError:
+                    pass
+                frames.put('close')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def stop(self):
+        for frames in self.sockets.values():
+            frames.put('close')
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for manifest batches (entrypoint.generate_batch): unseeded jobs with
+the same prompt share one latent batch, and each result records the
+batch's seed together with the job's position in it.
+
+ComfyUI is replaced by a stub run_workflow that writes one file per image.
+
+Run:
+    python3 -m pytest .hal8000/tools/image-generation/tests
+"""
+
+import io
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import entrypoint
+
+class GenerateBatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.workflows = []
+
+        def fake_run_workflow(workflow, save_nodes, max_wait=600, timings=None):
+            self.workflows.append(workflow)
+            outputs = {}
+            for node in save_nodes:
+                inputs = workflow[node]['inputs']
+                images = []
+                for position in range(self.batch_size(workflow, node)):
+                    name = f"{inputs['filename_prefix']}_{position:05d}_.png"
+                    (self.dir / name).write_bytes(f'image {position}'.encode())
+                    images.append({'filename': name, 'subfolder': '', 'type': 'output'})
+                outputs[node] = {'images': images}
+            return outputs
+
+        for target, value in (('COMFYUI_OUTPUT_DIR', self.dir),
+                              ('ensure_model', lambda model, models_dir: self.dir / 'model.safetensors'),
+                              ('run_workflow', fake_run_workflow)):
+            patcher = mock.patch.object(entrypoint, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def batch_size(self, workflow, save_node):
+        """Follow SaveImage <- VAEDecode <- KSampler <- EmptyLatentImage"""
+        decode = workflow[save_node]['inputs']['images'][0]
+        sampler = workflow[decode]['inputs']['samples'][0]
+        latent = workflow[sampler]['inputs']['latent_image'][0]
+        return workflow[latent]['inputs']['batch_size']
+
+    def job(self, number, prompt='a robot', seed=None):
+        return entrypoint.normalize_job({'id': f'job{number}', 'prompt': prompt, 'seed': seed,
+                                         'output': str(self.dir / 'out' / f'{number}.png')}, number)
+
+    def generate(self, jobs):
+        with redirect_stderr(io.StringIO()):
+            return {result['id']: result for result in entrypoint.generate_batch(jobs, self.dir)}
+
+    def test_latent_batch_records_position(self):
+        results = self.generate([self.job(number) for number in range(3)])
+
+        self.assertEqual([results[f'job{n}']['batch_index'] for n in range(3)], [0, 1, 2])
+        self.assertEqual({results[f'job{n}']['batch_size'] for n in range(3)}, {3})
+        self.assertEqual(len({results[f'job{n}']['seed'] for n in range(3)}), 1)
+        self.assertEqual(Path(results['job2']['output']).read_bytes(), b'image 2')
+
+    def test_seeded_job_is_first_of_its_own_batch(self):
+        results = self.generate([self.job(0, seed=42), self.job(1, seed=42)])
+
+        for result in results.values():
+            self.assertEqual((result['seed'], result['batch_index'], result['batch_size']), (42, 0, 1))
+
+if __name__ == '__main__':
+    unittest.main()
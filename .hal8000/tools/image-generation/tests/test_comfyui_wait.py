@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for ComfyUI completion tracking (entrypoint.run_workflow): the
+websocket path with its early return on 'executed', progress events, and
+the history-polling fallback with exponential backoff.
+
+Needs requests and websocket-client (installed in the image); runs
+against tests/fake_comfyui.py.
+
+Run:
+    python3 -m pytest .hal8000/tools/image-generation/tests
+"""
+
+import io
+import sys
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import entrypoint
+from fake_comfyui import FakeComfyUI
+
+try:
+    import requests  # noqa: F401
+    import websocket  # noqa: F401
+    CLIENTS_AVAILABLE = True
+except ImportError:
+    CLIENTS_AVAILABLE = False
+
+SAVE_NODE = '9'
+IMAGE_OUTPUT = {'images': [{'filename': 'hal_00001_.png', 'subfolder': '', 'type': 'output'}]}
+
+def finished_run(prompt_id):
+    """Events of a normal run: sampler progress, then the save node executes"""
+    return [
+        {'type': 'execution_start', 'data': {'prompt_id': prompt_id}},
+        {'type': 'executing', 'data': {'node': '3', 'prompt_id': prompt_id}},
+        {'type': 'progress', 'data': {'value': 1, 'max': 2, 'prompt_id': prompt_id}},
+        b'\x00\x00\x00\x01preview',
+        {'type': 'progress', 'data': {'value': 1, 'max': 5, 'prompt_id': 'someone-else'}},
+        {'type': 'progress', 'data': {'value': 2, 'max': 2, 'prompt_id': prompt_id}},
+        {'type': 'executing', 'data': {'node': SAVE_NODE, 'prompt_id': prompt_id}},
+        {'type': 'executed', 'data': {'node': SAVE_NODE, 'output': IMAGE_OUTPUT, 'prompt_id': prompt_id}},
+    ]
+
+@unittest.skipUnless(CLIENTS_AVAILABLE, 'requests and websocket-client are required')
+class WaitForCompletionTests(unittest.TestCase):
+
+    def start(self, **kwargs):
+        self.fake = FakeComfyUI(**kwargs)
+        patcher = mock.patch.object(entrypoint, 'COMFYUI_URL', self.fake.start())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.fake.stop)
+
+    def run_workflow(self, **kwargs):
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            outputs = entrypoint.run_workflow({'1': {}}, [SAVE_NODE], max_wait=10, **kwargs)
+        return outputs, stderr.getvalue()
+
+    def test_executed_event_returns_without_history(self):
+        self.start(events=finished_run)
+        timings = {}
+
+        outputs, _ = self.run_workflow(timings=timings)
+
+        self.assertEqual(outputs, {SAVE_NODE: IMAGE_OUTPUT})
+        self.assertEqual(self.fake.history_requests, 0)
+        self.assertIn('client_id', self.fake.prompts[0])
+        self.assertIn('3', timings['node_seconds'])
+
+    def test_progress_events_are_reported(self):
+        self.start(events=finished_run)
+
+        _, log = self.run_workflow()
+
+        self.assertIn('Step 1/2', log)
+        self.assertIn('Step 2/2', log)
+        self.assertNotIn('Step 1/5', log)      # another prompt's progress
+
+    def test_cached_save_node_is_read_from_history(self):
+        def cached_run(prompt_id):
+            return [
+                {'type': 'execution_cached', 'data': {'nodes': ['1', SAVE_NODE], 'prompt_id': prompt_id}},
+                {'type': 'executing', 'data': {'node': None, 'prompt_id': prompt_id}},
+            ]
+        self.start(events=cached_run, outputs={SAVE_NODE: IMAGE_OUTPUT})
+        timings = {}
+
+        outputs, _ = self.run_workflow(timings=timings)
+
+        self.assertEqual(outputs, {SAVE_NODE: IMAGE_OUTPUT})
+        self.assertEqual(self.fake.history_requests, 1)
+        self.assertEqual(timings['cached_nodes'], ['1', SAVE_NODE])
+
+    def test_execution_error_raises(self):
+        def failed_run(prompt_id):
+            return [{'type': 'execution_error',
+                     'data': {'exception_message': 'CUDA out of memory', 'prompt_id': prompt_id}}]
+        self.start(events=failed_run)
+
+        with self.assertRaisesRegex(RuntimeError, 'CUDA out of memory'):
+            self.run_workflow()
+
+    def test_falls_back_to_polling_without_websocket(self):
+        self.start(websocket=False, outputs={SAVE_NODE: IMAGE_OUTPUT}, history_after=2)
+
+        outputs, log = self.run_workflow()
+
+        self.assertEqual(outputs, {SAVE_NODE: IMAGE_OUTPUT})
+        self.assertNotIn('client_id', self.fake.prompts[0])
+        self.assertEqual(self.fake.history_requests, 3)
+        self.assertIn('using history polling', log)
+
+    def test_falls_back_to_polling_when_websocket_drops(self):
+        def dropped_run(prompt_id):
+            return [{'type': 'progress', 'data': {'value': 1, 'max': 2, 'prompt_id': prompt_id}}, 'close']
+        self.start(events=dropped_run, outputs={SAVE_NODE: IMAGE_OUTPUT})
+
+        outputs, log = self.run_workflow()
+
+        self.assertEqual(outputs, {SAVE_NODE: IMAGE_OUTPUT})
+        self.assertIn('falling back to history polling', log)
+        self.assertEqual(self.fake.history_requests, 1)
+
+    def test_polling_backs_off_exponentially(self):
+        self.start(websocket=False, outputs={SAVE_NODE: IMAGE_OUTPUT}, history_after=7)
+
+        with mock.patch.object(entrypoint.time, 'sleep') as sleep, redirect_stderr(io.StringIO()):
+            outputs = entrypoint.poll_for_outputs('prompt-1', max_wait=10)
+
+        self.assertEqual(outputs, {SAVE_NODE: IMAGE_OUTPUT})
+        self.assertEqual([call.args[0] for call in sleep.call_args_list],
+                         [0.25, 0.5, 1.0, 2.0, 4.0, 5.0, 5.0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tests for the resumable model downloader (entrypoint.download_model).
+
+A local http.server serves a fake model blob, with or without Range
+support, and records every range it was asked for.
+
+Run:
+    python3 -m pytest .hal8000/tools/image-generation/tests
+"""
+
+import hashlib
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import entrypoint
+
+CHUNK = 64 * 1024
+BLOB = bytes((i * 7 + i // 251) % 256 for i in range(5 * CHUNK + 1234))
+BLOB_SHA256 = hashlib.sha256(BLOB).hexdigest()
+
+class BlobServer:
+    """Serves BLOB at /model.bin; ranged=False ignores Range headers"""
+
+    def __init__(self, ranged=True):
+        self.ranged = ranged
+        self.ranges = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                header = self.headers.get('Range')
+                if server.ranged and header and header.startswith('bytes='):
+                    start, end = (int(v) for v in header[len('bytes='):].split('-'))
+                    end = min(end, len(BLOB) - 1)
+                    server.ranges.append((start, end))
+                    body = BLOB[start:end + 1]
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(BLOB)}')
+                else:
+                    server.ranges.append(None)
+                    body = BLOB
+                    self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/model.bin'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def fetched_chunks(self):
+        """Ranged GETs excluding the 0-0 size probe"""
+        return sorted(r for r in self.ranges if r and r != (0, 0))
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class DownloadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        self.output = self.dir / 'model.bin'
+        self.part = self.dir / 'model.bin.part'
+        self.state = self.dir / 'model.bin.part.json'
+        self.server = None
+
+    def tearDown(self):
+        if self.server:
+            self.server.close()
+        self.tmp.cleanup()
+
+    def serve(self, ranged=True):
+        self.server = BlobServer(ranged)
+        return self.server.url
+
+    def download(self, url, **kwargs):
+        kwargs.setdefault('expected_size', len(BLOB))
+        kwargs.setdefault('expected_sha256', BLOB_SHA256)
+        entrypoint.download_model(url, self.output, connections=3, chunk_size=CHUNK, **kwargs)
+
+    def all_chunks(self):
+        return [(start, min(start + CHUNK, len(BLOB)) - 1) for start in range(0, len(BLOB), CHUNK)]
+
+    def test_ranged_download_renames_and_writes_marker(self):
+        url = self.serve()
+        self.download(url)
+
+        self.assertEqual(self.output.read_bytes(), BLOB)
+        self.assertFalse(self.part.exists())
+        self.assertFalse(self.state.exists())
+        self.assertEqual(self.server.fetched_chunks(), self.all_chunks())
+
+        marker = json.loads((self.dir / 'model.bin.verified').read_text())
+        self.assertEqual(marker['sha256'], BLOB_SHA256)
+        self.assertEqual(marker['size'], len(BLOB))
+        self.assertTrue(entrypoint.is_verified(self.output, {'size_bytes': len(BLOB), 'sha256': BLOB_SHA256}))
+
+    def test_resume_from_part_state(self):
+        url = self.serve()
+        chunks = self.all_chunks()
+        finished = chunks[:2]
+        data = bytearray(len(BLOB))
+        for start, end in finished:
+            data[start:end + 1] = BLOB[start:end + 1]
+        self.part.write_bytes(bytes(data))
+        self.state.write_text(json.dumps({'url': url, 'total': len(BLOB), 'chunk_size': CHUNK,
+                                          'done': [list(chunk) for chunk in finished]}))
+
+        self.download(url)
+
+        self.assertEqual(self.output.read_bytes(), BLOB)
+        self.assertEqual(self.server.fetched_chunks(), chunks[2:])
+
+    def test_resume_from_legacy_truncated_part(self):
+        url = self.serve()
+        self.part.write_bytes(BLOB[:2 * CHUNK + 100])
+
+        self.download(url)
+
+        self.assertEqual(self.output.read_bytes(), BLOB)
+        self.assertEqual(self.server.fetched_chunks(), self.all_chunks()[2:])
+
+    def test_full_size_corrupt_part_is_downloaded_again(self):
+        url = self.serve()
+        self.part.write_bytes(b'\0' * len(BLOB))
+
+        self.download(url)
+
+        self.assertEqual(self.output.read_bytes(), BLOB)
+        self.assertEqual(self.server.fetched_chunks(), self.all_chunks())
+
+    def test_ensure_model_recovers_corrupt_cached_model(self):
+        url = self.serve()
+        checkpoints = self.dir / 'checkpoints'
+        checkpoints.mkdir()
+        (checkpoints / 'fake.safetensors').write_bytes(b'\1' * len(BLOB))
+        registry = self.dir / 'models.json'
+        registry.write_text(json.dumps({'models': {'fake': {
+            'filename': 'fake.safetensors', 'url': url, 'size_gb': 0.0,
+            'size_bytes': len(BLOB), 'sha256': BLOB_SHA256, 'memory_gb': 0.0}}}))
+
+        original = entrypoint.MODEL_REGISTRY_PATH
+        entrypoint.MODEL_REGISTRY_PATH = registry
+        try:
+            path = entrypoint.ensure_model('fake', self.dir)
+        finally:
+            entrypoint.MODEL_REGISTRY_PATH = original
+
+        self.assertEqual(Path(path).read_bytes(), BLOB)
+        self.assertFalse((checkpoints / 'fake.safetensors.part').exists())
+
+    def test_single_stream_fallback_without_range_support(self):
+        url = self.serve(ranged=False)
+        self.part.write_bytes(b'stale partial data')
+
+        self.download(url)
+
+        self.assertEqual(self.output.read_bytes(), BLOB)
+        self.assertEqual(self.server.ranges, [None, None])
+
+    def test_size_mismatch_is_rejected(self):
+        url = self.serve()
+        with self.assertRaisesRegex(RuntimeError, 'registry expects'):
+            self.download(url, expected_size=len(BLOB) + 1)
+        self.assertFalse(self.output.exists())
+
+    def test_size_mismatch_after_single_stream_is_rejected(self):
+        url = self.serve(ranged=False)
+        original = entrypoint.probe_download
+        entrypoint.probe_download = lambda url, timeout=30: (None, False)
+        try:
+            with self.assertRaisesRegex(RuntimeError, 'Size mismatch'):
+                self.download(url, expected_size=len(BLOB) - 1)
+        finally:
+            entrypoint.probe_download = original
+        self.assertFalse(self.output.exists())
+
+    def test_sha256_mismatch_discards_part(self):
+        url = self.serve()
+        with self.assertRaisesRegex(RuntimeError, 'SHA-256 mismatch'):
+            self.download(url, expected_sha256='0' * 64)
+        self.assertFalse(self.output.exists())
+        self.assertFalse(self.part.exists())
+        self.assertFalse(self.state.exists())
+        self.assertFalse((self.dir / 'model.bin.verified').exists())
+
+if __name__ == '__main__':
+    unittest.main()
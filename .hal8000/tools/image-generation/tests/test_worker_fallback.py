@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the client's warm-worker fallback (HAL-generate-image.py): a
+worker that cannot be reached, or does not answer in time, hands the job
+to the one-shot container instead of failing it.
+
+A local http.server plays the worker; docker is replaced by a stub that
+writes the output image.
+
+Run:
+    python3 -m pytest .hal8000/tools/image-generation/tests
+"""
+
+import importlib.util
+import io
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+CLIENT_PY = Path(__file__).resolve().parents[1] / 'HAL-generate-image.py'
+spec = importlib.util.spec_from_file_location('hal_generate_image', CLIENT_PY)
+client = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(client)
+
+class SlowWorker:
+    """Accepts /generate and /batch but answers only after delay seconds"""
+
+    def __init__(self, delay):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                time.sleep(delay)
+                try:
+                    self.send_response(200)
+                    self.end_headers()
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class WorkerFallbackTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.docker_calls = []
+
+        def fake_docker(cmd, **kwargs):
+            self.docker_calls.append(cmd)
+            output = cmd[cmd.index('--output') + 1]
+            (self.dir / Path(output).name).write_bytes(b'\x89PNG fake')
+            return subprocess.CompletedProcess(cmd, 0, stdout='', stderr='')
+
+        for target, value in (('MODEL_CACHE', self.dir / 'models'), ('worker_status', lambda: True)):
+            patcher = mock.patch.object(client, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(client.subprocess, 'run', fake_docker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self, worker_timeout):
+        real_submit = client.generate_image_via_worker
+        with mock.patch.object(client, 'generate_image_via_worker',
+                               lambda job, output_path: real_submit(job, output_path, timeout=worker_timeout)), \
+                redirect_stderr(io.StringIO()) as stderr:
+            path = client.generate_image('a robot', self.dir / 'robot.png', use_cache=False)
+        return path, stderr.getvalue()
+
+    def test_worker_timeout_falls_back_to_container(self):
+        worker = SlowWorker(delay=2)
+        self.addCleanup(worker.close)
+
+        with mock.patch.object(client, 'WORKER_URL', worker.url):
+            path, log = self.generate(worker_timeout=0.2)
+
+        self.assertEqual(path.read_bytes(), b'\x89PNG fake')
+        self.assertEqual(len(self.docker_calls), 1)
+        self.assertIn('falling back to one-shot container', log)
+
+    def test_unreachable_worker_falls_back_to_container(self):
+        worker = SlowWorker(delay=0)
+        url = worker.url
+        worker.close()
+
+        with mock.patch.object(client, 'WORKER_URL', url):
+            path, log = self.generate(worker_timeout=5)
+
+        self.assertEqual(len(self.docker_calls), 1)
+        self.assertIn('Worker unavailable', log)
+
+if __name__ == '__main__':
+    unittest.main()
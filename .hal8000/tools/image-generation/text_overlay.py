@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Native Text Overlay
+
+In-process text rendering with Pillow, matching the ImageMagick options the
+tools have always used (gravity, stroke, color, point size). Used by
+HAL-add-text.py and entrypoint.py; Docker/ImageMagick is only a fallback.
+
+Usage:
+    from text_overlay import add_text_overlay, annotate_many
+    add_text_overlay('in.png', 'out.png', 'TITLE', position='north', fontsize=96)
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# ImageMagick's default font in the container is DejaVu Sans (fonts-dejavu-core)
+FONT_CANDIDATES = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans.ttf',
+    '/Library/Fonts/Arial.ttf',
+    'C:/Windows/Fonts/arial.ttf',
+    'DejaVuSans.ttf'
+]
+
+POSITIONS = ['north', 'south', 'east', 'west', 'center']
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif', '.tif', '.tiff'}
+
+@lru_cache(maxsize=64)
+def load_font(fontsize, font_path=None):
+    """
+    Load a TrueType font once per (size, path).
+
+    Tries font_path, then FONT_CANDIDATES, then Pillow's built-in font.
+    """
+    for candidate in ([font_path] if font_path else []) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, fontsize)
+        except OSError:
+            continue
+    return ImageFont.load_default(fontsize)
+
+def _anchor_point(position, image_size, text_size, offset):
+    """
+    Top-left corner for the text box, following ImageMagick -gravity/-annotate.
+
+    The +X+Y offset pushes the text inward from the gravity edge
+    (south: up from the bottom, east: left from the right edge) and
+    right/down for the axes the gravity centres on.
+    """
+    width, height = image_size
+    text_width, text_height = text_size
+    dx, dy = offset
+
+    x_centre = (width - text_width) // 2 + dx
+    y_centre = (height - text_height) // 2 + dy
+
+    if position == 'north':
+        return x_centre, dy
+    if position == 'south':
+        return x_centre, height - text_height - dy
+    if position == 'east':
+        return width - text_width - dx, y_centre
+    if position == 'west':
+        return dx, y_centre
+    if position == 'center':
+        return x_centre, y_centre
+    raise ValueError(f"Unknown position: {position}. Available: {POSITIONS}")
+
+def render_text(image, text, position='south', fontsize=72, color='white',
+                stroke_color='black', strokewidth=3, offset=(0, 50), font_path=None):
+    """
+    Draw outlined text onto a Pillow image.
+
+    Returns:
+        New RGBA image with the text composited
+    """
+    font = load_font(fontsize, font_path)
+    base = image.convert('RGBA')
+    layer = Image.new('RGBA', base.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+
+    # ImageMagick centres the stroke on the glyph outline; Pillow draws it
+    # outside, so half the width gives the same visual weight
+    stroke = max(1, round(strokewidth / 2)) if strokewidth else 0
+
+    left, top, right, bottom = draw.multiline_textbbox(
+        (0, 0), text, font=font, stroke_width=stroke, align='center'
+    )
+    x, y = _anchor_point(position, base.size, (right - left, bottom - top), offset)
+
+    draw.multiline_text(
+        (x - left, y - top), text, font=font, fill=color, align='center',
+        stroke_width=stroke, stroke_fill=stroke_color
+    )
+    return Image.alpha_composite(base, layer)
+
+def add_text_overlay(input_path, output_path, text, position='south', fontsize=72,
+                     color='white', strokewidth=3, offset=(0, 50), font_path=None):
+    """
+    Add text overlay to an image file in-process.
+
+    Args:
+        input_path: Path to existing image
+        output_path: Path to save result (may equal input_path)
+        text: Text to overlay
+        position: Gravity (north, south, east, west, center)
+        fontsize: Font size in points (pixels at 72 dpi, as ImageMagick)
+        color: Fill color name or #RRGGBB
+        strokewidth: Black outline width, ImageMagick semantics
+        offset: (x, y) inward offset from the gravity edge
+
+    Returns:
+        Path to output image
+    """
+    if not PIL_AVAILABLE:
+        raise RuntimeError("Pillow is not installed (pip install pillow)")
+
+    input_path = Path(input_path)
+    output_path = Path(output_path)
+
+    with Image.open(input_path) as image:
+        image_format = image.format
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        result = render_text(image, text, position=position, fontsize=fontsize, color=color,
+                             strokewidth=strokewidth, offset=offset, font_path=font_path)
+
+    # Keep opaque images opaque (and JPEG has no alpha channel)
+    if not has_alpha or output_path.suffix.lower() in ('.jpg', '.jpeg'):
+        result = result.convert('RGB')
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f'.{output_path.name}.tmp')
+    result.save(tmp_path, format=Image.registered_extensions().get(output_path.suffix.lower(),
+                                                                   image_format or 'PNG'))
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def annotate_many(jobs, workers=None):
+    """
+    Render many overlays in one process using a thread pool.
+
+    Pillow releases the GIL while decoding, drawing and encoding, so
+    threads scale across cores for typical image sizes.
+
+    Args:
+        jobs: Dicts with input, output, text and optional position,
+              fontsize, color, strokewidth, offset
+        workers: Thread count (default: CPU count)
+
+    Returns:
+        List of result dicts (input, output, status, seconds, error) in job order
+    """
+    def run(job):
+        started = time.perf_counter()
+        result = {'input': str(job['input']), 'output': str(job['output'])}
+        try:
+            add_text_overlay(
+                job['input'], job['output'], job['text'],
+                position=job.get('position', 'south'),
+                fontsize=int(job.get('fontsize', 72)),
+                color=job.get('color', 'white'),
+                strokewidth=int(job.get('strokewidth', 3)),
+                offset=tuple(job.get('offset', (0, 50)))
+            )
+            result['status'] = 'ok'
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = str(e)
+        result['seconds'] = round(time.perf_counter() - started, 4)
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 4) as pool:
+        return list(pool.map(run, jobs))
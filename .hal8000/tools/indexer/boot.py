@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Boot Snapshot
+
+Compiles what boot needs from state.json, the session digest, master.json
+and BIOS.md into one precomputed artifact (indexes/.boot-snapshot.json):
+system state, active session pointers, recent-session digest, index
+summary and registry paths. Each input's mtime, size and sha256 are
+recorded; the snapshot is rebuilt only when an input's content changes
+(a touch without a content change only refreshes the recorded stat).
+
+Usage:
+    python3 .hal8000/tools/indexer/boot.py            # print the boot summary (rebuild if stale)
+    python3 .hal8000/tools/indexer/boot.py --json     # the snapshot itself
+    python3 .hal8000/tools/indexer/boot.py --check    # report whether the snapshot is fresh (read-only)
+    python3 .hal8000/tools/indexer/boot.py bench      # cold-boot bytes read / load time vs reading the inputs
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# HAL root: .hal8000/tools/indexer/boot.py -> three levels up
+HAL_ROOT = Path(__file__).resolve().parents[3]
+
+SNAPSHOT_FILE = '.hal8000/indexes/.boot-snapshot.json'
+SNAPSHOT_VERSION = 1
+
+BIOS_FILE = '.hal8000/BIOS.md'
+STATE_FILE = '.hal8000/config/state.json'
+MASTER_INDEX = '.hal8000/indexes/master.json'
+DIGEST_FILE = '.hal8000/indexes/session-digest.json'
+
+# Fixed inputs; the active session files named in state.json are added per build
+BOOT_INPUTS = [BIOS_FILE, STATE_FILE, MASTER_INDEX, DIGEST_FILE]
+
+# Legacy index paths in master.json are reported as kernel paths
+LEGACY_PREFIX = '.claude/'
+KERNEL_PREFIX = '.hal8000/'
+
+# Next steps per digest session carried into the snapshot
+SNAPSHOT_NEXT_STEPS = 3
+
+def now_iso():
+    """Current UTC time in the index timestamp format"""
+    from datetime import datetime, timezone
+
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def relative_path(root, path):
+    """A state.json pointer (absolute or relative, legacy or kernel) as a root-relative path"""
+    if os.path.isabs(path):
+        try:
+            path = os.path.relpath(path, root)
+        except ValueError:
+            return path
+    if path.startswith(LEGACY_PREFIX):
+        path = KERNEL_PREFIX + path[len(LEGACY_PREFIX):]
+    return path
+
+def read_input(root, rel):
+    """(bytes, stat record) of one input; (None, missing record) if it does not exist"""
+    # hashlib and datetime load only when an input is read or the snapshot
+    # rebuilt, keeping them off the fresh-snapshot path
+    import hashlib
+
+    try:
+        data = (Path(root) / rel).read_bytes()
+        stat = os.stat(Path(root) / rel)
+    except OSError:
+        return None, {'missing': True}
+    return data, {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                  'sha256': hashlib.sha256(data).hexdigest()}
+
+def parse_json(data):
+    """Parsed JSON bytes, or None if missing or invalid"""
+    if data is None:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+def build_snapshot(root=HAL_ROOT):
+    """
+    Compile the boot snapshot from its inputs.
+
+    Returns:
+        Snapshot dict (inputs with mtime/size/sha256, system, context,
+        sessions, indexes, registry, variables)
+    """
+    root = Path(root)
+    inputs = {}
+    contents = {}
+    for rel in BOOT_INPUTS:
+        contents[rel], inputs[rel] = read_input(root, rel)
+
+    state = parse_json(contents[STATE_FILE]) or {}
+    master = parse_json(contents[MASTER_INDEX]) or {}
+    digest = parse_json(contents[DIGEST_FILE]) or {}
+    bios = (contents[BIOS_FILE] or b'').decode('utf-8', errors='replace')
+    bios_version = re.search(r'^\*\*Version:\*\*\s*(.+)$', bios, re.MULTILINE)
+
+    active = {}
+    for platform, pointer in (state.get('active_sessions') or {}).items():
+        if not pointer:
+            active[platform] = None
+            continue
+        rel = relative_path(root, pointer)
+        data, record = read_input(root, rel)
+        inputs[rel] = record
+        active[platform] = {'path': rel, 'exists': data is not None,
+                            'bytes': len(data) if data is not None else 0}
+
+    recent = [{
+        'session': entry.get('session'),
+        'title': entry.get('title'),
+        'next_steps': (entry.get('next_steps') or [])[:SNAPSHOT_NEXT_STEPS],
+        'blockers': entry.get('blockers'),
+    } for entry in digest.get('recent_sessions', [])]
+
+    directories = {
+        directory: {
+            'index_file': relative_path(root, info.get('index_file', '')),
+            'files': info.get('file_count'),
+            'tokens': info.get('total_tokens_estimate'),
+            'topics': info.get('primary_topics', []),
+        }
+        for directory, info in (master.get('directories') or {}).items()
+    }
+    libraries = master.get('libraries') or {}
+
+    metadata = state.get('assistant_metadata') or {}
+    return {
+        'version': SNAPSHOT_VERSION,
+        'built': now_iso(),
+        'inputs': inputs,
+        'system': {
+            'universal_version': state.get('universal_version'),
+            'architecture_type': state.get('architecture_type'),
+            'system_phase': state.get('system_phase'),
+            'bios_version': bios_version.group(1).strip() if bios_version else None,
+            'state_updated': state.get('last_updated'),
+        },
+        'context': {
+            'global_context': state.get('global_context'),
+            'next_action': state.get('next_action'),
+            'loaded_commands': state.get('loaded_commands', []),
+        },
+        'sessions': {
+            'active': active,
+            'latest': digest.get('latest_session'),
+            'recent': recent,
+            'total': (digest.get('history') or {}).get('total_sessions'),
+        },
+        'indexes': {
+            'master': MASTER_INDEX,
+            'directories': directories,
+            'libraries': {
+                'index_file': relative_path(root, libraries.get('index_file', '')),
+                'internal': libraries.get('internal_count'),
+                'external': libraries.get('external_count'),
+            },
+            'totals': master.get('statistics', {}),
+        },
+        'registry': state.get('registry', {}),
+        'variables': metadata.get('variables', {}),
+    }
+
+# ---------------------------------------------------------------------------
+# Freshness
+# ---------------------------------------------------------------------------
+
+def stale_inputs(root, snapshot):
+    """
+    Inputs whose content differs from the snapshot's record.
+
+    Inputs with an unchanged mtime and size are trusted without reading;
+    the others are re-hashed, so a touch is not a change.
+
+    Returns:
+        (changed, touched): paths whose content changed (or appeared /
+        disappeared), and paths with new stat but same content -> new record
+    """
+    changed, touched = [], {}
+    for rel, record in snapshot.get('inputs', {}).items():
+        path = Path(root) / rel
+        try:
+            stat = os.stat(path)
+        except OSError:
+            if not record.get('missing'):
+                changed.append(rel)
+            continue
+        if record.get('missing'):
+            changed.append(rel)
+        elif stat.st_mtime_ns != record['mtime_ns'] or stat.st_size != record['size']:
+            data, new_record = read_input(root, rel)
+            if new_record.get('sha256') != record['sha256']:
+                changed.append(rel)
+            else:
+                touched[rel] = new_record
+    return changed, touched
+
+def write_snapshot(root, snapshot):
+    """Write the snapshot (compact; it is machine-only)"""
+    path = Path(root) / SNAPSHOT_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_snapshot(root=HAL_ROOT, rebuild=True):
+    """
+    Current boot snapshot.
+
+    Args:
+        root: HAL root
+        rebuild: Rebuild and save when missing or stale, and save refreshed
+            stat records; with rebuild=False nothing is written (a stale
+            snapshot returns None)
+
+    Returns:
+        (snapshot, status): status is 'fresh', 'refreshed' (stat records
+        updated only), 'rebuilt', or with rebuild=False 'touched' (content
+        unchanged, stat records out of date) or 'stale'
+    """
+    root = Path(root)
+    try:
+        snapshot = json.loads((root / SNAPSHOT_FILE).read_bytes())
+    except (OSError, ValueError):
+        snapshot = None
+
+    if snapshot and snapshot.get('version') == SNAPSHOT_VERSION:
+        changed, touched = stale_inputs(root, snapshot)
+        if not changed:
+            if touched:
+                snapshot['inputs'].update(touched)
+                if not rebuild:
+                    return snapshot, 'touched'
+                write_snapshot(root, snapshot)
+                return snapshot, 'refreshed'
+            return snapshot, 'fresh'
+
+    if not rebuild:
+        return None, 'stale'
+    snapshot = build_snapshot(root)
+    write_snapshot(root, snapshot)
+    return snapshot, 'rebuilt'
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def print_summary(snapshot, status):
+    """Boot summary in the acknowledgment's vocabulary"""
+    system, context, sessions = snapshot['system'], snapshot['context'], snapshot['sessions']
+    print(f"HAL8000-Assistant boot snapshot ({status}, built {snapshot['built']})")
+    print(f"- Version: {system['universal_version']} (BIOS {system['bios_version']})")
+    print(f"- Architecture: {system['architecture_type']}")
+    print(f"- Phase: {system['system_phase']}")
+    print(f"- Global Context: {context['global_context']}")
+    print(f"- Next Action: {context['next_action']}")
+    for platform, session in sessions['active'].items():
+        if session:
+            note = '' if session['exists'] else '  [MISSING]'
+            print(f"- Active Session ({platform}): {session['path']}{note}")
+    if sessions['latest']:
+        print(f"- Latest Session: {sessions['latest']} (of {sessions['total']})")
+
+    if sessions['recent']:
+        print("\nRecent sessions (digest):")
+        for entry in sessions['recent']:
+            print(f"- {entry['title']}")
+            for step in entry['next_steps']:
+                print(f"    next: {step}")
+            if entry['blockers'] and not entry['blockers'].lower().startswith('none'):
+                print(f"    blockers: {entry['blockers']}")
+
+    indexes = snapshot['indexes']
+    totals = indexes['totals']
+    print(f"\nIndexes ({totals.get('total_files')} files, "
+          f"~{totals.get('total_estimated_tokens', 0):,} tokens; master: {indexes['master']}):")
+    for directory, info in indexes['directories'].items():
+        print(f"- {directory}: {info['files']} files, ~{info['tokens'] or 0:,} tokens "
+              f"-> {info['index_file']}")
+    libraries = indexes['libraries']
+    print(f"- libraries: {libraries['internal']} internal, {libraries['external']} external "
+          f"-> {libraries['index_file']}")
+
+    print("\nRegistry:")
+    for name, path in snapshot['registry'].items():
+        print(f"- {name}: {path}")
+
+# One boot in a fresh interpreter: prints ms from start (with imports) and
+# ms after imports
+COLD_BOOT = """
+import sys, time
+started = time.perf_counter()
+sys.path.insert(0, {tool_dir!r})
+if {mode!r} == 'current':
+    import json, os
+    loaded = time.perf_counter()
+    for path in {inputs!r}:
+        with open(path, 'rb') as f:
+            json.loads(f.read())
+    for path in {sessions!r}:
+        os.path.exists(path)
+else:
+    import boot
+    loaded = time.perf_counter()
+    snapshot, status = boot.load_snapshot({root!r}, rebuild=False)
+    assert status == 'fresh', status
+done = time.perf_counter()
+print((done - started) * 1000, (done - loaded) * 1000)
+"""
+
+def bench(root=HAL_ROOT, runs=20):
+    """
+    Cold boot input loading with and without the snapshot, each run in a
+    fresh interpreter (the OS file cache stays warm).
+
+    Current path: read and parse state.json, master.json and the session
+    digest, and stat the active session files. Snapshot path: import
+    boot.py, stat every recorded input and read one JSON file. BIOS.md is
+    read in full by both boots, so it is left out.
+
+    Prints medians of the time after imports ('load'), including imports
+    ('with imports') and the whole process including interpreter start-up.
+    """
+    import subprocess
+
+    root = Path(root)
+    load_snapshot(root)
+    state = json.loads((root / STATE_FILE).read_bytes())
+    inputs = [str(root / rel) for rel in (STATE_FILE, MASTER_INDEX, DIGEST_FILE)]
+    sessions = [str(root / relative_path(root, pointer))
+                for pointer in (state.get('active_sessions') or {}).values() if pointer]
+    sizes = {'current': sum(os.path.getsize(path) for path in inputs),
+             'snapshot': os.path.getsize(root / SNAPSHOT_FILE)}
+
+    results = {}
+    for mode in ('current', 'snapshot'):
+        script = COLD_BOOT.format(tool_dir=str(Path(__file__).resolve().parent), mode=mode,
+                                  root=str(root), inputs=inputs, sessions=sessions)
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', script], capture_output=True,
+                                    text=True, check=True).stdout
+            process_ms = (time.perf_counter() - started) * 1000
+            timings.append(tuple(map(float, output.split())) + (process_ms,))
+        total, load, process = (sorted(t[i] for t in timings)[runs // 2] for i in range(3))
+        results[mode] = {'bytes': sizes[mode], 'load_ms': round(load, 3),
+                         'imports_ms': round(total, 3), 'process_ms': round(process, 1)}
+
+    (root / SNAPSHOT_FILE).unlink()
+    started = time.perf_counter()
+    load_snapshot(root)
+    results['rebuild_ms'] = round((time.perf_counter() - started) * 1000, 3)
+
+    print(f"Cold boot input loading ({runs} fresh interpreters, median)")
+    print(f"{'':<10} {'Bytes read':>12} {'Load':>10} {'With imports':>14} {'Process':>10}")
+    for mode in ('current', 'snapshot'):
+        result = results[mode]
+        print(f"{mode:<10} {result['bytes']:>12,} {result['load_ms']:>7.3f} ms "
+              f"{result['imports_ms']:>11.3f} ms {result['process_ms']:>7.1f} ms")
+    print(f"Rebuild after an input change: {results['rebuild_ms']:.3f} ms")
+    return results
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench':
+        try:
+            bench(sys.argv[2] if len(sys.argv) > 2 else HAL_ROOT)
+        except Exception as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='HAL8000-Assistant boot snapshot (state, sessions, index summary, registry)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Print the boot summary, rebuilding the snapshot only if an input changed:
+    %(prog)s
+
+  Show whether the snapshot is fresh without rebuilding or writing it:
+    %(prog)s --check
+
+  Compare cold-boot bytes read and load time against reading the inputs:
+    %(prog)s bench
+        """
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the snapshot as JSON'
+    )
+
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Report freshness only, writing nothing (exit 1 if stale)'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.check:
+            snapshot, status = load_snapshot(args.root, rebuild=False)
+            if status == 'touched':
+                status = 'fresh (inputs touched; the next boot refreshes their records)'
+            print(f"[{'OK' if snapshot else 'INFO'}] Boot snapshot {status}")
+            return 0 if snapshot else 1
+        snapshot, status = load_snapshot(args.root)
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(snapshot, indent=2, ensure_ascii=False))
+    else:
+        print_summary(snapshot, status)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Section Chunk Index
+
+Splits markdown (and HTML, for the reference manual) by heading into
+chunks that carry byte offsets, line ranges, token counts and heading
+paths. The indexer keeps one chunk index per monitored directory
+(indexes/.chunks-<index>.json, next to the directory index); readers look
+a section up there and fetch it with a single seek-and-read instead of
+loading the whole file.
+
+Usage:
+    python3 .hal8000/tools/indexer/chunks.py data/architecture/hal8000-io-system.md
+    python3 .hal8000/tools/indexer/chunks.py data/reference-manual/index.html "Boot Sequence"
+    python3 .hal8000/tools/indexer/chunks.py data/reference-manual/index.html --json
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import tokens
+
+# HAL root: .hal8000/tools/indexer/chunks.py -> three levels up
+HAL_ROOT = Path(__file__).resolve().parents[3]
+
+INDEXES_DIR = '.hal8000/indexes'
+CHUNK_INDEX_VERSION = 1
+
+# File types split into chunks (everything else is only indexed whole)
+CHUNK_EXTENSIONS = {'.md', '.html'}
+
+# Chunks smaller than this are merged into a neighbouring chunk
+MIN_CHUNK_TOKENS = 60
+
+MARKDOWN_HEADING = re.compile(rb'^(#{1,6})[ \t]+(.+?)[ \t]*#*[ \t]*\r?$')
+HTML_HEADING = re.compile(rb'<h([1-6])\b[^>]*>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+HTML_TAG = re.compile(r'<[^>]+>')
+
+# Loaded chunk indexes: path -> (mtime_ns, data)
+_loaded = {}
+
+def chunk_index_path(root, config):
+    """Chunk index file for a DIRECTORIES entry (indexer.py)"""
+    return Path(root) / INDEXES_DIR / f".chunks-{config['index']}"
+
+def chunkable(rel):
+    """Whether a file is split into chunks"""
+    return os.path.splitext(rel)[1].lower() in CHUNK_EXTENSIONS
+
+# ---------------------------------------------------------------------------
+# Splitting
+# ---------------------------------------------------------------------------
+
+def markdown_headings(data):
+    """(offset, level, title) for every markdown heading outside code fences"""
+    headings = []
+    in_code = False
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        if line.lstrip().startswith(b'```'):
+            in_code = not in_code
+        elif not in_code:
+            match = MARKDOWN_HEADING.match(line)
+            if match:
+                title = match.group(2).decode('utf-8', errors='replace').strip()
+                headings.append((offset, len(match.group(1)), title))
+        offset += len(line)
+    return headings
+
+def html_headings(data):
+    """(offset, level, title) for every <h1>..<h6> element"""
+    headings = []
+    for match in HTML_HEADING.finditer(data):
+        title = HTML_TAG.sub('', match.group(2).decode('utf-8', errors='replace'))
+        title = ' '.join(html.unescape(title).split())
+        if title:
+            headings.append((match.start(), int(match.group(1)), title))
+    return headings
+
+def split_chunks(data, rel=''):
+    """
+    Split file bytes into heading chunks.
+
+    Each chunk runs from its heading to the next heading of any level, so
+    chunks never overlap and together cover the file. A chunk under
+    MIN_CHUNK_TOKENS is merged into its first subsection when one follows
+    (a bare parent heading), otherwise into the preceding chunk.
+
+    Args:
+        data: File content as bytes
+        rel: File name, used to pick markdown or HTML headings
+
+    Returns:
+        List of dicts: heading (path joined by ' > '), level, start, end
+        (byte offsets, end exclusive), start_line, end_line (1-based,
+        inclusive), tokens
+    """
+    if rel.lower().endswith('.html'):
+        headings = html_headings(data)
+    else:
+        headings = markdown_headings(data)
+
+    bounds = [(0, 0, '')] if not headings or headings[0][0] > 0 else []
+    bounds += headings
+
+    raw = []
+    path = []
+    line = 1
+    for number, (start, level, title) in enumerate(bounds):
+        end = bounds[number + 1][0] if number + 1 < len(bounds) else len(data)
+        if level:
+            path = path[:level - 1] + [''] * (level - 1 - len(path)) + [title]
+        text = data[start:end].decode('utf-8', errors='replace')
+        newlines = data.count(b'\n', start, end)
+        last_line = line + newlines - (1 if data[start:end].endswith(b'\n') else 0)
+        chunk = {
+            'heading': ' > '.join(p for p in path if p), 'level': level,
+            'start': start, 'end': end, 'start_line': line, 'end_line': max(last_line, line),
+            'tokens': tokens.count_tokens(text),
+        }
+        line += newlines
+        raw.append(chunk)
+
+    chunks = []
+    carried = None
+    for number, chunk in enumerate(raw):
+        if carried:
+            chunk = dict(chunk, start=carried['start'], start_line=carried['start_line'],
+                         tokens=carried['tokens'] + chunk['tokens'])
+            carried = None
+        if chunk['tokens'] < MIN_CHUNK_TOKENS:
+            following = raw[number + 1] if number + 1 < len(raw) else None
+            if chunk['level'] and following and following['level'] > chunk['level']:
+                carried = chunk
+                continue
+            if chunks:
+                previous = chunks[-1]
+                previous['end'] = chunk['end']
+                previous['end_line'] = chunk['end_line']
+                previous['tokens'] += chunk['tokens']
+                continue
+        chunks.append(chunk)
+    return chunks
+
+# ---------------------------------------------------------------------------
+# Chunk index (written by indexer.py)
+# ---------------------------------------------------------------------------
+
+def update_chunk_index(root, directory, config, records, dry_run=False):
+    """
+    Bring one directory's chunk index in line with the indexer state.
+
+    Only files whose sha256 differs from the saved entry are re-read and
+    re-split; entries for deleted files are dropped.
+
+    Args:
+        root: HAL root
+        directory: DIRECTORIES key
+        config: DIRECTORIES entry
+        records: Indexer state records (path -> mtime_ns, size, sha256, tokens)
+        dry_run: Report without writing
+
+    Returns:
+        (rewritten, files_split)
+    """
+    path = chunk_index_path(root, config)
+    try:
+        index = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        index = None
+    if (not index or index.get('version') != CHUNK_INDEX_VERSION
+            or index.get('token_method') != tokens.METHOD):
+        index = {'version': CHUNK_INDEX_VERSION, 'token_method': tokens.METHOD, 'files': {}}
+
+    existing = index['files']
+    files = {}
+    split = 0
+    for rel in sorted(records):
+        if not chunkable(rel):
+            continue
+        record = records[rel]
+        entry = existing.get(rel)
+        if entry and entry['sha256'] == record['sha256']:
+            files[rel] = dict(entry, mtime_ns=record['mtime_ns'], size=record['size'])
+            continue
+        try:
+            data = (Path(root) / rel).read_bytes()
+        except OSError:
+            continue
+        files[rel] = {'mtime_ns': record['mtime_ns'], 'size': len(data),
+                      'sha256': hashlib.sha256(data).hexdigest(),
+                      'chunks': split_chunks(data, rel)}
+        split += 1
+
+    new_index = {'version': CHUNK_INDEX_VERSION, 'token_method': tokens.METHOD,
+                 'directory': directory, 'files': files}
+    if new_index == index:
+        return False, split
+    if not dry_run:
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(new_index, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        _loaded.pop(str(path), None)
+    return True, split
+
+# ---------------------------------------------------------------------------
+# Reader API
+# ---------------------------------------------------------------------------
+
+def load_chunk_index(path):
+    """Parsed chunk index (cached while the file is unchanged), or None"""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _loaded.get(str(path))
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    try:
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    _loaded[str(path)] = (mtime_ns, data)
+    return data
+
+def file_chunks(root, rel):
+    """
+    Chunks of one file.
+
+    Uses the directory's chunk index when its entry matches the file's
+    current mtime and size; otherwise (not indexed yet, edited since the
+    last indexer run, outside the monitored directories) the file is split
+    on the spot.
+
+    Returns:
+        List of chunk dicts (see split_chunks), empty if the file is missing
+    """
+    import indexer
+
+    root = Path(root)
+    rel = indexer.canonical_path(rel)
+    try:
+        stat = os.stat(root / rel)
+    except OSError:
+        return []
+
+    directory = indexer.monitored_target(rel)
+    config = indexer.DIRECTORIES.get(directory)
+    if config:
+        index = load_chunk_index(chunk_index_path(root, config))
+        entry = index and index['files'].get(rel)
+        if (entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+                and index.get('token_method') == tokens.METHOD):
+            return entry['chunks']
+    return split_chunks((root / rel).read_bytes(), rel)
+
+def read_chunk(root, rel, chunk):
+    """Text of one chunk: a single seek and read of its byte range"""
+    with open(Path(root) / rel, 'rb') as f:
+        f.seek(chunk['start'])
+        return f.read(chunk['end'] - chunk['start']).decode('utf-8', errors='replace')
+
+def find_chunk(root, rel, heading):
+    """
+    Chunk whose heading matches, or None.
+
+    An exact (case-insensitive) match on the last heading component wins;
+    otherwise the first chunk whose heading path contains the text.
+    """
+    wanted = heading.strip().lower()
+    chunks = file_chunks(root, rel)
+    for chunk in chunks:
+        if chunk['heading'].rsplit(' > ', 1)[-1].lower() == wanted:
+            return chunk
+    for chunk in chunks:
+        if wanted in chunk['heading'].lower():
+            return chunk
+    return None
+
+def read_section(root, rel, heading):
+    """Text of the section under a heading, or None if there is no such heading"""
+    chunk = find_chunk(root, rel, heading)
+    return read_chunk(root, rel, chunk) if chunk else None
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='HAL8000-Assistant section chunks (list a file\'s sections or print one)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  List the sections of a document with byte ranges and token counts:
+    %(prog)s data/architecture/hal8000-io-system.md
+
+  Print one section of the reference manual:
+    %(prog)s data/reference-manual/index.html "Boot Sequence"
+        """
+    )
+
+    parser.add_argument(
+        'file',
+        help='File path relative to the HAL root'
+    )
+
+    parser.add_argument(
+        'heading',
+        nargs='?',
+        help='Print the section under this heading instead of listing'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print chunks (or the chosen chunk with its text) as JSON'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.heading:
+            chunk = find_chunk(args.root, args.file, args.heading)
+            if not chunk:
+                print(f"[ERROR] No section matching '{args.heading}' in {args.file}", file=sys.stderr)
+                return 1
+            text = read_chunk(args.root, args.file, chunk)
+            if args.json:
+                print(json.dumps(dict(chunk, text=text), indent=2))
+            else:
+                print(text, end='' if text.endswith('\n') else '\n')
+            return 0
+
+        chunks = file_chunks(args.root, args.file)
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if not chunks:
+        print(f"[ERROR] Not found: {args.file}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(chunks, indent=2))
+        return 0
+
+    print(f"{args.file}: {len(chunks)} sections, {sum(c['tokens'] for c in chunks):,} tokens")
+    for chunk in chunks:
+        lines = f"{chunk['start_line']}-{chunk['end_line']}"
+        print(f"{chunk['tokens']:>7,}  {lines:>11}  {'  ' * max(chunk['level'] - 1, 0)}"
+              f"{chunk['heading'] or '(preamble)'}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Session Archive Compaction
+
+Groups session handoff files from completed months into one archive file
+per month (sessions/archive/YYYY-MM.md) with an offset table
+(sessions/archive/index.json), so every session stays retrievable with a
+single seek. Also keeps a rolling digest of recent decisions, next steps
+and blockers (indexes/session-digest.json). Boot reads the digest and the
+latest session only, so its cost stays flat as history grows.
+
+Archives are plain markdown: byte offsets serve seek-and-read, line
+numbers serve Read offset/limit. Originals are kept unless
+--delete-originals is given; the active session is never archived away.
+
+Usage:
+    python3 .hal8000/tools/indexer/compact.py                     # archive months + refresh digest
+    python3 .hal8000/tools/indexer/compact.py --dry-run           # report only
+    python3 .hal8000/tools/indexer/compact.py --delete-originals  # also remove archived originals
+    python3 .hal8000/tools/indexer/compact.py digest              # refresh the digest only
+    python3 .hal8000/tools/indexer/compact.py show 2025-10-15-0735-session-end-bug-fix
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+# HAL root: .hal8000/tools/indexer/compact.py -> three levels up
+HAL_ROOT = Path(__file__).resolve().parents[3]
+
+SESSIONS_DIR = '.hal8000/sessions/'
+ARCHIVE_DIR = f'{SESSIONS_DIR}archive/'
+ARCHIVE_INDEX = f'{ARCHIVE_DIR}index.json'
+ARCHIVE_VERSION = 1
+DIGEST_FILE = '.hal8000/indexes/session-digest.json'
+STATE_FILE = '.hal8000/config/state.json'
+
+# Sessions summarized in the digest (besides the latest, which boot reads whole)
+DIGEST_SESSIONS = 8
+
+# Per-session caps in the digest
+DIGEST_ITEMS = 5
+DIGEST_ITEM_CHARS = 160
+
+SESSION_NAME = re.compile(r'^(\d{4}-\d{2})-\d{2}-\d{4}-.+\.md$')
+MEMBER_MARKER = '<!-- hal-session: {name} sha256={sha256} -->\n'
+
+def now_iso():
+    """Current UTC time in the index timestamp format"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def write_atomic(path, text):
+    """Write through a temp file and rename"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def read_json(path):
+    """Parsed JSON file, or None if missing or invalid"""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+# ---------------------------------------------------------------------------
+# Session files
+# ---------------------------------------------------------------------------
+
+def session_files(root):
+    """Session file names (YYYY-MM-DD-HHMM-*.md) in sessions/, oldest first"""
+    base = Path(root) / SESSIONS_DIR
+    if not base.is_dir():
+        return []
+    return sorted(entry.name for entry in os.scandir(base)
+                  if entry.is_file() and SESSION_NAME.match(entry.name))
+
+def active_sessions(root):
+    """Session file names the state file points at (never deleted)"""
+    state = read_json(Path(root) / STATE_FILE) or {}
+    pointers = list((state.get('active_sessions') or {}).values())
+    pointers.append(state.get('active_session'))
+    return {os.path.basename(p) for p in pointers if p}
+
+def session_name(name):
+    """Normalize a session reference (path, file name or stem) to a file name"""
+    name = os.path.basename(name.strip())
+    return name if name.endswith('.md') else f'{name}.md'
+
+def list_items(lines):
+    """Leading list items of a block, markup stripped and capped"""
+    items = []
+    for line in lines:
+        stripped = line.strip()
+        match = re.match(r'^(?:[-*+]|\d+\.)\s+(.*)$', stripped)
+        if match:
+            item = match.group(1).replace('**', '').replace('`', '').strip()
+            if len(item) > DIGEST_ITEM_CHARS:
+                item = item[:DIGEST_ITEM_CHARS - 3].rstrip() + '...'
+            items.append(item)
+        elif items and stripped and not line.startswith((' ', '\t')):
+            break
+        elif not stripped and items and len(items) >= DIGEST_ITEMS:
+            break
+    return items[:DIGEST_ITEMS]
+
+def parse_session(name, text):
+    """
+    Digest fields of one session handoff file.
+
+    Reads the HAL-session-end template: '# Session:' title, '## Key
+    Decisions Made' bullets, the '**Next Steps...:**' list and the
+    '**Blockers:**' line.
+
+    Returns:
+        Dict: session, date, title, decisions, next_steps, blockers
+    """
+    lines = text.splitlines()
+    title_match = re.search(r'^#\s+(?:Session:\s*)?(.+)$', text, re.MULTILINE)
+    title = title_match.group(1).strip() if title_match else name[:-3]
+
+    decisions, next_steps, blockers = [], [], None
+    for number, line in enumerate(lines):
+        if re.match(r'^##\s+(?:Key\s+)?Decisions', line, re.IGNORECASE) and not decisions:
+            block = []
+            for following in lines[number + 1:]:
+                if following.startswith('#'):
+                    break
+                block.append(following)
+            decisions = list_items(block)
+        elif re.match(r'^\*\*Next (?:Steps|Actions)[^*]*:\*\*', line) and not next_steps:
+            next_steps = list_items(lines[number + 1:])
+        elif line.startswith('**Blockers:**') and blockers is None:
+            blockers = line[len('**Blockers:**'):].strip()[:DIGEST_ITEM_CHARS] or None
+
+    return {
+        'session': name,
+        'date': name[:10],
+        'title': title,
+        'decisions': decisions,
+        'next_steps': next_steps,
+        'blockers': blockers,
+    }
+
+# ---------------------------------------------------------------------------
+# Monthly archives
+# ---------------------------------------------------------------------------
+
+def load_archive_index(root):
+    """Offset table of all monthly archives"""
+    index = read_json(Path(root) / ARCHIVE_INDEX)
+    if not index or index.get('version') != ARCHIVE_VERSION:
+        return {'version': ARCHIVE_VERSION, 'archives': {}}
+    return index
+
+def build_archive(month, members):
+    """
+    Archive bytes and offset table for one month.
+
+    Args:
+        month: 'YYYY-MM'
+        members: List of (name, bytes), oldest first
+
+    Returns:
+        (data, entries): archive content and one offset entry per session
+        (offset/length in bytes of the session body, line/lines for Read)
+    """
+    header = f'# Session Archive: {month}\n\n'.encode('utf-8')
+    parts = [header]
+    offset = len(header)
+    line = header.count(b'\n') + 1
+    entries = []
+
+    for name, data in members:
+        if not data.endswith(b'\n'):
+            data += b'\n'
+        sha256 = hashlib.sha256(data).hexdigest()
+        marker = MEMBER_MARKER.format(name=name, sha256=sha256).encode('utf-8')
+        separator = b'\n'
+        parts.extend([marker, data, separator])
+        offset += len(marker)
+        line += 1
+        entries.append({
+            'session': name,
+            'offset': offset, 'length': len(data),
+            'line': line, 'lines': data.count(b'\n'),
+            'sha256': sha256,
+        })
+        offset += len(data) + len(separator)
+        line += data.count(b'\n') + separator.count(b'\n')
+
+    return b''.join(parts), entries
+
+def read_member(root, archive_file, entry):
+    """Session bytes from an archive: one seek and read, checked against its sha256"""
+    with open(Path(root) / ARCHIVE_DIR / archive_file, 'rb') as f:
+        f.seek(entry['offset'])
+        data = f.read(entry['length'])
+    if hashlib.sha256(data).hexdigest() != entry['sha256']:
+        raise ValueError(f"Archive member {entry['session']} in {archive_file} is corrupt")
+    return data
+
+def find_session(root, name):
+    """
+    Where a session lives.
+
+    Returns:
+        ('file', relative path) for an original, ('archive', archive file,
+        offset entry) for an archived session, or None
+    """
+    name = session_name(name)
+    if (Path(root) / SESSIONS_DIR / name).is_file():
+        return ('file', f'{SESSIONS_DIR}{name}')
+    for archive in load_archive_index(root)['archives'].values():
+        for entry in archive['sessions']:
+            if entry['session'] == name:
+                return ('archive', archive['file'], entry)
+    return None
+
+def read_session(root, name):
+    """Text of a session, from the original file or its archive; None if unknown"""
+    location = find_session(root, name)
+    if not location:
+        return None
+    if location[0] == 'file':
+        return (Path(root) / location[1]).read_text(encoding='utf-8', errors='replace')
+    return read_member(root, location[1], location[2]).decode('utf-8', errors='replace')
+
+def compact(root=HAL_ROOT, delete_originals=False, dry_run=False):
+    """
+    Archive completed months and refresh the digest.
+
+    A month is complete once a newer month has sessions. An archive is
+    rewritten only when its member set or content changes; sessions
+    already archived whose originals were deleted are carried over from
+    the existing archive.
+
+    Args:
+        root: HAL root
+        delete_originals: Remove originals of archived sessions (after
+            verifying every member reads back intact); active sessions are kept
+        dry_run: Report without writing or deleting
+
+    Returns:
+        Report dict: archived months, rewritten files, deleted originals, digest
+    """
+    root = Path(root)
+    names = session_files(root)
+    index = load_archive_index(root)
+    report = {'months': {}, 'rewritten': [], 'deleted': [], 'digest': None}
+
+    by_month = {}
+    for name in names:
+        by_month.setdefault(SESSION_NAME.match(name).group(1), []).append(name)
+    for month in index['archives']:
+        by_month.setdefault(month, [])
+    newest_month = max((n[:7] for n in names), default=None)
+
+    new_archives = {}
+    for month in sorted(by_month):
+        previous = index['archives'].get(month)
+        if newest_month and month >= newest_month and not previous:
+            continue
+
+        members = {}
+        if previous:
+            for entry in previous['sessions']:
+                if entry['session'] not in by_month[month]:
+                    members[entry['session']] = read_member(root, previous['file'], entry)
+        for name in by_month[month]:
+            members[name] = (root / SESSIONS_DIR / name).read_bytes()
+
+        data, entries = build_archive(month, sorted(members.items()))
+        archive = {'file': f'{month}.md', 'size': len(data),
+                   'sha256': hashlib.sha256(data).hexdigest(), 'sessions': entries}
+        new_archives[month] = archive
+        report['months'][month] = len(entries)
+
+        if not previous or previous['sha256'] != archive['sha256']:
+            report['rewritten'].append(f"{ARCHIVE_DIR}{archive['file']}")
+            if not dry_run:
+                path = root / ARCHIVE_DIR / archive['file']
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(f'.{path.name}.tmp')
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+
+    new_index = {'version': ARCHIVE_VERSION, 'archives': new_archives}
+    if new_index != read_json(root / ARCHIVE_INDEX) and (new_archives or index['archives']):
+        report['rewritten'].append(ARCHIVE_INDEX)
+        if not dry_run:
+            write_atomic(root / ARCHIVE_INDEX, json.dumps(new_index, indent=2) + '\n')
+
+    if delete_originals:
+        keep = active_sessions(root)
+        for month, archive in new_archives.items():
+            for entry in archive['sessions']:
+                original = root / SESSIONS_DIR / entry['session']
+                if entry['session'] in keep or not original.is_file():
+                    continue
+                if not dry_run:
+                    # Only delete what reads back intact from the archive on disk
+                    data = original.read_bytes()
+                    if read_member(root, archive['file'], entry) != (
+                            data if data.endswith(b'\n') else data + b'\n'):
+                        raise ValueError(f"Archive copy of {entry['session']} differs; not deleting")
+                    original.unlink()
+                report['deleted'].append(f"{SESSIONS_DIR}{entry['session']}")
+
+    report['digest'] = update_digest(root, dry_run)
+    return report
+
+# ---------------------------------------------------------------------------
+# Rolling digest
+# ---------------------------------------------------------------------------
+
+def all_sessions(root):
+    """Every known session name (originals and archived), oldest first"""
+    names = set(session_files(root))
+    for archive in load_archive_index(root)['archives'].values():
+        names.update(entry['session'] for entry in archive['sessions'])
+    return sorted(names)
+
+def update_digest(root=HAL_ROOT, dry_run=False):
+    """
+    Rewrite indexes/session-digest.json if its content changed.
+
+    The digest holds the latest session pointer, the state file's global
+    context and next action, and decisions / next steps / blockers of the
+    DIGEST_SESSIONS sessions before the latest one. Its size is bounded,
+    so reading it at boot costs the same however many sessions exist.
+
+    Returns:
+        Path of the digest if rewritten, else None
+    """
+    root = Path(root)
+    names = all_sessions(root)
+    state = read_json(root / STATE_FILE) or {}
+    active = [p for p in (state.get('active_sessions') or {}).values() if p]
+    latest = (active[0] if active and find_session(root, active[0])
+              else f'{SESSIONS_DIR}{names[-1]}' if names else None)
+    latest_name = os.path.basename(latest) if latest else None
+
+    recent = []
+    for name in reversed(names):
+        if name == latest_name:
+            continue
+        text = read_session(root, name)
+        if text is None:
+            continue
+        entry = parse_session(name, text)
+        location = find_session(root, name)
+        entry['path'] = (location[1] if location[0] == 'file'
+                         else f"{ARCHIVE_DIR}{location[1]}#L{location[2]['line']}")
+        recent.append(entry)
+        if len(recent) == DIGEST_SESSIONS:
+            break
+
+    months = {}
+    for name in names:
+        months[name[:7]] = months.get(name[:7], 0) + 1
+
+    digest = {
+        'version': 1,
+        'generated': now_iso(),
+        'latest_session': latest,
+        'global_context': state.get('global_context'),
+        'next_action': state.get('next_action'),
+        'recent_sessions': recent,
+        'history': {
+            'total_sessions': len(names),
+            'archived_months': sorted(load_archive_index(root)['archives']),
+            'sessions_per_month': months,
+        },
+    }
+
+    path = root / DIGEST_FILE
+    previous = read_json(path)
+    if previous and dict(previous, generated=None) == dict(digest, generated=None):
+        return None
+    if not dry_run:
+        write_atomic(path, json.dumps(digest, indent=2, ensure_ascii=False) + '\n')
+    return DIGEST_FILE
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='HAL8000-Assistant session archive compaction and rolling digest',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Archive completed months and refresh the digest:
+    %(prog)s
+
+  Also delete archived originals (active session is kept):
+    %(prog)s --delete-originals
+
+  Refresh only the digest (run by /HAL-session-end):
+    %(prog)s digest
+
+  Print one session, from its file or its archive:
+    %(prog)s show 2025-10-15-0735-session-end-bug-fix
+        """
+    )
+
+    parser.add_argument(
+        'action',
+        nargs='?',
+        default='run',
+        choices=['run', 'digest', 'show'],
+        help='run (default): archive + digest; digest: digest only; show: print a session'
+    )
+
+    parser.add_argument(
+        'session',
+        nargs='?',
+        help='Session file name or stem (for show)'
+    )
+
+    parser.add_argument(
+        '--delete-originals',
+        action='store_true',
+        help='Remove original files of archived sessions (opt-in; verified first)'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Report what would change without writing or deleting'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the report as JSON'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.action == 'show':
+            if not args.session:
+                parser.error('show needs a session name')
+            text = read_session(args.root, args.session)
+            if text is None:
+                print(f"[ERROR] Unknown session: {args.session}", file=sys.stderr)
+                return 1
+            print(text, end='')
+            return 0
+
+        if args.action == 'digest':
+            written = update_digest(args.root, args.dry_run)
+            print(f"[OK] {'Digest updated: ' + written if written else 'Digest up to date'}")
+            return 0
+
+        report = compact(args.root, args.delete_originals, args.dry_run)
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    prefix = 'Would write' if args.dry_run else 'Rewritten'
+    months = ', '.join(f"{m} ({n})" for m, n in report['months'].items()) or 'none'
+    print(f"[OK] Archived months: {months}")
+    print(f"[INFO] {prefix}: {', '.join(report['rewritten']) or 'nothing'}")
+    if report['deleted']:
+        verb = 'Would delete' if args.dry_run else 'Deleted'
+        print(f"[INFO] {verb} {len(report['deleted'])} archived originals")
+    print(f"[INFO] Digest: {report['digest'] or 'up to date'}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Fabric Pattern Finder
+
+Offline semantic index over the fabric patterns' system.md files, to
+answer "best patterns for X" without reading the patterns one by one.
+
+Each pattern becomes a hashed feature vector (word unigrams and bigrams,
+sublinear TF, pattern name and IDENTITY/PURPOSE section boosted) stored as
+one row of a float32 matrix (indexes/.fabric-vectors.f32) that is
+memory-mapped at query time. Queries are ranked by IDF-weighted cosine
+similarity. Changed, added and removed patterns only rewrite their own
+rows; column document frequencies and row norms are refreshed afterwards.
+
+NumPy is used when installed (vectorized scoring on a np.memmap); without
+it the same index is read through mmap and scored in pure Python.
+
+Usage:
+    python3 .hal8000/tools/indexer/fabric_search.py "summarize a youtube transcript"
+    python3 .hal8000/tools/indexer/fabric_search.py "threat model for an api" -k 3 --json
+    python3 .hal8000/tools/indexer/fabric_search.py --rebuild
+"""
+
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import sys
+import time
+import zlib
+from array import array
+from collections import Counter
+from pathlib import Path
+
+import indexer
+import search
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FABRIC_SOURCE = 'external:fabric-patterns'
+FABRIC_DIR = indexer.LIBRARY_SOURCES[FABRIC_SOURCE]['path']
+
+VECTORS_FILE = f'{indexer.INDEXES_DIR}/.fabric-vectors.f32'
+VECTORS_META = f'{indexer.INDEXES_DIR}/.fabric-vectors.json'
+VECTORS_VERSION = 1
+
+# Hashed feature space (2048 x float32 = 8 KB per pattern)
+DIMENSIONS = 2048
+
+# Feature weights: name tokens and the IDENTITY and PURPOSE section say most
+NAME_WEIGHT = 3
+PURPOSE_WEIGHT = 2
+
+def bucket(feature):
+    """Stable hash of a feature string into the vector space"""
+    return zlib.crc32(feature.encode('utf-8')) % DIMENSIONS
+
+def features(text, weight=1, counts=None):
+    """
+    Add hashed unigram and bigram features of text to counts.
+
+    Returns:
+        Counter of bucket -> raw weighted count
+    """
+    counts = counts if counts is not None else Counter()
+    terms = search.tokenize(text)
+    for term in terms:
+        counts[bucket(term)] += weight
+    for first, second in zip(terms, terms[1:]):
+        counts[bucket(f"{first} {second}")] += weight
+    return counts
+
+def purpose_section(text):
+    """Text of the leading IDENTITY and PURPOSE section (up to the next heading)"""
+    lines = []
+    started = False
+    for line in text.splitlines():
+        if line.startswith('#'):
+            if started:
+                break
+            started = 'PURPOSE' in line.upper() or 'IDENTITY' in line.upper()
+            continue
+        if started:
+            lines.append(line)
+    return '\n'.join(lines)
+
+def pattern_vector(name, text):
+    """
+    Vector for one pattern: sublinear TF per bucket.
+
+    Args:
+        name: Pattern directory name (e.g. 'extract_wisdom')
+        text: Contents of its system.md
+
+    Returns:
+        array('f') of length DIMENSIONS
+    """
+    counts = features(text)
+    features(purpose_section(text), PURPOSE_WEIGHT - 1, counts)
+    features(name.replace('_', ' ').replace('-', ' '), NAME_WEIGHT, counts)
+
+    vector = array('f', bytes(4 * DIMENSIONS))
+    for index, count in counts.items():
+        vector[index] = 1.0 + math.log(count)
+    return vector
+
+def query_vector(query):
+    """Sparse query vector: {bucket: sublinear tf}"""
+    return {index: 1.0 + math.log(count) for index, count in features(query).items()}
+
+def idf_weights(df, rows):
+    """Smoothed inverse document frequency per bucket"""
+    return [math.log((rows + 1) / (d + 1)) + 1.0 for d in df]
+
+def empty_meta():
+    """Metadata of an index with no patterns"""
+    return {'version': VECTORS_VERSION, 'dimensions': DIMENSIONS, 'patterns': {},
+            'free_rows': [], 'row_count': 0, 'df': [0] * DIMENSIONS, 'norms': []}
+
+def load_meta(root):
+    """Index metadata, or an empty index if missing or incompatible"""
+    meta = indexer.read_json(Path(root) / VECTORS_META)
+    if (not meta or meta.get('version') != VECTORS_VERSION or meta.get('dimensions') != DIMENSIONS
+            or not (Path(root) / VECTORS_FILE).exists()):
+        return empty_meta()
+    return meta
+
+def save_meta(root, meta):
+    """Write metadata atomically (after the matrix, so a crash re-does the rows)"""
+    path = Path(root) / VECTORS_META
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(meta, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp, path)
+
+def open_matrix(root):
+    """
+    Memory-map the vector matrix.
+
+    Returns:
+        (mapping, view) where view is an np.memmap (rows x DIMENSIONS) with
+        NumPy, or a flat float memoryview without it; (None, None) if empty
+    """
+    path = Path(root) / VECTORS_FILE
+    if not path.exists() or path.stat().st_size == 0:
+        return None, None
+    rows = path.stat().st_size // (4 * DIMENSIONS)
+    if NUMPY_AVAILABLE:
+        matrix = np.memmap(path, dtype=np.float32, mode='r', shape=(rows, DIMENSIONS))
+        return matrix, matrix
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapping, memoryview(mapping).cast('f')
+
+def refresh_statistics(root, meta):
+    """Recompute per-bucket document frequency and IDF-weighted row norms"""
+    live = sorted(entry['row'] for entry in meta['patterns'].values())
+    rows = meta['row_count']
+    mapping, view = open_matrix(root)
+    if view is None:
+        meta['df'], meta['norms'] = [0] * DIMENSIONS, []
+        return
+
+    if NUMPY_AVAILABLE:
+        matrix = view[live]
+        df = (matrix > 0).sum(axis=0)
+        idf = np.asarray(idf_weights(df.tolist(), len(live)), dtype=np.float32)
+        norms = np.zeros(rows, dtype=np.float32)
+        norms[live] = np.sqrt(((matrix * idf) ** 2).sum(axis=1))
+        meta['df'], meta['norms'] = df.astype(int).tolist(), [round(float(n), 6) for n in norms]
+        del matrix, view
+        return
+
+    df = [0] * DIMENSIONS
+    for row in live:
+        offset = row * DIMENSIONS
+        for index in range(DIMENSIONS):
+            if view[offset + index] > 0:
+                df[index] += 1
+    idf = idf_weights(df, len(live))
+    norms = [0.0] * rows
+    for row in live:
+        offset = row * DIMENSIONS
+        norms[row] = round(math.sqrt(sum((view[offset + i] * idf[i]) ** 2
+                                         for i in range(DIMENSIONS) if view[offset + i])), 6)
+    meta['df'], meta['norms'] = df, norms
+    view.release()
+    mapping.close()
+
+def update_vectors(root=indexer.HAL_ROOT, full=False):
+    """
+    Bring the pattern vectors in step with the fabric-patterns directory.
+
+    Args:
+        root: HAL root directory
+        full: Discard the index and vectorize every pattern
+
+    Returns:
+        Report dict with added/modified/deleted pattern names and seconds
+    """
+    started = time.perf_counter()
+    root = Path(root)
+    meta = empty_meta() if full else load_meta(root)
+    scanned = {
+        Path(rel).parent.name: stat
+        for rel, stat in indexer.scan_directory(root, FABRIC_DIR, pattern='system.md').items()
+        if Path(rel).parent.parent.as_posix() + '/' == FABRIC_DIR
+    }
+
+    known = meta['patterns']
+    added = sorted(name for name in scanned if name not in known)
+    modified = sorted(name for name in scanned
+                      if name in known and [known[name]['mtime_ns'], known[name]['size']] != list(scanned[name]))
+    deleted = sorted(name for name in known if name not in scanned)
+
+    if added or modified or deleted or full:
+        path = root / VECTORS_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'r+b' if path.exists() and not full else 'w+b') as f:
+            zero_row = bytes(4 * DIMENSIONS)
+            for name in deleted:
+                row = known.pop(name)['row']
+                f.seek(row * 4 * DIMENSIONS)
+                f.write(zero_row)
+                meta['free_rows'].append(row)
+
+            for name in added + modified:
+                text = search.read_file(root, f"{FABRIC_DIR}{name}/system.md")
+                if text is None:
+                    continue
+                if name in known:
+                    row = known[name]['row']
+                elif meta['free_rows']:
+                    row = meta['free_rows'].pop()
+                else:
+                    row = meta['row_count']
+                    meta['row_count'] += 1
+                f.seek(row * 4 * DIMENSIONS)
+                f.write(pattern_vector(name, text).tobytes())
+                mtime_ns, size = scanned[name]
+                known[name] = {'row': row, 'mtime_ns': mtime_ns, 'size': size}
+            f.truncate(meta['row_count'] * 4 * DIMENSIONS)
+
+        meta['patterns'] = known
+        refresh_statistics(root, meta)
+        meta['last_updated'] = indexer.now_iso()
+        save_meta(root, meta)
+
+    return {
+        'added': added,
+        'modified': modified,
+        'deleted': deleted,
+        'patterns': len(meta['patterns']),
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+
+def score_rows(root, meta, query):
+    """
+    IDF-weighted cosine similarity of every pattern row to the query.
+
+    Returns:
+        Dict of row -> score (rows with no overlap omitted)
+    """
+    q = query_vector(query)
+    live = [entry['row'] for entry in meta['patterns'].values()]
+    if not q or not live:
+        return {}
+
+    idf = idf_weights(meta['df'], len(live))
+    weights = {index: value * idf[index] for index, value in q.items()}
+    query_norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    norms = meta['norms']
+    columns = sorted(weights)
+
+    mapping, view = open_matrix(root)
+    if view is None:
+        return {}
+
+    if NUMPY_AVAILABLE:
+        column_weights = np.asarray([weights[c] * idf[c] for c in columns], dtype=np.float32)
+        dots = view[:, columns] @ column_weights
+        norm_array = np.asarray(norms, dtype=np.float32)
+        scores = np.divide(dots, norm_array * query_norm, out=np.zeros_like(dots), where=norm_array > 0)
+        return {row: float(scores[row]) for row in live if scores[row] > 0}
+
+    scores = {}
+    for row in live:
+        if not norms[row]:
+            continue
+        offset = row * DIMENSIONS
+        dot = sum(view[offset + c] * weights[c] * idf[c] for c in columns)
+        if dot > 0:
+            scores[row] = dot / (norms[row] * query_norm)
+    view.release()
+    mapping.close()
+    return scores
+
+def find_patterns(query, limit=5, root=indexer.HAL_ROOT, refresh=True):
+    """
+    Best fabric patterns for a task description.
+
+    Args:
+        query: What the pattern should do (e.g. 'summarize a podcast')
+        limit: Number of results (top-k)
+        root: HAL root directory
+        refresh: Re-vectorize added/changed patterns before searching
+
+    Returns:
+        List of dicts: name, score, path, description
+    """
+    if refresh:
+        update_vectors(root)
+    meta = load_meta(root)
+    scores = score_rows(root, meta, query)
+
+    names = {entry['row']: name for name, entry in meta['patterns'].items()}
+    best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    results = []
+    for row, score in best:
+        name = names[row]
+        path = f"{FABRIC_DIR}{name}"
+        text = search.read_file(root, f"{path}/system.md") or ''
+        results.append({
+            'name': name,
+            'score': round(score, 4),
+            'path': path,
+            'description': indexer.first_sentence(purpose_section(text) or text),
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find the best fabric patterns for a task (offline semantic index)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Best patterns for a task:
+    %(prog)s "summarize a youtube video transcript"
+
+  Top 3 as JSON:
+    %(prog)s "review code for security issues" -k 3 --json
+
+  Rebuild the vectors from scratch:
+    %(prog)s --rebuild
+        """
+    )
+
+    parser.add_argument(
+        'query',
+        nargs='?',
+        help='Task description'
+    )
+
+    parser.add_argument(
+        '-k', '--limit',
+        type=int,
+        default=5,
+        help='Number of patterns (default: 5)'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print results as JSON'
+    )
+
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Discard the vectors and re-vectorize every pattern'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(indexer.HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    if not args.query and not args.rebuild:
+        parser.error('a query is required (or --rebuild)')
+
+    try:
+        if args.rebuild:
+            report = update_vectors(args.root, full=True)
+            print(f"[INFO] Vectorized {report['patterns']} patterns ({report['seconds'] * 1000:.1f} ms)",
+                  file=sys.stderr)
+            if not args.query:
+                return 0
+
+        started = time.perf_counter()
+        results = find_patterns(args.query, args.limit, args.root)
+        seconds = time.perf_counter() - started
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps({'query': args.query, 'seconds': round(seconds, 4), 'results': results}, indent=2))
+        return 0
+
+    if not results:
+        print(f"No matching patterns ({seconds * 1000:.1f} ms)")
+        return 0
+    for rank, result in enumerate(results, 1):
+        print(f"{rank}. {result['name']}  (score {result['score']:.3f})")
+        print(f"   {result['description']}")
+    print(f"\nUse: /HAL-use-fabric {results[0]['name']} <target_file>  ({seconds * 1000:.1f} ms)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,892 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Incremental Indexer
+
+Executable form of /HAL-index-update. Keeps indexes/master.json, the
+per-directory indexes (architecture.json, sessions.json, ...) and
+libraries/index.json in step with the file system.
+
+Per-file mtime, size, sha256 and token estimate are kept in a state file
+(indexes/.indexer-state.json). A run stats every monitored file, re-reads
+only files whose mtime or size changed, and rewrites only the index files
+whose content actually changes. Curated metadata (type, category, topics,
+summary) is preserved; new files get metadata extracted from frontmatter,
+headings and file names. Markdown and HTML files are also split into
+heading chunks with byte offsets (chunks.py), one chunk index per directory.
+
+Usage:
+    python3 .hal8000/tools/indexer/indexer.py                  # update everything
+    python3 .hal8000/tools/indexer/indexer.py data/research    # one directory
+    python3 .hal8000/tools/indexer/indexer.py --dry-run        # report changes only
+    python3 .hal8000/tools/indexer/indexer.py --full           # ignore saved state
+    python3 .hal8000/tools/indexer/indexer.py watch            # keep indexes fresh (watcher.py)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import chunks
+import tokens
+
+# HAL root: .hal8000/tools/indexer/indexer.py -> three levels up
+HAL_ROOT = Path(__file__).resolve().parents[3]
+
+INDEXES_DIR = '.hal8000/indexes'
+MASTER_INDEX = f'{INDEXES_DIR}/master.json'
+STATE_FILE = f'{INDEXES_DIR}/.indexer-state.json'
+STATE_VERSION = 1
+
+# Index entries written before the universal kernel migration use the
+# Claude adapter prefix; the files themselves live under .hal8000/
+LEGACY_PREFIX = '.claude/'
+KERNEL_PREFIX = '.hal8000/'
+
+# File types worth indexing (binary assets are skipped)
+TEXT_EXTENSIONS = {'.md', '.html', '.json', '.txt', '.py', '.sh', '.js', '.mjs',
+                   '.yaml', '.yml', '.toml', '.mmd', '.puml'}
+
+# Monitored directories -> index file, default type, exclusions, index format
+DIRECTORIES = {
+    'data/research/': {'index': 'research.json', 'type': 'research'},
+    'data/architecture/': {'index': 'architecture.json', 'type': 'architecture-spec'},
+    'data/reference-manual/': {'index': 'reference-manual.json', 'type': 'reference-manual'},
+    'data/operations/': {'index': 'operations.json', 'type': 'operations'},
+    '.hal8000/commands/': {'index': 'commands.json', 'type': 'command'},
+    '.hal8000/agents/': {'index': 'agents.json', 'type': 'agent'},
+    '.hal8000/sessions/': {'index': 'sessions.json', 'type': 'session', 'format': 'sessions',
+                           'exclude': ['archive/']},
+    '.hal8000/skills/': {'index': 'skills.json', 'type': 'skill'},
+    '.hal8000/tools/': {'index': 'tools.json', 'type': 'tool',
+                        'exclude': ['diagram-generation/temp/', 'diagram-generation/project-archive/']},
+}
+
+# Library index (flat list format, see HAL-index-update Step 7)
+LIBRARY_INDEX = '.hal8000/libraries/index.json'
+LIBRARY_SOURCES = {
+    'internal': {'path': '.hal8000/libraries/internal/', 'pattern': '*.md'},
+    'external:fabric-patterns': {'path': '.hal8000/libraries/external/fabric-patterns/',
+                                 'pattern': 'system.md'},
+}
+
+# Watch-mode key for "something under a library source changed"
+LIBRARIES_TARGET = 'libraries'
+
+# Fabric pattern name prefix -> library category
+PATTERN_CATEGORIES = {
+    'analyze': 'analysis', 'create': 'creation', 'extract': 'extraction',
+    'summarize': 'summarization', 'write': 'writing', 'improve': 'improvement',
+    'explain': 'explanation', 'rate': 'rating', 'find': 'discovery',
+    'convert': 'conversion', 'label': 'classification', 'check': 'validation'
+}
+
+# Sessions index keeps a short recent list; the full list is the directory
+RECENT_SESSIONS = 5
+
+STOPWORDS = {'the', 'and', 'for', 'with', 'from', 'into', 'md', 'json', 'txt', 'hal',
+             'hal8000', 'assistant', 'readme', 'of', 'to', 'in', 'on', 'a', 'an', 'v2', 'v3'}
+
+def now_iso():
+    """Current UTC time in the index timestamp format"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def canonical_path(path):
+    """Map legacy .claude/ index keys onto the .hal8000/ kernel paths"""
+    if path.startswith(LEGACY_PREFIX):
+        return KERNEL_PREFIX + path[len(LEGACY_PREFIX):]
+    return path
+
+def dumps_index(data):
+    """
+    Serialise an index the way the hand-maintained files are laid out:
+    two-space indentation, lists of scalars kept on one line.
+    """
+    def encode(value, depth):
+        pad = '  ' * (depth + 1)
+        end = '  ' * depth
+        if isinstance(value, dict):
+            if not value:
+                return '{}'
+            items = [f'{pad}{json.dumps(k, ensure_ascii=False)}: {encode(v, depth + 1)}'
+                     for k, v in value.items()]
+            return '{\n' + ',\n'.join(items) + '\n' + end + '}'
+        if isinstance(value, list):
+            if not value:
+                return '[]'
+            if all(not isinstance(v, (dict, list)) for v in value):
+                return '[' + ', '.join(json.dumps(v, ensure_ascii=False) for v in value) + ']'
+            return '[\n' + ',\n'.join(pad + encode(v, depth + 1) for v in value) + '\n' + end + ']'
+        return json.dumps(value, ensure_ascii=False)
+
+    return encode(data, 0) + '\n'
+
+def read_json(path):
+    """Load a JSON file, or None if it does not exist"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def write_if_changed(path, text, dry_run=False):
+    """
+    Atomically replace path with text unless it already holds exactly that.
+
+    Returns:
+        True if the file was (or, in dry-run mode, would be) rewritten
+    """
+    path = Path(path)
+    try:
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except FileNotFoundError:
+        pass
+    if not dry_run:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, path)
+    return True
+
+# ---------------------------------------------------------------------------
+# Scanning and change detection
+# ---------------------------------------------------------------------------
+
+def scan_directory(root, directory, exclude=(), pattern=None):
+    """
+    Stat every indexable file under root/directory.
+
+    Args:
+        root: HAL root
+        directory: Relative directory with trailing slash
+        exclude: Relative sub-paths (trailing slash) to skip
+        pattern: Optional fnmatch pattern on the file name
+
+    Returns:
+        Dict of relative path -> (mtime_ns, size)
+    """
+    import fnmatch
+
+    found = {}
+    base = Path(root) / directory
+    if not base.is_dir():
+        return found
+
+    stack = [(str(base), directory)]
+    while stack:
+        absolute, relative = stack.pop()
+        try:
+            entries = os.scandir(absolute)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.') or entry.name == '__pycache__':
+                    continue
+                rel = relative + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    sub = rel + '/'
+                    if not any(sub[len(directory):].startswith(e) for e in exclude):
+                        stack.append((entry.path, sub))
+                elif entry.is_file():
+                    if pattern:
+                        if not fnmatch.fnmatch(entry.name, pattern):
+                            continue
+                    elif os.path.splitext(entry.name)[1].lower() not in TEXT_EXTENSIONS:
+                        continue
+                    stat = entry.stat()
+                    found[rel] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+def read_text(root, rel):
+    """Read a file as text (undecodable bytes replaced) and its sha256"""
+    data = (Path(root) / rel).read_bytes()
+    return data.decode('utf-8', errors='replace'), hashlib.sha256(data).hexdigest()
+
+def diff_files(root, scanned, known, token_cache):
+    """
+    Compare a scan against the saved state.
+
+    Files whose mtime/size changed are re-hashed; a touch without a content
+    change only refreshes the saved stat. Token counts come from the shared
+    counter (tokens.py), cached by content hash.
+
+    Returns:
+        (records, added, modified, deleted, texts): new state records for
+        every scanned file, changed path sets, and the text of every file
+        that was read (reused for metadata extraction)
+    """
+    records = {}
+    added, modified = set(), set()
+    texts = {}
+
+    for rel, (mtime_ns, size) in scanned.items():
+        previous = known.get(rel)
+        if previous and previous['mtime_ns'] == mtime_ns and previous['size'] == size:
+            records[rel] = previous
+            continue
+        text, digest = read_text(root, rel)
+        texts[rel] = text
+        records[rel] = {'mtime_ns': mtime_ns, 'size': size, 'sha256': digest,
+                        'tokens': token_cache.count(text, digest)}
+        if not previous:
+            added.add(rel)
+        elif previous['sha256'] != digest:
+            modified.add(rel)
+
+    deleted = set(known) - set(scanned)
+    return records, added, modified, deleted, texts
+
+# ---------------------------------------------------------------------------
+# Metadata extraction for files without curated entries
+# ---------------------------------------------------------------------------
+
+def parse_frontmatter(text):
+    """Top-level keys of a YAML frontmatter block (scalars and simple lists)"""
+    if not text.startswith('---'):
+        return {}
+    end = text.find('\n---', 3)
+    if end == -1:
+        return {}
+
+    meta = {}
+    key = None
+    for line in text[3:end].splitlines():
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        item = re.match(r'^\s+-\s+(.*)$', line)
+        if item and key:
+            if not isinstance(meta.get(key), list):
+                meta[key] = []
+            meta[key].append(item.group(1).strip().strip('"\''))
+            continue
+        pair = re.match(r'^([A-Za-z_][\w-]*):\s*(.*)$', line)
+        if not pair:
+            continue
+        key, value = pair.group(1), pair.group(2).strip()
+        if value.startswith('[') and value.endswith(']'):
+            meta[key] = [v.strip().strip('"\'') for v in value[1:-1].split(',') if v.strip()]
+        else:
+            meta[key] = value.strip('"\'')
+    return meta
+
+def first_heading(text, level=1):
+    """Text of the first heading of the given level"""
+    match = re.search(rf'^{"#" * level}\s+(.+)$', text, re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+def first_sentence(text, limit=200):
+    """
+    First sentence of the first prose paragraph.
+
+    Skips frontmatter, headings, lists, tables and code; a **Purpose:**
+    line is used when present. Falls back to the first heading.
+    """
+    body = text
+    if body.startswith('---'):
+        end = body.find('\n---', 3)
+        body = body[end + 4:] if end != -1 else body
+
+    purpose = re.search(r'^\*\*(?:Purpose|Description):\*\*\s*(.+)$', body, re.MULTILINE)
+    if purpose:
+        return purpose.group(1).strip()[:limit]
+
+    in_code = False
+    for line in body.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            in_code = not in_code
+            continue
+        if (in_code or not stripped or stripped.startswith(('#', '|', '-', '*', '>', '<', '{', '['))
+                or re.match(r'^\d+\.', stripped) or len(re.findall(r'[A-Za-z]', stripped)) < 3):
+            continue
+        sentence = re.split(r'(?<=[.!?])\s', stripped, maxsplit=1)[0]
+        return sentence[:limit]
+    return first_heading(body) or ''
+
+def code_summary(text, limit=200):
+    """First line of a script's module docstring or leading comment block"""
+    docstring = re.match(r'^(?:#![^\n]*\n)?(?:\s*#[^\n]*\n)*\s*(?:\"\"\"|\'\'\')\s*(.*?)(?:\"\"\"|\'\'\')',
+                         text, re.DOTALL)
+    if docstring:
+        for line in docstring.group(1).splitlines():
+            if line.strip():
+                return line.strip()[:limit]
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('#!'):
+            continue
+        if stripped.startswith(('#', '//')):
+            comment = stripped.lstrip('#/ ').strip()
+            if len(re.findall(r'[A-Za-z]', comment)) >= 3:
+                return comment[:limit]
+        elif stripped:
+            break
+    return ''
+
+def name_topics(rel, limit=6):
+    """Keywords from a file name (dates, numbers and stopwords dropped)"""
+    stem = os.path.splitext(os.path.basename(rel))[0]
+    words = [w.lower() for w in re.split(r'[-_.\s]+', stem)]
+    topics = []
+    for word in words:
+        if len(word) < 2 or word.isdigit() or word in STOPWORDS or word in topics:
+            continue
+        topics.append(word)
+    return topics[:limit]
+
+def extract_metadata(rel, text, directory, config):
+    """
+    Metadata for a file that has no curated index entry.
+
+    Returns:
+        Entry dict in the per-directory index format
+    """
+    meta = parse_frontmatter(text) if rel.endswith('.md') else {}
+    relative = rel[len(directory):]
+    parts = relative.split('/')
+
+    topics = meta.get('keywords') or meta.get('topics') or meta.get('tags') or name_topics(rel)
+    if isinstance(topics, str):
+        topics = [t.strip() for t in topics.split(',') if t.strip()]
+
+    extension = os.path.splitext(rel)[1]
+    if extension in ('.py', '.sh', '.js', '.mjs'):
+        summary = code_summary(text)
+    elif extension in ('.json', '.yaml', '.yml', '.toml'):
+        summary = f"{os.path.basename(rel)} data file."
+    elif extension == '.html':
+        title = re.search(r'<title[^>]*>(.*?)</title>', text, re.IGNORECASE | re.DOTALL)
+        summary = ' '.join(title.group(1).split()) if title else f"{os.path.basename(rel)} page."
+    else:
+        summary = meta.get('description') or first_sentence(text)
+
+    if not topics:
+        topics = name_topics(os.path.dirname(rel))
+
+    return {
+        'type': config['type'],
+        'category': meta.get('category') or (parts[0] if len(parts) > 1 else config['type']),
+        'topics': list(topics)[:8],
+        'summary': summary,
+        'size_estimate_tokens': 0
+    }
+
+def session_entry(rel, text):
+    """recent_sessions entry for a session file"""
+    name = os.path.basename(rel)
+    date = name[:10] if re.match(r'\d{4}-\d{2}-\d{2}', name) else ''
+    # Session names are YYYY-MM-DD-HHMM-topic-words.md
+    topics = name_topics(re.sub(r'^\d{4}-\d{2}-\d{2}-\d{4}-', '', name), limit=4)
+    return {
+        'path': rel,
+        'date': date,
+        'topics': topics,
+        'summary': first_sentence(text) or ' '.join(topics).capitalize() + '.'
+    }
+
+def library_entry(rel, text, source):
+    """Library index entry (frontmatter for internal, content scan for external)"""
+    meta = parse_frontmatter(text)
+    if meta:
+        keywords = meta.get('keywords') or meta.get('tags') or []
+        if isinstance(keywords, str):
+            keywords = [k.strip() for k in keywords.split(',') if k.strip()]
+        return {
+            'path': rel,
+            'source': source,
+            'title': meta.get('title') or first_heading(text) or name_topics(rel)[0],
+            'description': meta.get('description') or first_sentence(text),
+            'keywords': keywords,
+            'category': meta.get('category', 'general'),
+            'metadata_source': 'frontmatter',
+            'size_estimate_tokens': 0
+        }
+
+    if source == 'internal':
+        category = rel.split('/')[3] if rel.count('/') > 3 else 'general'
+    else:
+        pattern = rel.rstrip('/').split('/')[-2]
+        category = PATTERN_CATEGORIES.get(pattern.split('_')[0], 'general')
+
+    keywords = []
+    for heading in re.findall(r'^#{1,3}\s+(.+)$', text, re.MULTILINE):
+        for word in re.findall(r'[a-z][a-z0-9-]+', heading.lower()):
+            if word not in keywords:
+                keywords.append(word)
+    for word in re.split(r'[_/-]', rel.split('/')[-2].lower()):
+        if len(word) > 1 and word not in keywords:
+            keywords.append(word)
+
+    return {
+        'path': rel,
+        'source': source,
+        'title': first_heading(text) or rel.split('/')[-2],
+        'description': first_sentence(text),
+        'keywords': keywords[:8],
+        'category': category,
+        'metadata_source': 'content-scan',
+        'size_estimate_tokens': 0
+    }
+
+# ---------------------------------------------------------------------------
+# Index updates
+# ---------------------------------------------------------------------------
+
+def top_topics(entries, limit=6):
+    """Most frequent topics across index entries"""
+    counts = Counter(topic for entry in entries for topic in entry.get('topics', []))
+    return [topic for topic, _ in counts.most_common(limit)]
+
+def update_directory_index(root, directory, config, records, texts, dry_run=False):
+    """
+    Bring one per-directory index in line with the scanned files.
+
+    Existing entries keep their curated metadata (only the token estimate
+    is refreshed); new files get extracted metadata; entries for files
+    that no longer exist are dropped.
+
+    Returns:
+        (rewritten, file_count, total_tokens, primary_topics)
+    """
+    index_path = Path(root) / INDEXES_DIR / config['index']
+    index = read_json(index_path) or {
+        'version': '2.0-hierarchical',
+        'directory': directory,
+        'last_updated': now_iso(),
+        'files': {},
+        'statistics': {}
+    }
+
+    def text_of(rel):
+        if rel not in texts:
+            texts[rel] = read_text(root, rel)[0]
+        return texts[rel]
+
+    total_tokens = sum(r['tokens'] for r in records.values())
+
+    if config.get('format') == 'sessions':
+        recent = [dict(e, path=canonical_path(e['path'])) for e in index.get('recent_sessions', [])]
+        known = {e['path']: e for e in recent if e['path'] in records}
+        newest = sorted(records, reverse=True)[:RECENT_SESSIONS]
+        index['recent_sessions'] = [known.get(rel) or session_entry(rel, text_of(rel)) for rel in newest]
+        entries = index['recent_sessions']
+
+        dates = sorted(os.path.basename(rel)[:10] for rel in records
+                       if re.match(r'\d{4}-\d{2}-\d{2}', os.path.basename(rel)))
+        statistics = index.setdefault('statistics', {})
+        statistics['total_files'] = len(records)
+        statistics['total_tokens_estimate'] = total_tokens
+        if dates:
+            statistics['date_range'] = f"{dates[0]} to {dates[-1]}"
+    else:
+        existing = {canonical_path(k): v for k, v in index.get('files', {}).items()}
+        files = {}
+        for rel in sorted(records, key=lambda p: (p not in existing, p)):
+            entry = existing.get(rel) or extract_metadata(rel, text_of(rel), directory, config)
+            entry['size_estimate_tokens'] = records[rel]['tokens']
+            files[rel] = entry
+        index['files'] = files
+        entries = list(files.values())
+
+        statistics = index.setdefault('statistics', {})
+        statistics['total_files'] = len(files)
+        statistics['total_tokens_estimate'] = total_tokens
+        statistics['categories'] = dict(Counter(e.get('category', 'general') for e in entries))
+
+    index['directory'] = directory
+
+    # Only bump the timestamp when something besides it changes
+    if read_json(index_path) != index:
+        index['last_updated'] = now_iso()
+
+    rewritten = write_if_changed(index_path, dumps_index(index), dry_run)
+    return rewritten, len(records), total_tokens, top_topics(entries)
+
+def update_library_index(root, records_by_source, texts, dry_run=False):
+    """
+    Bring libraries/index.json in line with the scanned library files.
+
+    Returns:
+        (rewritten, internal_count, external_count)
+    """
+    index_path = Path(root) / LIBRARY_INDEX
+    index = read_json(index_path) or {'version': '1.0', 'libraries': [], 'sources': {}, 'statistics': {}}
+    original = json.dumps(index, sort_keys=True)
+
+    existing = {canonical_path(e['path']): e for e in index.get('libraries', [])}
+    libraries = []
+    sources = index.get('sources', {})
+    for source, records in records_by_source.items():
+        for rel in sorted(records):
+            entry = existing.get(rel)
+            if not entry:
+                if rel not in texts:
+                    texts[rel] = read_text(root, rel)[0]
+                entry = library_entry(rel, texts[rel], source)
+            entry['path'] = rel
+            entry['size_estimate_tokens'] = records[rel]['tokens']
+            libraries.append(entry)
+        source_info = sources.setdefault(source, {})
+        if source_info.get('file_count') != len(records) and source != 'internal':
+            source_info['last_updated'] = now_iso()
+        source_info['file_count'] = len(records)
+
+    internal = sum(1 for e in libraries if e['source'] == 'internal')
+    index['libraries'] = libraries
+    index['sources'] = sources
+    index['statistics'] = {
+        'total_libraries': len(libraries),
+        'total_estimated_tokens': sum(e['size_estimate_tokens'] for e in libraries),
+        'by_source': {'internal': internal, 'external': len(libraries) - internal}
+    }
+    if json.dumps(index, sort_keys=True) != original:
+        index['last_updated'] = now_iso()
+
+    text = json.dumps(index, indent=2, ensure_ascii=False) + '\n'
+    rewritten = write_if_changed(index_path, text, dry_run)
+    if rewritten and not dry_run:
+        import libindex
+        libindex.write_binary(root)
+    return rewritten, internal, len(libraries) - internal
+
+def stale_directories(root, master):
+    """
+    master.json directory entries the indexer does not manage whose
+    directory no longer exists.
+
+    Returns:
+        Dict of canonical directory -> its canonical index_file (or None)
+    """
+    stale = {}
+    for key, entry in ((master or {}).get('directories') or {}).items():
+        directory = canonical_path(key)
+        if directory not in DIRECTORIES and not (Path(root) / directory).is_dir():
+            index_file = entry.get('index_file') if isinstance(entry, dict) else None
+            stale[directory] = canonical_path(index_file) if index_file else None
+    return stale
+
+def remove_stale_indexes(root, stale, dry_run=False):
+    """
+    Delete the index files of removed master.json entries, unless another
+    entry or a monitored directory still uses them.
+
+    Returns:
+        Relative paths of the index files removed (or, in dry-run mode, to remove)
+    """
+    master = read_json(Path(root) / MASTER_INDEX) or {}
+    in_use = {canonical_path(entry.get('index_file', '')) for key, entry in master.get('directories', {}).items()
+              if isinstance(entry, dict) and canonical_path(key) not in stale}
+    in_use |= {f"{INDEXES_DIR}/{config['index']}" for config in DIRECTORIES.values()}
+    removed = []
+    for index_file in stale.values():
+        if (not index_file or not index_file.startswith(f"{INDEXES_DIR}/") or index_file in in_use
+                or not (Path(root) / index_file).is_file()):
+            continue
+        if not dry_run:
+            (Path(root) / index_file).unlink()
+        removed.append(index_file)
+    return removed
+
+def update_master(root, directory_results, library_result, dry_run=False):
+    """
+    Refresh master.json entries for the directories that changed.
+
+    Legacy .claude/ keys are migrated to .hal8000/ in place (same order).
+    Entries for directories the indexer does not manage are left untouched
+    while the directory exists, and dropped once it is gone.
+
+    Returns:
+        True if master.json was rewritten
+    """
+    master_path = Path(root) / MASTER_INDEX
+    master = read_json(master_path) or {'version': '2.0-hierarchical', 'directories': {}, 'statistics': {}}
+    stamp = now_iso()
+    stale = stale_directories(root, master)
+
+    directories = {}
+    for key, entry in master.get('directories', {}).items():
+        if canonical_path(key) in stale:
+            continue
+        entry = dict(entry)
+        if 'index_file' in entry:
+            entry['index_file'] = canonical_path(entry['index_file'])
+        directories[canonical_path(key)] = entry
+
+    for directory, (file_count, token_total, topics) in directory_results.items():
+        entry = directories.setdefault(directory, {
+            'index_file': f"{INDEXES_DIR}/{DIRECTORIES[directory]['index']}",
+            'primary_topics': topics
+        })
+        entry['file_count'] = file_count
+        entry['total_tokens_estimate'] = token_total
+        entry.setdefault('primary_topics', topics)
+        entry['last_indexed'] = stamp
+    master['directories'] = directories
+
+    libraries = master.setdefault('libraries', {})
+    if 'index_file' in libraries:
+        libraries['index_file'] = canonical_path(libraries['index_file'])
+    if library_result:
+        internal, external = library_result
+        libraries['index_file'] = LIBRARY_INDEX
+        libraries['internal_count'] = internal
+        libraries['external_count'] = external
+        libraries['total_libraries'] = internal + external
+        libraries['last_indexed'] = stamp
+
+    statistics = master.setdefault('statistics', {})
+    statistics['total_directories'] = len(directories)
+    statistics['total_files'] = sum(d.get('file_count', 0) for d in directories.values())
+    statistics['total_estimated_tokens'] = sum(d.get('total_tokens_estimate', 0)
+                                               for d in directories.values())
+    if 'total_libraries' in libraries:
+        statistics['libraries_total'] = libraries['total_libraries']
+
+    master['last_updated'] = stamp
+    return write_if_changed(master_path, dumps_index(master), dry_run)
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def load_state(root):
+    """Saved per-file state, or an empty state if missing or from another version"""
+    state = read_json(Path(root) / STATE_FILE)
+    if (not state or state.get('version') != STATE_VERSION
+            or state.get('token_method') != tokens.METHOD):
+        return {'version': STATE_VERSION, 'token_method': tokens.METHOD, 'directories': {}}
+    return state
+
+def save_state(root, state):
+    """Write the state file (compact; it is machine-only)"""
+    path = Path(root) / STATE_FILE
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def monitored_target(rel):
+    """
+    Which index a relative path feeds.
+
+    Returns:
+        A DIRECTORIES key, LIBRARIES_TARGET, or None if the path is not monitored
+    """
+    rel = canonical_path(rel)
+    for directory, config in DIRECTORIES.items():
+        if rel.startswith(directory) or rel + '/' == directory:
+            inner = rel[len(directory):]
+            if any(inner.startswith(e) for e in config.get('exclude', ())):
+                return None
+            return directory
+    if any(rel.startswith(c['path']) or rel + '/' == c['path'] for c in LIBRARY_SOURCES.values()):
+        return LIBRARIES_TARGET
+    return None
+
+def update_chunks(root, directory, config, records, report, dry_run=False):
+    """Refresh a directory's section chunk index (chunks.py) and record the rewrite"""
+    rewritten, _ = chunks.update_chunk_index(root, directory, config, records, dry_run)
+    if rewritten:
+        path = chunks.chunk_index_path(root, config)
+        report['rewritten'].append(f"{INDEXES_DIR}/{path.name}")
+
+def update_indexes(root=HAL_ROOT, only=None, full=False, dry_run=False, targets=None):
+    """
+    Incrementally update every monitored index.
+
+    Args:
+        root: HAL root directory
+        only: Restrict to directories under this relative path (e.g. 'data/research')
+        full: Ignore saved state and re-read every file
+        dry_run: Report what would change without writing anything
+        targets: Restrict to these monitored_target() keys (used by watch mode)
+
+    Returns:
+        Report dict (changed files per directory, rewritten index files, timings)
+    """
+    started = time.perf_counter()
+    root = Path(root)
+    state = ({'version': STATE_VERSION, 'token_method': tokens.METHOD, 'directories': {}}
+             if full else load_state(root))
+    new_state = {'version': STATE_VERSION, 'token_method': tokens.METHOD,
+                 'directories': dict(state['directories'])}
+    token_cache = tokens.TokenCache(root)
+    only = canonical_path(only.rstrip('/') + '/') if only else None
+
+    report = {'directories': {}, 'rewritten': [], 'removed': {}, 'files_read': 0}
+    directory_results = {}
+
+    for directory, config in DIRECTORIES.items():
+        if only and not (directory.startswith(only) or only.startswith(directory)):
+            continue
+        if targets is not None and directory not in targets:
+            continue
+        known = state['directories'].get(directory)
+        scanned = scan_directory(root, directory, config.get('exclude', ()))
+        records, added, modified, deleted, texts = diff_files(root, scanned, known or {}, token_cache)
+        report['files_read'] += len(texts)
+        new_state['directories'][directory] = records
+
+        if known is not None and not (added or modified or deleted):
+            if not chunks.chunk_index_path(root, config).exists():
+                update_chunks(root, directory, config, records, report, dry_run)
+            continue
+
+        report['directories'][directory] = {
+            'added': sorted(added), 'modified': sorted(modified), 'deleted': sorted(deleted)
+        }
+        rewritten, file_count, token_total, topics = update_directory_index(
+            root, directory, config, records, texts, dry_run
+        )
+        if rewritten:
+            report['rewritten'].append(f"{INDEXES_DIR}/{config['index']}")
+        directory_results[directory] = (file_count, token_total, topics)
+        update_chunks(root, directory, config, records, report, dry_run)
+
+    library_result = None
+    scan_libraries = not only or LIBRARY_INDEX.startswith(only) or only.startswith('.hal8000/libraries/')
+    if targets is not None:
+        scan_libraries = LIBRARIES_TARGET in targets
+    if scan_libraries:
+        records_by_source = {}
+        library_texts = {}
+        library_changed = False
+        for source, config in LIBRARY_SOURCES.items():
+            key = f"library:{source}"
+            known = state['directories'].get(key)
+            scanned = scan_directory(root, config['path'], pattern=config['pattern'])
+            records, added, modified, deleted, texts = diff_files(root, scanned, known or {}, token_cache)
+            report['files_read'] += len(texts)
+            library_texts.update(texts)
+            records_by_source[source] = records
+            new_state['directories'][key] = records
+            if known is None or added or modified or deleted:
+                library_changed = True
+                report['directories'][key] = {
+                    'added': sorted(added), 'modified': sorted(modified), 'deleted': sorted(deleted)
+                }
+        if library_changed:
+            rewritten, internal, external = update_library_index(root, records_by_source,
+                                                                 library_texts, dry_run)
+            if rewritten:
+                report['rewritten'].append(LIBRARY_INDEX)
+            library_result = (internal, external)
+
+    stale = stale_directories(root, read_json(root / MASTER_INDEX)) if not only and targets is None else {}
+    if directory_results or library_result or stale:
+        if update_master(root, directory_results, library_result, dry_run):
+            report['rewritten'].append(MASTER_INDEX)
+    if stale:
+        removed = remove_stale_indexes(root, stale, dry_run)
+        report['removed'] = {directory: index_file if index_file in removed else None
+                             for directory, index_file in stale.items()}
+
+    if not dry_run and new_state != state:
+        save_state(root, new_state)
+        token_cache.save()
+
+    report['seconds'] = round(time.perf_counter() - started, 4)
+    return report
+
+def print_report(report, dry_run=False):
+    """Human-readable summary in the HAL-index-update format"""
+    prefix = "Would update" if dry_run else "Hierarchical index updated"
+    changed = report['directories']
+    removed = report.get('removed') or {}
+    if not changed and not removed:
+        print(f"Indexes up to date ({report['seconds'] * 1000:.1f} ms)")
+        return
+
+    print(prefix)
+    for directory, diff in changed.items():
+        counts = ', '.join(f"{len(diff[k])} {k}" for k in ('added', 'modified', 'deleted') if diff[k])
+        print(f"- {directory}: {counts or 'index refreshed'}")
+    for directory, index_file in removed.items():
+        print(f"- {directory}: directory no longer exists, "
+              f"{'entry and ' + index_file if index_file else 'entry'} {'to remove' if dry_run else 'removed'}")
+    print(f"- Files read: {report['files_read']}")
+    print(f"- Index files {'to rewrite' if dry_run else 'rewritten'}: "
+          f"{', '.join(report['rewritten']) or 'none'}")
+    print(f"- Time: {report['seconds'] * 1000:.1f} ms")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'watch':
+        import watcher
+        return watcher.main(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(
+        description='HAL8000-Assistant incremental indexer (master + per-directory + library indexes)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Update everything that changed:
+    %(prog)s
+
+  Only one directory:
+    %(prog)s data/research
+
+  Show what would change:
+    %(prog)s --dry-run
+
+  Rebuild from scratch (re-read every file, keep curated metadata):
+    %(prog)s --full
+
+  Keep indexes fresh as files change (inotify, polling fallback):
+    %(prog)s watch
+        """
+    )
+
+    parser.add_argument(
+        'path',
+        nargs='?',
+        help='Directory to index (default: all monitored directories)'
+    )
+
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Ignore saved state and re-read every file'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Report changes without writing indexes or state'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the report as JSON'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        report = update_indexes(args.root, only=args.path, full=args.full, dry_run=args.dry_run)
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.dry_run)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Integrity Checker
+
+Programmatic engine behind /HAL-system-check. Runs the mechanical audit
+checks in parallel worker threads and emits a compact report, so the
+system-maintenance agent only reads findings instead of every index:
+
+- index_paths: every path referenced by an index exists
+- file_counts: master.json and directory index counts match the disk
+- state: state.json parses; active sessions, loaded commands and registry
+  paths exist
+- frontmatter: command and agent frontmatter parses and names the file
+- depth: no directory is nested deeper than the depth limit
+- structure: required system files and directories exist
+
+Usage:
+    python3 .hal8000/tools/indexer/integrity.py           # summary + findings
+    python3 .hal8000/tools/indexer/integrity.py --json    # machine-readable report
+    python3 .hal8000/tools/indexer/integrity.py --check state --check depth
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import indexer
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+HAL_ROOT = indexer.HAL_ROOT
+
+STATE_FILE = '.hal8000/config/state.json'
+INDEX_FILES = ['.hal8000/indexes/*.json', '.hal8000/libraries/index.json']
+
+# JSON keys whose string values are repository paths
+PATH_KEYS = {'path', 'index_file', 'latest_session'}
+
+REQUIRED_PATHS = [
+    '.hal8000/BIOS.md', STATE_FILE, indexer.MASTER_INDEX, '.hal8000/commands/',
+    '.hal8000/agents/', '.hal8000/sessions/', '.hal8000/indexes/', 'data/',
+    'data/research/', 'data/architecture/',
+]
+
+COMMAND_GLOB = '.hal8000/commands/**/HAL-*.md'
+AGENT_GLOB = '.hal8000/agents/*.md'
+FRONTMATTER_KEYS = ('name', 'description')
+
+# Directory depth below a base directory (Unix simplicity rule in BIOS.md)
+MAX_DEPTH = 3
+DEPTH_BASES = ['.hal8000/', 'data/']
+DEPTH_EXEMPT = ['.hal8000/libraries/external/']
+SKIP_DIRS = {'.git', '__pycache__', 'node_modules', '.venv', 'venv'}
+
+WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+# Suggested remedy per check, included in the report when the check has findings
+REMEDIES = {
+    'index_paths': 'python3 .hal8000/tools/indexer/indexer.py --full',
+    'file_counts': 'python3 .hal8000/tools/indexer/indexer.py --full',
+    'state': 'fix pointers in .hal8000/config/state.json (or run /HAL-session-end)',
+    'frontmatter': 'add or repair the --- name/description --- block',
+    'depth': 'flatten the directory (BIOS: max 3 levels)',
+    'structure': 'restore the missing system path',
+}
+
+def finding(check, severity, path, message):
+    """One report entry (severity: 'error' or 'warning')"""
+    return {'check': check, 'severity': severity, 'path': path, 'message': message}
+
+def load_json(root, rel):
+    """(data, error message): parsed JSON file or why it could not be read"""
+    try:
+        return json.loads((Path(root) / rel).read_text(encoding='utf-8')), None
+    except OSError as e:
+        return None, f"cannot read: {e.strerror}"
+    except ValueError as e:
+        return None, f"invalid JSON: {e}"
+
+def repo_path(value):
+    """Index path value as a root-relative kernel path (anchors and absolute roots removed)"""
+    value = value.split('#', 1)[0]
+    marker = value.find('/.claude/') if value.startswith('/') else -1
+    if marker == -1 and value.startswith('/'):
+        marker = value.find('/.hal8000/')
+    if marker != -1:
+        value = value[marker + 1:]
+    return indexer.canonical_path(value)
+
+# ---------------------------------------------------------------------------
+# Checks (each returns a list of findings; units run in parallel)
+# ---------------------------------------------------------------------------
+
+def index_files(root):
+    """Index JSON files to validate (machine-only dotfiles excluded)"""
+    files = []
+    for pattern in INDEX_FILES:
+        files.extend(str(p.relative_to(root)) for p in sorted(Path(root).glob(pattern))
+                     if not p.name.startswith('.'))
+    return files
+
+def referenced_paths(data):
+    """Every path an index references: PATH_KEYS values and 'files' mapping keys"""
+    found = set()
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in PATH_KEYS and isinstance(value, str) and value:
+                    found.add(value)
+                elif key == 'files' and isinstance(value, dict):
+                    found.update(value)
+                if isinstance(value, (dict, list)):
+                    stack.append(value)
+        elif isinstance(node, list):
+            stack.extend(node)
+    return found
+
+def check_index_paths(root, rel):
+    """Every path referenced by one index file exists"""
+    data, error = load_json(root, rel)
+    if error:
+        return [finding('index_paths', 'error', rel, error)], 1
+    paths = referenced_paths(data)
+    missing = sorted(p for p in paths if not (Path(root) / repo_path(p)).exists())
+    return [finding('index_paths', 'error', rel, f"references missing path {p}") for p in missing], len(paths)
+
+def check_file_counts(root, directory, config, master):
+    """master.json and the directory index agree with the files on disk"""
+    findings = []
+    on_disk = len(indexer.scan_directory(root, directory, config.get('exclude', ())))
+    index_rel = f"{indexer.INDEXES_DIR}/{config['index']}"
+
+    entry = None
+    for key, value in (master.get('directories') or {}).items():
+        if indexer.canonical_path(key) == directory:
+            entry = value
+    if entry is None:
+        findings.append(finding('file_counts', 'warning', indexer.MASTER_INDEX,
+                                f"{directory} is monitored but not listed"))
+    elif entry.get('file_count') != on_disk:
+        findings.append(finding('file_counts', 'warning', indexer.MASTER_INDEX,
+                                f"{directory} file_count {entry.get('file_count')}, disk {on_disk}"))
+
+    index, error = load_json(root, index_rel)
+    if error:
+        findings.append(finding('file_counts', 'error', index_rel, error))
+    else:
+        counted = (index.get('statistics') or {}).get('total_files')
+        if counted is not None and counted != on_disk:
+            findings.append(finding('file_counts', 'warning', index_rel,
+                                    f"total_files {counted}, disk {on_disk}"))
+    return findings, 1
+
+def check_master_directories(root, master):
+    """Directories listed in master.json exist"""
+    findings = []
+    listed = master.get('directories') or {}
+    for directory in listed:
+        if not (Path(root) / indexer.canonical_path(directory)).is_dir():
+            findings.append(finding('file_counts', 'warning', indexer.MASTER_INDEX,
+                                    f"listed directory {directory} does not exist"))
+    return findings, len(listed)
+
+def check_state(root):
+    """state.json parses and its pointers resolve"""
+    state, error = load_json(root, STATE_FILE)
+    if error:
+        return [finding('state', 'error', STATE_FILE, error)], 1
+
+    findings = []
+    checked = 0
+    pointers = dict(state.get('active_sessions') or {})
+    if state.get('active_session'):
+        pointers['active_session'] = state['active_session']
+    for platform, pointer in pointers.items():
+        if not pointer:
+            continue
+        checked += 1
+        if not (Path(root) / repo_path(pointer)).is_file():
+            findings.append(finding('state', 'error', STATE_FILE,
+                                    f"active session ({platform}) missing: {pointer}"))
+
+    commands = {p.stem for p in Path(root).glob(COMMAND_GLOB)}
+    for command in state.get('loaded_commands') or []:
+        checked += 1
+        if command.lstrip('/').removesuffix('.md') not in commands:
+            findings.append(finding('state', 'warning', STATE_FILE,
+                                    f"loaded command not found: {command}"))
+
+    for name, path in (state.get('registry') or {}).items():
+        checked += 1
+        if not (Path(root) / repo_path(path)).exists():
+            findings.append(finding('state', 'error', STATE_FILE,
+                                    f"registry {name} missing: {path}"))
+    return findings, checked
+
+def frontmatter_block(text):
+    """Frontmatter text between the --- fences, or None"""
+    if not text.startswith('---'):
+        return None
+    end = text.find('\n---', 3)
+    return text[3:end] if end != -1 else None
+
+def parse_block(block):
+    """
+    Parse a frontmatter block.
+
+    Uses PyYAML when installed; otherwise a line check for the subset the
+    commands use (key: value, lists, indented mappings).
+
+    Returns:
+        (mapping, error message)
+    """
+    if YAML_AVAILABLE:
+        try:
+            data = yaml.safe_load(block)
+        except yaml.YAMLError as e:
+            return None, f"invalid YAML: {str(e).splitlines()[0]}"
+        if not isinstance(data, dict):
+            return None, "frontmatter is not a mapping"
+        return data, None
+
+    data = {}
+    for number, line in enumerate(block.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        if '\t' in line[:len(line) - len(line.lstrip())]:
+            return None, f"tab indentation on line {number}"
+        if line[0] in ' -':
+            continue
+        pair = re.match(r'^([A-Za-z_][\w-]*):(\s.*|)$', line)
+        if not pair:
+            return None, f"line {number} is not 'key: value'"
+        data[pair.group(1)] = pair.group(2).strip().strip('"\'')
+    return data, None
+
+def check_frontmatter(root, rel, kind):
+    """One command or agent file has parsable frontmatter naming the file"""
+    text = (Path(root) / rel).read_text(encoding='utf-8', errors='replace')
+    block = frontmatter_block(text)
+    if block is None:
+        # Agents are registered by frontmatter; commands still run without it
+        severity = 'error' if kind == 'agent' else 'warning'
+        return [finding('frontmatter', severity, rel, 'no frontmatter block')], 1
+
+    data, error = parse_block(block)
+    if error:
+        return [finding('frontmatter', 'error', rel, error)], 1
+    findings = [finding('frontmatter', 'error', rel, f"missing '{key}'")
+                for key in FRONTMATTER_KEYS if not data.get(key)]
+    name = data.get('name')
+    if name and str(name) != Path(rel).stem:
+        findings.append(finding('frontmatter', 'warning', rel,
+                                f"name '{name}' does not match file name"))
+    return findings, 1
+
+def check_depth(root, base):
+    """No directory under a base is nested deeper than MAX_DEPTH"""
+    findings = []
+    checked = 0
+    start = Path(root) / base
+    stack = [(str(start), base, 0)]
+    while stack:
+        absolute, relative, depth = stack.pop()
+        try:
+            entries = os.scandir(absolute)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name in SKIP_DIRS or not entry.is_dir(follow_symlinks=False):
+                    continue
+                rel = f"{relative}{entry.name}/"
+                if any(rel.startswith(exempt) for exempt in DEPTH_EXEMPT):
+                    continue
+                checked += 1
+                if depth + 1 > MAX_DEPTH:
+                    findings.append(finding('depth', 'warning', rel,
+                                            f"depth {depth + 1} below {base} (limit {MAX_DEPTH})"))
+                    continue
+                stack.append((entry.path, rel, depth + 1))
+    return findings, checked
+
+def check_structure(root):
+    """Required system files and directories exist"""
+    missing = [rel for rel in REQUIRED_PATHS if not (Path(root) / rel).exists()]
+    return [finding('structure', 'error', rel, 'required path missing') for rel in missing], len(REQUIRED_PATHS)
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+
+CHECKS = ['index_paths', 'file_counts', 'state', 'frontmatter', 'depth', 'structure']
+
+def work_units(root, checks):
+    """(check name, callable, args) for every independent unit of work"""
+    units = []
+    if 'index_paths' in checks:
+        units += [('index_paths', check_index_paths, (root, rel)) for rel in index_files(root)]
+    if 'file_counts' in checks:
+        master, _ = load_json(root, indexer.MASTER_INDEX)
+        master = master or {}
+        units.append(('file_counts', check_master_directories, (root, master)))
+        units += [('file_counts', check_file_counts, (root, directory, config, master))
+                  for directory, config in indexer.DIRECTORIES.items()]
+    if 'state' in checks:
+        units.append(('state', check_state, (root,)))
+    if 'frontmatter' in checks:
+        units += [('frontmatter', check_frontmatter, (root, str(p.relative_to(root)), 'command'))
+                  for p in sorted(Path(root).glob(COMMAND_GLOB))]
+        units += [('frontmatter', check_frontmatter, (root, str(p.relative_to(root)), 'agent'))
+                  for p in sorted(Path(root).glob(AGENT_GLOB))]
+    if 'depth' in checks:
+        units += [('depth', check_depth, (root, base)) for base in DEPTH_BASES]
+    if 'structure' in checks:
+        units.append(('structure', check_structure, (root,)))
+    return units
+
+def run_checks(root=HAL_ROOT, checks=None, workers=WORKERS):
+    """
+    Run the integrity checks in a thread pool.
+
+    Args:
+        root: HAL root
+        checks: Subset of CHECKS (default: all)
+        workers: Worker threads
+
+    Returns:
+        Report dict: status ('healthy', 'warnings', 'critical'), seconds,
+        per-check counts, findings
+    """
+    started = time.perf_counter()
+    root = Path(root)
+    checks = checks or CHECKS
+    summary = {name: {'checked': 0, 'errors': 0, 'warnings': 0} for name in checks}
+    findings = []
+
+    def run(unit):
+        name, function, args = unit
+        try:
+            return name, function(*args)
+        except Exception as e:
+            return name, ([finding(name, 'error', str(args[1]) if len(args) > 1 else '',
+                                   f"check failed: {e}")], 0)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for name, (unit_findings, checked) in pool.map(run, work_units(root, checks)):
+            summary[name]['checked'] += checked
+            for item in unit_findings:
+                summary[name]['errors' if item['severity'] == 'error' else 'warnings'] += 1
+            findings.extend(unit_findings)
+
+    findings.sort(key=lambda f: (f['severity'] != 'error', f['check'], f['path'], f['message']))
+    errors = sum(s['errors'] for s in summary.values())
+    warnings = sum(s['warnings'] for s in summary.values())
+    return {
+        'status': 'critical' if errors else 'warnings' if warnings else 'healthy',
+        'seconds': round(time.perf_counter() - started, 4),
+        'errors': errors,
+        'warnings': warnings,
+        'checks': summary,
+        'remedies': {name: REMEDIES[name] for name, counts in summary.items()
+                     if counts['errors'] or counts['warnings']},
+        'findings': findings,
+    }
+
+def print_report(report, limit=None):
+    """Human-readable summary in the /HAL-system-check status vocabulary"""
+    marks = {'healthy': '✓ HEALTHY', 'warnings': '⚠ WARNINGS', 'critical': '✗ CRITICAL'}
+    print(f"Integrity: {marks[report['status']]} ({report['errors']} errors, "
+          f"{report['warnings']} warnings, {report['seconds'] * 1000:.0f} ms)")
+    for name, counts in report['checks'].items():
+        state = 'OK' if not (counts['errors'] or counts['warnings']) else \
+            f"{counts['errors']} errors, {counts['warnings']} warnings"
+        print(f"- {name}: {counts['checked']} checked, {state}")
+
+    shown = report['findings'][:limit] if limit else report['findings']
+    if shown:
+        print()
+    for item in shown:
+        tag = 'ERROR' if item['severity'] == 'error' else 'WARN'
+        print(f"[{tag}] {item['check']}: {item['path']}: {item['message']}")
+    if len(shown) < len(report['findings']):
+        print(f"... {len(report['findings']) - len(shown)} more (use --json for all)")
+    for name, remedy in report['remedies'].items():
+        print(f"[INFO] {name}: {remedy}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='HAL8000-Assistant integrity checker (engine behind /HAL-system-check)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Full audit with a readable summary:
+    %(prog)s
+
+  Machine-readable report for the system-maintenance agent:
+    %(prog)s --json
+
+  Only some checks:
+    %(prog)s --check state --check frontmatter
+        """
+    )
+
+    parser.add_argument(
+        '--check',
+        action='append',
+        choices=CHECKS,
+        help='Run only this check (repeatable; default: all)'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the report as compact JSON'
+    )
+
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=40,
+        help='Findings shown in the summary (default: 40; --json shows all)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=WORKERS,
+        help=f'Worker threads (default: {WORKERS})'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        report = run_checks(args.root, args.check, args.workers)
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 2
+
+    if args.json:
+        print(json.dumps(report, separators=(',', ':'), ensure_ascii=False))
+    else:
+        print_report(report, args.limit)
+    return 1 if report['errors'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
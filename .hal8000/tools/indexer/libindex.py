@@ -0,0 +1,557 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Compiled Library Index
+
+Binary, memory-mapped form of libraries/index.json. Lookups by path,
+keyword or category binary-search sorted tables inside the mapping, so a
+cold lookup reads a few pages instead of parsing the whole JSON, and its
+cost stays flat as the library grows.
+
+libraries/index.json stays the source of truth; index.bin is derived from
+it (the indexer recompiles it after each library index write, and
+open_index() recompiles when it is missing or older than the JSON).
+
+File layout (little-endian):
+    header      magic, version, counts and section offsets (HEADER)
+    strings     UTF-8 string table, deduplicated; referenced as (offset, length)
+    records     fixed-width RECORD per library, sorted by canonical path
+    keywords    (offset, length) string refs; each record owns a contiguous run
+    terms       sorted keyword table: keyword ref + postings run (TERM)
+    categories  sorted category table: category ref + postings run (TERM)
+    postings    u32 record numbers
+    meta        JSON of the top-level fields (version, sources, statistics, ...)
+
+Usage:
+    python3 .hal8000/tools/indexer/libindex.py compile
+    python3 .hal8000/tools/indexer/libindex.py get .hal8000/libraries/external/fabric-patterns/ai/system.md
+    python3 .hal8000/tools/indexer/libindex.py keyword youtube
+    python3 .hal8000/tools/indexer/libindex.py category analysis
+    python3 .hal8000/tools/indexer/libindex.py decompile -o /tmp/index.json
+    python3 .hal8000/tools/indexer/libindex.py bench --entries 10000
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Readers import this module directly, so it avoids importing indexer (and
+# its argparse/hashlib/datetime imports) until a compile is needed
+HAL_ROOT = Path(__file__).resolve().parents[3]
+LIBRARY_INDEX = '.hal8000/libraries/index.json'
+LIBRARY_BINARY = '.hal8000/libraries/index.bin'
+LEGACY_PREFIX = '.claude/'
+KERNEL_PREFIX = '.hal8000/'
+
+MAGIC = b'HALLIBX\0'
+FORMAT_VERSION = 1
+
+# magic, version, record count, keyword-ref count, term count, category count,
+# then (offset, size) for strings, records, keywords, terms, categories, postings, meta
+HEADER = struct.Struct('<8sIIIII14Q')
+
+# Field presence bits (a missing field is omitted again on decompile)
+FIELDS = ('path', 'source', 'title', 'description', 'category', 'metadata_source')
+HAS_KEYWORDS = 1 << len(FIELDS)
+HAS_TOKENS = HAS_KEYWORDS << 1
+
+# flags, (offset, length) x FIELDS, (offset, length) extra JSON, size_estimate_tokens,
+# keyword run start, keyword run count, position in the JSON list
+RECORD = struct.Struct('<I' + 'II' * len(FIELDS) + 'II' + 'IIII')
+
+# string (offset, length), postings start, postings count
+TERM = struct.Struct('<IIII')
+
+def canonical_path(path):
+    """Map legacy .claude/ paths onto .hal8000/ (same rule as canonical_path)"""
+    if path.startswith(LEGACY_PREFIX):
+        return KERNEL_PREFIX + path[len(LEGACY_PREFIX):]
+    return path
+
+class StringTable:
+    """Deduplicating UTF-8 string table builder"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def add(self, text):
+        """Return (offset, length) of text, appending it if new"""
+        encoded = text.encode('utf-8')
+        if encoded not in self.offsets:
+            self.offsets[encoded] = len(self.data)
+            self.data += encoded
+        return self.offsets[encoded], len(encoded)
+
+def compile_index(data):
+    """
+    Compile parsed libraries/index.json content to the binary format.
+
+    Args:
+        data: Dict as loaded from libraries/index.json
+
+    Returns:
+        bytes of the compiled index
+    """
+    strings = StringTable()
+    entries = data.get('libraries', [])
+    order = sorted(range(len(entries)), key=lambda i: canonical_path(entries[i].get('path', '')))
+
+    records = bytearray()
+    keyword_refs = bytearray()
+    keyword_count = 0
+    postings_by_term = {}
+    postings_by_category = {}
+
+    for number, position in enumerate(order):
+        entry = entries[position]
+        flags = 0
+        refs = []
+        stored = set()
+        for bit, field in enumerate(FIELDS):
+            if isinstance(entry.get(field), str):
+                flags |= 1 << bit
+                stored.add(field)
+                refs.extend(strings.add(entry[field]))
+            else:
+                refs.extend((0, 0))
+
+        keywords = entry.get('keywords')
+        if isinstance(keywords, list) and all(isinstance(k, str) for k in keywords):
+            flags |= HAS_KEYWORDS
+            stored.add('keywords')
+        else:
+            keywords = None
+
+        tokens = entry.get('size_estimate_tokens')
+        if isinstance(tokens, int) and not isinstance(tokens, bool) and 0 <= tokens < 2 ** 32:
+            flags |= HAS_TOKENS
+            stored.add('size_estimate_tokens')
+        else:
+            tokens = None
+
+        # Anything that does not fit a fixed slot round-trips through a JSON blob
+        extra = {k: v for k, v in entry.items() if k not in stored}
+        refs.extend(strings.add(json.dumps(extra, separators=(',', ':'))) if extra else (0, 0))
+
+        kw_start = keyword_count
+        for keyword in keywords or []:
+            keyword_refs += struct.pack('<II', *strings.add(keyword))
+            keyword_count += 1
+            postings = postings_by_term.setdefault(keyword.lower(), [])
+            if not postings or postings[-1] != number:
+                postings.append(number)
+
+        if 'category' in stored:
+            postings_by_category.setdefault(str(entry['category']).lower(), []).append(number)
+
+        records += RECORD.pack(flags, *refs, int(tokens or 0), kw_start, keyword_count - kw_start, position)
+
+    postings = bytearray()
+
+    def term_table(postings_by_key):
+        table = bytearray()
+        for key in sorted(postings_by_key, key=lambda k: k.encode('utf-8')):
+            numbers = postings_by_key[key]
+            table += TERM.pack(*strings.add(key), len(postings) // 4, len(numbers))
+            postings.extend(struct.pack(f'<{len(numbers)}I', *numbers))
+        return table
+
+    terms = term_table(postings_by_term)
+    categories = term_table(postings_by_category)
+    meta = json.dumps({k: v for k, v in data.items() if k != 'libraries'},
+                      separators=(',', ':')).encode('utf-8')
+
+    sections = [bytes(strings.data), bytes(records), bytes(keyword_refs),
+                bytes(terms), bytes(categories), bytes(postings), meta]
+    offset = HEADER.size
+    layout = []
+    for section in sections:
+        layout.extend((offset, len(section)))
+        offset += len(section)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(order), keyword_count,
+                         len(terms) // TERM.size, len(categories) // TERM.size, *layout)
+    return header + b''.join(sections)
+
+class LibraryIndex:
+    """
+    Read-only view of a compiled library index.
+
+    Only the header is decoded on open; records and strings are read from
+    the memory map on demand.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.count, _, self.term_count, self.category_count,
+         *layout) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.map.close()
+            raise ValueError(f"Not a compiled library index (version {FORMAT_VERSION}): {path}")
+        (self.strings, _, self.records, _, self.keywords, _, self.terms, _,
+         self.categories_at, _, self.postings, _, self.meta_at, self.meta_size) = layout
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.map.close()
+
+    def string(self, offset, length):
+        start = self.strings + offset
+        return self.map[start:start + length].decode('utf-8')
+
+    def raw_record(self, number):
+        return RECORD.unpack_from(self.map, self.records + number * RECORD.size)
+
+    def record_path(self, number):
+        fields = self.raw_record(number)
+        return self.string(fields[1], fields[2])
+
+    def record(self, number):
+        """
+        Decode one record to the libraries/index.json entry dict.
+
+        Args:
+            number: Record number (0 .. len-1, in canonical path order)
+        """
+        fields = self.raw_record(number)
+        flags = fields[0]
+        refs = fields[1:1 + 2 * len(FIELDS)]
+        extra_offset, extra_length, tokens, kw_start, kw_count, _ = fields[1 + 2 * len(FIELDS):]
+        values = {field: self.string(refs[2 * bit], refs[2 * bit + 1])
+                  for bit, field in enumerate(FIELDS) if flags & (1 << bit)}
+
+        # Same key order as the entries written by the indexer
+        ordered = {k: values[k] for k in ('path', 'source', 'title', 'description') if k in values}
+        if flags & HAS_KEYWORDS:
+            ordered['keywords'] = [
+                self.string(*struct.unpack_from('<II', self.map, self.keywords + 8 * i))
+                for i in range(kw_start, kw_start + kw_count)
+            ]
+        for field in ('category', 'metadata_source'):
+            if field in values:
+                ordered[field] = values[field]
+        if flags & HAS_TOKENS:
+            ordered['size_estimate_tokens'] = tokens
+        if extra_length:
+            ordered.update(json.loads(self.string(extra_offset, extra_length)))
+        return ordered
+
+    def position(self, number):
+        """Index of a record in the original JSON list"""
+        return self.raw_record(number)[-1]
+
+    def meta(self):
+        """Top-level fields of libraries/index.json (everything but 'libraries')"""
+        return json.loads(self.map[self.meta_at:self.meta_at + self.meta_size].decode('utf-8'))
+
+    def get(self, path):
+        """
+        Look up a library by path (legacy .claude/ and .hal8000/ forms both match).
+
+        Returns:
+            Entry dict, or None
+        """
+        key = canonical_path(path)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if canonical_path(self.record_path(middle)) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and canonical_path(self.record_path(low)) == key:
+            return self.record(low)
+        return None
+
+    def _lookup(self, table, count, key):
+        key = key.lower().encode('utf-8')
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            offset, length, _, _ = TERM.unpack_from(self.map, table + middle * TERM.size)
+            start = self.strings + offset
+            if self.map[start:start + length] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == count:
+            return []
+        offset, length, first, n = TERM.unpack_from(self.map, table + low * TERM.size)
+        start = self.strings + offset
+        if self.map[start:start + length] != key:
+            return []
+        numbers = struct.unpack_from(f'<{n}I', self.map, self.postings + 4 * first)
+        return [self.record(number) for number in numbers]
+
+    def by_keyword(self, keyword):
+        """Entries whose keywords include keyword (case-insensitive)"""
+        return self._lookup(self.terms, self.term_count, keyword)
+
+    def by_category(self, category):
+        """Entries in a category (case-insensitive)"""
+        return self._lookup(self.categories_at, self.category_count, category)
+
+    def _keys(self, table, count):
+        return [self.string(*TERM.unpack_from(self.map, table + i * TERM.size)[:2]) for i in range(count)]
+
+    def keywords_list(self):
+        """All keywords, sorted"""
+        return self._keys(self.terms, self.term_count)
+
+    def categories(self):
+        """All categories, sorted"""
+        return self._keys(self.categories_at, self.category_count)
+
+    def to_json(self):
+        """Rebuild the libraries/index.json content (entries in their original order)"""
+        data = self.meta()
+        entries = [None] * self.count
+        for number in range(self.count):
+            entries[self.position(number)] = self.record(number)
+        ordered = {}
+        for key in ('version', 'last_updated'):
+            if key in data:
+                ordered[key] = data.pop(key)
+        ordered['libraries'] = entries
+        ordered.update(data)
+        return ordered
+
+def write_binary(root=HAL_ROOT, json_path=None, binary_path=None):
+    """
+    Compile libraries/index.json to index.bin (atomic replace).
+
+    Returns:
+        Path of the written binary index
+    """
+    root = Path(root)
+    json_path = Path(json_path or root / LIBRARY_INDEX)
+    binary_path = Path(binary_path or root / LIBRARY_BINARY)
+    data = json.loads(json_path.read_text(encoding='utf-8'))
+    payload = compile_index(data)
+
+    tmp = binary_path.with_name(binary_path.name + '.tmp')
+    tmp.write_bytes(payload)
+    os.replace(tmp, binary_path)
+    return binary_path
+
+def open_index(root=HAL_ROOT):
+    """
+    Open the compiled library index, recompiling it first if it is missing
+    or older than libraries/index.json.
+
+    Returns:
+        LibraryIndex
+    """
+    root = Path(root)
+    binary_path = root / LIBRARY_BINARY
+    json_path = root / LIBRARY_INDEX
+    try:
+        stale = binary_path.stat().st_mtime_ns < json_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        stale = True
+    if stale:
+        write_binary(root)
+    return LibraryIndex(binary_path)
+
+def synthetic_index(entries):
+    """libraries/index.json content with `entries` generated libraries (for bench)"""
+    words = ['analysis', 'summary', 'security', 'writing', 'research', 'diagram', 'video',
+             'code', 'review', 'extract', 'threat', 'essay', 'prompt', 'design', 'data']
+    libraries = []
+    for i in range(entries):
+        libraries.append({
+            'path': f'.hal8000/libraries/external/bench/pattern_{i:06d}/system.md',
+            'source': 'external:bench',
+            'title': f'Pattern {i}',
+            'description': f'Synthetic pattern {i} for lookup benchmarks. ' * 3,
+            'keywords': [words[(i + k) % len(words)] for k in range(5)] + [f'pattern{i}'],
+            'category': words[i % 7],
+            'metadata_source': 'content-scan',
+            'size_estimate_tokens': 500 + i % 1000,
+        })
+    return {'version': '1.0', 'last_updated': '2025-01-01T00:00:00Z', 'libraries': libraries,
+            'statistics': {'total_libraries': entries}}
+
+COLD_LOOKUP = """
+import sys, time
+started = time.perf_counter()
+sys.path.insert(0, {tool_dir!r})
+if {mode!r} == 'json':
+    import json
+    loaded = time.perf_counter()
+    with open({json_path!r}) as f:
+        data = json.load(f)
+    entry = next(e for e in data['libraries'] if e['path'] == {key!r})
+    hits = [e for e in data['libraries'] if {keyword!r} in e.get('keywords', [])]
+else:
+    import libindex
+    loaded = time.perf_counter()
+    with libindex.LibraryIndex({binary_path!r}) as index:
+        entry = index.get({key!r})
+        hits = index.by_keyword({keyword!r})
+done = time.perf_counter()
+assert entry is not None and len(hits) == 1
+print((done - started) * 1000, (done - loaded) * 1000)
+"""
+
+def bench(sizes, repeats=5):
+    """
+    Cold-start lookups (fresh interpreter: one path lookup and one keyword
+    lookup) against parsing the JSON, for synthetic indexes of several sizes.
+
+    Prints median times; 'lookup' excludes interpreter start and imports,
+    'total' includes the imports.
+    """
+    import subprocess
+    import tempfile
+
+    tool_dir = str(Path(__file__).resolve().parent)
+    print(f"{'entries':>8}  {'json KB':>8}  {'bin KB':>8}  {'json lookup':>11}  {'bin lookup':>10}"
+          f"  {'json total':>10}  {'bin total':>9}  {'compile':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            data = synthetic_index(size)
+            json_path = Path(tmp) / f'{size}.json'
+            binary_path = Path(tmp) / f'{size}.bin'
+            json_path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+            started = time.perf_counter()
+            write_binary(tmp, json_path, binary_path)
+            compile_ms = (time.perf_counter() - started) * 1000
+            key = data['libraries'][size // 2]['path']
+            keyword = f'pattern{size // 3}'
+
+            timings = {}
+            for mode in ('json', 'bin'):
+                script = COLD_LOOKUP.format(tool_dir=tool_dir, mode=mode, json_path=str(json_path),
+                                            binary_path=str(binary_path), key=key, keyword=keyword)
+                runs = [tuple(map(float, subprocess.run([sys.executable, '-c', script], capture_output=True,
+                                                        text=True, check=True).stdout.split()))
+                        for _ in range(repeats)]
+                timings[mode] = [sorted(r[i] for r in runs)[len(runs) // 2] for i in (0, 1)]
+
+            print(f"{size:>8}  {json_path.stat().st_size / 1024:>8.0f}  {binary_path.stat().st_size / 1024:>8.0f}"
+                  f"  {timings['json'][1]:>9.2f}ms  {timings['bin'][1]:>8.2f}ms"
+                  f"  {timings['json'][0]:>8.2f}ms  {timings['bin'][0]:>7.2f}ms  {compile_ms:>6.0f}ms")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Compiled (binary, memory-mapped) form of libraries/index.json',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Compile libraries/index.json to libraries/index.bin:
+    %(prog)s compile
+
+  Look up one library, or all with a keyword / category:
+    %(prog)s get .hal8000/libraries/external/fabric-patterns/ai/system.md
+    %(prog)s keyword youtube
+    %(prog)s category analysis
+
+  Convert back to JSON:
+    %(prog)s decompile -o /tmp/index.json
+
+  Cold-start lookup benchmark (synthetic indexes):
+    %(prog)s bench --entries 1000 10000 50000
+        """
+    )
+
+    parser.add_argument(
+        'action',
+        choices=['compile', 'decompile', 'get', 'keyword', 'category', 'bench'],
+        help='Operation'
+    )
+
+    parser.add_argument(
+        'key',
+        nargs='?',
+        help='Path, keyword or category to look up'
+    )
+
+    parser.add_argument(
+        '-i', '--input',
+        help='Input file (compile: JSON, decompile: binary; default: the library index)'
+    )
+
+    parser.add_argument(
+        '-o', '--output',
+        help='Output file (compile: binary, decompile: JSON; default: index.bin / stdout)'
+    )
+
+    parser.add_argument(
+        '--entries',
+        type=int,
+        nargs='+',
+        default=[227, 1000, 10000, 50000],
+        help='Synthetic index sizes for bench (default: 227 1000 10000 50000)'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    if args.action in ('get', 'keyword', 'category') and not args.key:
+        parser.error(f"{args.action} requires a key")
+
+    try:
+        if args.action == 'compile':
+            path = write_binary(args.root, args.input, args.output)
+            with LibraryIndex(path) as index:
+                print(f"[OK] Compiled {len(index)} libraries -> {path} ({path.stat().st_size / 1024:.0f} KB)")
+            return 0
+
+        if args.action == 'bench':
+            bench(args.entries)
+            return 0
+
+        index = LibraryIndex(args.input) if args.input else open_index(args.root)
+        with index:
+            if args.action == 'decompile':
+                text = json.dumps(index.to_json(), indent=2, ensure_ascii=False) + '\n'
+                if args.output:
+                    Path(args.output).write_text(text, encoding='utf-8')
+                    print(f"[OK] Wrote {args.output}")
+                else:
+                    sys.stdout.write(text)
+                return 0
+
+            if args.action == 'get':
+                entry = index.get(args.key)
+                if entry is None:
+                    print(f"[ERROR] Not in library index: {args.key}", file=sys.stderr)
+                    return 1
+                print(json.dumps(entry, indent=2, ensure_ascii=False))
+                return 0
+
+            lookup = index.by_keyword if args.action == 'keyword' else index.by_category
+            entries = lookup(args.key)
+            for entry in entries:
+                print(f"{entry['path']}  ({entry.get('category', '-')}, "
+                      f"~{entry.get('size_estimate_tokens', '?')} tokens)")
+            print(f"\n{len(entries)} libraries")
+            return 0
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
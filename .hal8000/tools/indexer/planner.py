@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Context Budget Planner
+
+Chooses what to load for a query under a token budget. Candidate files
+come from the full-text search index (search.py); each candidate is
+offered whole and as its heading sections from the chunk index
+(chunks.py). A greedy knapsack picks the items
+with the best relevance per token that still fit, and the result is a load
+plan with per-item token costs and line ranges (for Read offset/limit).
+
+Usage:
+    python3 .hal8000/tools/indexer/planner.py "register architecture" --budget 8000
+    python3 .hal8000/tools/indexer/planner.py "session end bug" --budget 4000 --json
+    python3 .hal8000/tools/indexer/planner.py bench
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import chunks
+import indexer
+import search
+
+DEFAULT_BUDGET = 8000
+
+# Search results considered per query
+CANDIDATES = 20
+
+# Per-item cost of loading something at all (path header, tool call framing)
+ITEM_OVERHEAD_TOKENS = 25
+
+# Sections scoring below this fraction of the best section are not worth loading
+MIN_RELATIVE_SCORE = 0.25
+
+# Fixed benchmark query set (query -> files a human would load)
+BENCH_QUERIES = Path(__file__).resolve().parent / 'planner-queries.json'
+
+def chunk_text(data, chunk):
+    """Text of a chunk (chunks.py) from already loaded file bytes"""
+    return data[chunk['start']:chunk['end']].decode('utf-8', errors='replace')
+
+def section_value(text, idf):
+    """
+    Relevance of one section: saturated query-term frequency weighted by idf.
+
+    Values add up across sections, so a whole file is worth the sum of its
+    sections (BM25 file scores saturate and would undervalue files that are
+    relevant throughout).
+    """
+    counts = {}
+    for term in search.tokenize(text):
+        if term in idf:
+            counts[term] = counts.get(term, 0) + 1
+    return sum(idf[term] * tf / (tf + search.BM25_K1) for term, tf in counts.items())
+
+def candidate_items(root, query, path=None, candidates=CANDIDATES, sections=True):
+    """
+    Whole-file and section items for the top search results.
+
+    A section's score is its own relevance scaled by its file's search rank
+    (relative to the best hit); a whole file scores the sum of its sections.
+    Items below MIN_RELATIVE_SCORE of the best section are dropped, so the
+    plan stops when the relevant material runs out instead of filling the
+    budget.
+
+    Returns:
+        List of item dicts: path, kind ('file' or 'section'), heading,
+        start_line, end_line, tokens, cost, score
+    """
+    hits = search.search(query, limit=candidates, root=root, path=path, with_snippets=False)
+    if not hits:
+        return []
+    idf = search.term_idf(search.tokenize(query), root)
+    best_hit = hits[0]['score']
+
+    items = []
+    for hit in hits:
+        try:
+            data = (Path(root) / hit['path']).read_bytes()
+        except OSError:
+            continue
+        prior = hit['score'] / best_hit
+        parts = chunks.file_chunks(root, hit['path']) if sections else []
+        if len(parts) < 2:
+            parts = []
+        values = [prior * section_value(part['heading'] + '\n' + chunk_text(data, part), idf)
+                  for part in parts]
+        file_value = (sum(values) if parts
+                      else prior * section_value(data.decode('utf-8', errors='replace'), idf))
+
+        items.append({
+            'path': hit['path'], 'kind': 'file', 'heading': hit['title'],
+            'start_line': None, 'end_line': None, 'tokens': hit['tokens'],
+            'cost': hit['tokens'] + ITEM_OVERHEAD_TOKENS, 'score': round(file_value, 4),
+        })
+        for part, value in zip(parts, values):
+            if value:
+                items.append({
+                    'path': hit['path'], 'kind': 'section', 'heading': part['heading'],
+                    'start_line': part['start_line'], 'end_line': part['end_line'],
+                    'tokens': part['tokens'], 'cost': part['tokens'] + ITEM_OVERHEAD_TOKENS,
+                    'score': round(value, 4),
+                })
+
+    section_scores = [item['score'] for item in items if item['kind'] == 'section']
+    floor = MIN_RELATIVE_SCORE * max(section_scores or [item['score'] for item in items])
+    return [item for item in items if item['kind'] == 'file' or item['score'] >= floor]
+
+def choose(items, budget):
+    """
+    Greedy knapsack over items by score per token.
+
+    A whole file replaces sections of the same file already chosen when the
+    extra cost fits and adds value. The result is compared with the single
+    best item that fits (the usual guard for greedy knapsack).
+
+    Returns:
+        List of chosen items
+    """
+    chosen = {}          # path -> {'file': item} or {'sections': [items]}
+    remaining = budget
+
+    for item in sorted(items, key=lambda i: i['score'] / i['cost'], reverse=True):
+        taken = chosen.get(item['path'], {})
+        if 'file' in taken:
+            continue
+        if item['kind'] == 'section':
+            if item['cost'] <= remaining:
+                taken.setdefault('sections', []).append(item)
+                chosen[item['path']] = taken
+                remaining -= item['cost']
+            continue
+
+        sections = taken.get('sections', [])
+        extra_cost = item['cost'] - sum(s['cost'] for s in sections)
+        extra_value = item['score'] - sum(s['score'] for s in sections)
+        if extra_cost <= remaining and extra_value > 0:
+            chosen[item['path']] = {'file': item}
+            remaining -= extra_cost
+
+    plan = [entry for taken in chosen.values()
+            for entry in ([taken['file']] if 'file' in taken else taken['sections'])]
+
+    fitting = [item for item in items if item['cost'] <= budget]
+    if fitting:
+        best = max(fitting, key=lambda i: i['score'])
+        if best['score'] > sum(i['score'] for i in plan):
+            plan = [best]
+    return plan
+
+def plan_context(query, budget=DEFAULT_BUDGET, root=indexer.HAL_ROOT, path=None,
+                 candidates=CANDIDATES, sections=True):
+    """
+    Load plan for a query under a token budget.
+
+    Args:
+        query: What the caller needs context for
+        budget: Token budget for everything loaded
+        root: HAL root directory
+        path: Only consider files under this relative path
+        candidates: Number of search results to consider
+        sections: Offer heading sections as well as whole files
+
+    Returns:
+        Dict: query, budget, used, remaining, score, items (path, kind,
+        heading, start_line, end_line, tokens, score), seconds
+    """
+    started = time.perf_counter()
+    items = candidate_items(root, query, path, candidates, sections)
+    chosen = choose(items, budget)
+    chosen.sort(key=lambda i: (-i['score'], i['path'], i['start_line'] or 0))
+
+    used = sum(item['cost'] for item in chosen)
+    return {
+        'query': query,
+        'budget': budget,
+        'used': used,
+        'remaining': budget - used,
+        'score': round(sum(item['score'] for item in chosen), 4),
+        'items': [{k: v for k, v in item.items() if k != 'cost'} for item in chosen],
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+
+def print_plan(plan):
+    """Human-readable load plan"""
+    print(f"Load plan for \"{plan['query']}\" ({plan['used']:,} / {plan['budget']:,} tokens)")
+    if not plan['items']:
+        print("  Nothing relevant found")
+        return
+    for item in plan['items']:
+        if item['kind'] == 'file':
+            print(f"  {item['tokens']:>6,}  {item['path']}  (whole file, score {item['score']:.2f})")
+        else:
+            print(f"  {item['tokens']:>6,}  {item['path']}:{item['start_line']}-{item['end_line']}"
+                  f"  § {item['heading']}  (score {item['score']:.2f})")
+    print(f"  {plan['seconds'] * 1000:.0f} ms")
+
+def baseline_plan(query, budget, root):
+    """Reference strategy: read the top search hits whole, in rank order, while they fit"""
+    used, items = 0, []
+    for hit in search.search(query, limit=CANDIDATES, root=root, with_snippets=False):
+        cost = hit['tokens'] + ITEM_OVERHEAD_TOKENS
+        if used + cost <= budget:
+            used += cost
+            items.append({'path': hit['path'], 'tokens': hit['tokens']})
+    return {'used': used, 'items': items}
+
+def relevance(plan_items, used, relevant):
+    """Benchmark metrics for one plan against the expected files"""
+    loaded = {item['path'] for item in plan_items}
+    hits = len(loaded & relevant)
+    relevant_tokens = sum(item['tokens'] for item in plan_items if item['path'] in relevant)
+    return {
+        'recall': hits / len(relevant),
+        'used': used,
+        'hits_per_1k': hits / used * 1000 if used else 0.0,
+        'relevant_share': relevant_tokens / used if used else 0.0,
+    }
+
+def bench(budget, root=indexer.HAL_ROOT):
+    """
+    Run the fixed query set and report relevance per token for the planner
+    and for the top-hits-whole baseline.
+    """
+    queries = json.loads(BENCH_QUERIES.read_text(encoding='utf-8'))['queries']
+    print(f"Budget: {budget:,} tokens, {len(queries)} queries ({BENCH_QUERIES.name})\n")
+    print(f"{'query':<34} {'recall':>13} {'tokens':>15} {'hits/1k tok':>13} {'relevant share':>15}")
+    print(f"{'':<34} {'base  plan':>13} {'base    plan':>15} {'base  plan':>13} {'base   plan':>15}")
+
+    totals = {'base': [], 'plan': []}
+    for entry in queries:
+        relevant = set(entry['relevant'])
+        base = baseline_plan(entry['query'], budget, root)
+        plan = plan_context(entry['query'], budget, root)
+        metrics = {'base': relevance(base['items'], base['used'], relevant),
+                   'plan': relevance(plan['items'], plan['used'], relevant)}
+        for key in totals:
+            totals[key].append(metrics[key])
+        b, p = metrics['base'], metrics['plan']
+        print(f"{entry['query'][:34]:<34} {b['recall']:>5.0%} {p['recall']:>6.0%}"
+              f" {b['used']:>7,} {p['used']:>7,} {b['hits_per_1k']:>6.2f} {p['hits_per_1k']:>6.2f}"
+              f" {b['relevant_share']:>6.0%} {p['relevant_share']:>7.0%}")
+
+    def mean(key, metric):
+        return sum(m[metric] for m in totals[key]) / len(totals[key])
+
+    print(f"\n{'mean':<34} {mean('base', 'recall'):>5.0%} {mean('plan', 'recall'):>6.0%}"
+          f" {mean('base', 'used'):>7,.0f} {mean('plan', 'used'):>7,.0f}"
+          f" {mean('base', 'hits_per_1k'):>6.2f} {mean('plan', 'hits_per_1k'):>6.2f}"
+          f" {mean('base', 'relevant_share'):>6.0%} {mean('plan', 'relevant_share'):>7.0%}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Choose the files and sections to load for a query under a token budget',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Plan for a query with an 8k-token budget:
+    %(prog)s "register architecture"
+
+  Smaller budget, JSON output for agents:
+    %(prog)s "session end bug" --budget 4000 --json
+
+  Whole files only, one tree:
+    %(prog)s "docling" --whole-files --path .hal8000/sessions
+
+  Relevance-per-token benchmark on the fixed query set:
+    %(prog)s bench --budget 6000
+        """
+    )
+
+    parser.add_argument(
+        'query',
+        help="Query, or 'bench' to run the benchmark"
+    )
+
+    parser.add_argument(
+        '--budget',
+        type=int,
+        default=DEFAULT_BUDGET,
+        help=f'Token budget (default: {DEFAULT_BUDGET})'
+    )
+
+    parser.add_argument(
+        '--path',
+        help='Only consider files under this relative path'
+    )
+
+    parser.add_argument(
+        '--whole-files',
+        action='store_true',
+        help='Do not split files into sections'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print the plan as JSON'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(indexer.HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.query == 'bench':
+            bench(args.budget, args.root)
+            return 0
+        plan = plan_context(args.query, args.budget, args.root, args.path,
+                            sections=not args.whole_files)
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(plan, indent=2))
+    else:
+        print_plan(plan)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
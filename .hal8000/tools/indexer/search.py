@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Full-Text Search
+
+Persistent inverted index with BM25 ranking over the markdown in
+.hal8000/libraries/, .hal8000/sessions/ and data/. Lets hal-context-finder
+load the top-k files for a query instead of grepping whole trees.
+
+The index is a SQLite database (indexes/.search.db, not committed). Every
+search first stats the searched files and re-indexes only those whose
+mtime or size changed, so results are always current and a no-change
+refresh costs a few milliseconds.
+
+Usage:
+    python3 .hal8000/tools/indexer/search.py "render server mermaid"
+    python3 .hal8000/tools/indexer/search.py "session compaction" -k 5 --path .hal8000/sessions
+    python3 .hal8000/tools/indexer/search.py "bm25" --json
+
+API:
+    from search import search
+    for hit in search('render server', limit=5):
+        print(hit['path'], hit['score'], hit['snippets'])
+"""
+
+import argparse
+import json
+import math
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import indexer
+import tokens
+
+SEARCH_DB = f'{indexer.INDEXES_DIR}/.search.db'
+SCHEMA_VERSION = 2
+
+# Searched trees (relative directory, trailing slash) and their exclusions
+SEARCH_DIRECTORIES = {
+    '.hal8000/libraries/': (),
+    '.hal8000/sessions/': ('archive/',),
+    'data/': ('diagrams/temp/', 'diagrams/project-archive/'),
+}
+SEARCH_PATTERN = '*.md'
+
+# BM25 parameters (standard values)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Headings and file name terms count this many extra times
+TITLE_BOOST = 2
+
+SNIPPETS_PER_FILE = 3
+SNIPPET_WIDTH = 160
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have',
+             'in', 'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was',
+             'were', 'will', 'with', 'md'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    tokens INTEGER NOT NULL,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id);
+"""
+
+def normalize(word):
+    """Light suffix folding so 'sessions' matches 'session'"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+def tokenize(text):
+    """
+    Split text into normalized search terms.
+
+    Args:
+        text: Any text (lower-cased here)
+
+    Returns:
+        List of terms (stopwords and 1-character tokens dropped)
+    """
+    return [normalize(word) for word in TOKEN_PATTERN.findall(text.lower())
+            if len(word) > 1 and word not in STOPWORDS]
+
+def document_terms(rel, text):
+    """
+    Term frequencies for one file, with heading and file-name terms boosted.
+
+    Returns:
+        (Counter of term -> tf, document length, title)
+    """
+    counts = Counter(tokenize(text))
+    length = sum(counts.values())
+
+    headings = ' '.join(line.lstrip('#') for line in text.splitlines() if line.startswith('#'))
+    for term in tokenize(headings + ' ' + Path(rel).stem.replace('-', ' ').replace('_', ' ')):
+        counts[term] += TITLE_BOOST
+
+    title = indexer.first_heading(text) or Path(rel).stem
+    return counts, length, title
+
+def read_file(root, rel):
+    """File text (undecodable bytes replaced), or None if it vanished"""
+    try:
+        return (Path(root) / rel).read_bytes().decode('utf-8', errors='replace')
+    except OSError:
+        return None
+
+def open_db(root):
+    """Open (and create or migrate) the search database"""
+    path = Path(root) / SEARCH_DB
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    row = db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+    if row is None or int(row[0]) != SCHEMA_VERSION:
+        db.executescript('DROP TABLE IF EXISTS postings; DROP TABLE IF EXISTS terms; '
+                         'DROP TABLE IF EXISTS files;' + SCHEMA)
+        with db:
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+    return db
+
+def scan_files(root):
+    """Stat every searchable file: relative path -> (mtime_ns, size)"""
+    found = {}
+    for directory, exclude in SEARCH_DIRECTORIES.items():
+        found.update(indexer.scan_directory(root, directory, exclude, pattern=SEARCH_PATTERN))
+    return found
+
+def term_ids(db, terms):
+    """Map terms to ids, creating missing ones"""
+    db.executemany('INSERT OR IGNORE INTO terms (term) VALUES (?)', [(t,) for t in terms])
+    ids = {}
+    terms = list(terms)
+    for i in range(0, len(terms), 500):
+        batch = terms[i:i + 500]
+        marks = ','.join('?' * len(batch))
+        ids.update(db.execute(f'SELECT term, id FROM terms WHERE term IN ({marks})', batch))
+    return ids
+
+def update_index(root=indexer.HAL_ROOT, full=False, db=None):
+    """
+    Bring the search index in step with the file system.
+
+    Args:
+        root: HAL root directory
+        full: Drop the index and re-read every file
+        db: Open connection (opened and closed here if None)
+
+    Returns:
+        Report dict with added/modified/deleted paths and seconds
+    """
+    started = time.perf_counter()
+    own_db = db is None
+    db = db or open_db(root)
+    try:
+        if full:
+            with db:
+                db.execute('DELETE FROM postings')
+                db.execute('DELETE FROM terms')
+                db.execute('DELETE FROM files')
+
+        scanned = scan_files(root)
+        known = {path: (file_id, mtime_ns, size)
+                 for file_id, path, mtime_ns, size in db.execute('SELECT id, path, mtime_ns, size FROM files')}
+
+        added = [p for p in scanned if p not in known]
+        modified = [p for p in scanned if p in known and known[p][1:] != scanned[p]]
+        deleted = [p for p in known if p not in scanned]
+
+        if added or modified or deleted:
+            token_cache = tokens.TokenCache(root)
+            with db:
+                for path in modified + deleted:
+                    file_id = known[path][0]
+                    db.execute('DELETE FROM postings WHERE file_id = ?', (file_id,))
+                    db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+                for path in added + modified:
+                    text = read_file(root, path)
+                    if text is None:
+                        continue
+                    counts, length, title = document_terms(path, text)
+                    mtime_ns, size = scanned[path]
+                    file_id = db.execute(
+                        'INSERT INTO files (path, mtime_ns, size, length, tokens, title) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (path, mtime_ns, size, length, token_cache.count(text), title)
+                    ).lastrowid
+                    ids = term_ids(db, counts)
+                    db.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                                   [(ids[t], file_id, tf) for t, tf in counts.items()])
+
+                if deleted or modified:
+                    db.execute('DELETE FROM terms WHERE id NOT IN (SELECT DISTINCT term_id FROM postings)')
+            token_cache.save()
+    finally:
+        if own_db:
+            db.close()
+
+    return {
+        'added': sorted(added),
+        'modified': sorted(modified),
+        'deleted': sorted(deleted),
+        'files': len(scanned),
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+
+def snippets(root, rel, terms, limit=SNIPPETS_PER_FILE):
+    """
+    Lines of a file that contain query terms, best lines first.
+
+    Returns:
+        List of {'line': number, 'text': stripped line} in file order
+    """
+    text = read_file(root, rel)
+    if text is None:
+        return []
+
+    wanted = set(terms)
+    scored = []
+    for number, line in enumerate(text.splitlines(), 1):
+        matched = wanted.intersection(tokenize(line))
+        if matched:
+            scored.append((-len(matched), number, line.strip()))
+
+    best = sorted(scored)[:limit]
+    return [{'line': number, 'text': line[:SNIPPET_WIDTH]}
+            for _, number, line in sorted(best, key=lambda s: s[1])]
+
+def bm25_idf(total_docs, document_frequency):
+    """BM25 inverse document frequency (always positive)"""
+    return math.log(1 + (total_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+
+def term_idf(terms, root=indexer.HAL_ROOT):
+    """
+    BM25 idf of each term over the indexed files (no refresh).
+
+    Args:
+        terms: Normalized terms (from tokenize)
+
+    Returns:
+        Dict of term -> idf (terms that occur nowhere are left out)
+    """
+    db = open_db(root)
+    try:
+        total_docs = db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        weights = {}
+        for term in set(terms):
+            df = db.execute('SELECT COUNT(*) FROM postings p JOIN terms t ON t.id = p.term_id '
+                            'WHERE t.term = ?', (term,)).fetchone()[0]
+            if df:
+                weights[term] = bm25_idf(total_docs, df)
+    finally:
+        db.close()
+    return weights
+
+def search(query, limit=10, root=indexer.HAL_ROOT, path=None, with_snippets=True, refresh=True):
+    """
+    Rank searchable files for a query with BM25.
+
+    Args:
+        query: Free-text query
+        limit: Number of results (top-k)
+        root: HAL root directory
+        path: Only return files under this relative path (e.g. 'data/research')
+        with_snippets: Attach matching lines to each result
+        refresh: Re-index changed files before searching
+
+    Returns:
+        List of dicts: path, score, title, tokens (tokens.py count), snippets
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    db = open_db(root)
+    try:
+        if refresh:
+            update_index(root, db=db)
+
+        total_docs, total_length = db.execute('SELECT COUNT(*), COALESCE(SUM(length), 0) FROM files').fetchone()
+        if not total_docs:
+            return []
+        avgdl = total_length / total_docs or 1
+
+        scores = Counter()
+        for term in terms:
+            rows = db.execute(
+                'SELECT p.file_id, p.tf, f.length FROM postings p '
+                'JOIN terms t ON t.id = p.term_id JOIN files f ON f.id = p.file_id '
+                'WHERE t.term = ?', (term,)
+            ).fetchall()
+            if not rows:
+                continue
+            idf = bm25_idf(total_docs, len(rows))
+            for file_id, tf, length in rows:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+                scores[file_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        prefix = indexer.canonical_path(path.rstrip('/') + '/') if path else None
+        results = []
+        for file_id, score in scores.most_common():
+            rel, title, token_count = db.execute('SELECT path, title, tokens FROM files WHERE id = ?',
+                                                 (file_id,)).fetchone()
+            if prefix and not rel.startswith(prefix):
+                continue
+            results.append({
+                'path': rel,
+                'score': round(score, 4),
+                'title': title,
+                'tokens': token_count,
+            })
+            if len(results) >= limit:
+                break
+    finally:
+        db.close()
+
+    if with_snippets:
+        for result in results:
+            result['snippets'] = snippets(root, result['path'], terms)
+    return results
+
+def print_results(results, seconds):
+    """Human-readable result list"""
+    if not results:
+        print(f"No matches ({seconds * 1000:.1f} ms)")
+        return
+
+    for rank, result in enumerate(results, 1):
+        print(f"{rank}. {result['path']}  (score {result['score']:.2f}, ~{result['tokens']} tokens)")
+        print(f"   {result['title']}")
+        for snippet in result.get('snippets', []):
+            print(f"   {snippet['line']:>5}: {snippet['text']}")
+    print(f"\n{len(results)} results ({seconds * 1000:.1f} ms)")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='HAL8000-Assistant full-text search (BM25 over libraries, sessions and data)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Search everything:
+    %(prog)s "mermaid render server"
+
+  Top 5 in one tree:
+    %(prog)s "context window" -k 5 --path data/research
+
+  Machine-readable output:
+    %(prog)s "docker worker" --json
+
+  Rebuild the index from scratch:
+    %(prog)s --reindex
+        """
+    )
+
+    parser.add_argument(
+        'query',
+        nargs='?',
+        help='Search terms'
+    )
+
+    parser.add_argument(
+        '-k', '--limit',
+        type=int,
+        default=10,
+        help='Number of results (default: 10)'
+    )
+
+    parser.add_argument(
+        '--path',
+        help='Only return files under this relative path'
+    )
+
+    parser.add_argument(
+        '--no-snippets',
+        action='store_true',
+        help='Return paths and scores only'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print results as JSON'
+    )
+
+    parser.add_argument(
+        '--reindex',
+        action='store_true',
+        help='Drop the index and re-read every file'
+    )
+
+    parser.add_argument(
+        '--root',
+        default=str(indexer.HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+
+    args = parser.parse_args()
+
+    if not args.query and not args.reindex:
+        parser.error('a query is required (or --reindex)')
+
+    try:
+        if args.reindex:
+            report = update_index(args.root, full=True)
+            print(f"[INFO] Indexed {report['files']} files ({report['seconds'] * 1000:.1f} ms)",
+                  file=sys.stderr)
+            if not args.query:
+                return 0
+
+        started = time.perf_counter()
+        results = search(args.query, args.limit, args.root, args.path, not args.no_snippets)
+        seconds = time.perf_counter() - started
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps({'query': args.query, 'seconds': round(seconds, 4), 'results': results}, indent=2))
+    else:
+        print_results(results, seconds)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for boot snapshot freshness (boot.py): a touch without a content
+change keeps the snapshot, a content change rebuilds it, and --check
+(rebuild=False) never writes the snapshot file.
+
+Run:
+    python3 -m pytest .hal8000/tools/indexer/tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import boot
+
+class SnapshotFreshnessTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        for rel, data in ((boot.BIOS_FILE, '**Version:** 9.9\n'),
+                          (boot.STATE_FILE, json.dumps({'system_phase': 'test', 'active_sessions': {}})),
+                          (boot.MASTER_INDEX, json.dumps({'directories': {}, 'statistics': {}})),
+                          (boot.DIGEST_FILE, json.dumps({'recent_sessions': []}))):
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(data)
+        self.snapshot_path = self.root / boot.SNAPSHOT_FILE
+        self.assertEqual(boot.load_snapshot(self.root)[1], 'rebuilt')
+
+    def touch(self, rel):
+        stat = os.stat(self.root / rel)
+        os.utime(self.root / rel, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_unchanged_snapshot_is_fresh(self):
+        self.assertEqual(boot.load_snapshot(self.root, rebuild=False)[1], 'fresh')
+
+    def test_check_after_touch_writes_nothing(self):
+        self.touch(boot.STATE_FILE)
+        before = self.snapshot_path.read_bytes()
+        mtime = os.stat(self.snapshot_path).st_mtime_ns
+
+        snapshot, status = boot.load_snapshot(self.root, rebuild=False)
+
+        self.assertEqual(status, 'touched')
+        self.assertEqual(snapshot['system']['system_phase'], 'test')
+        self.assertEqual(self.snapshot_path.read_bytes(), before)
+        self.assertEqual(os.stat(self.snapshot_path).st_mtime_ns, mtime)
+
+    def test_boot_after_touch_refreshes_records(self):
+        self.touch(boot.STATE_FILE)
+
+        self.assertEqual(boot.load_snapshot(self.root)[1], 'refreshed')
+        self.assertEqual(boot.load_snapshot(self.root, rebuild=False)[1], 'fresh')
+
+    def test_check_after_content_change_is_stale(self):
+        (self.root / boot.STATE_FILE).write_text(json.dumps({'system_phase': 'changed'}))
+        before = self.snapshot_path.read_bytes()
+
+        self.assertEqual(boot.load_snapshot(self.root, rebuild=False), (None, 'stale'))
+        self.assertEqual(self.snapshot_path.read_bytes(), before)
+        snapshot, status = boot.load_snapshot(self.root)
+        self.assertEqual((status, snapshot['system']['system_phase']), ('rebuilt', 'changed'))
+
+if __name__ == '__main__':
+    unittest.main()
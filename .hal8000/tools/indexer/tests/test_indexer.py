@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for master.json maintenance in the incremental indexer: entries
+for directories the indexer does not manage are kept while the directory
+exists and dropped, with their index file, once it is gone.
+
+Run:
+    python3 -m pytest .hal8000/tools/indexer/tests
+"""
+
+import io
+import json
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import indexer
+
+class StaleEntryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        (self.root / 'data' / 'research').mkdir(parents=True)
+        (self.root / 'data' / 'research' / 'notes.md').write_text('# Notes\n\nVon Neumann machines.\n')
+        (self.root / 'data' / 'kept').mkdir()
+        indexes = self.root / indexer.INDEXES_DIR
+        indexes.mkdir(parents=True)
+        (indexes / 'videos.json').write_text('{"files": {"data/videos/talk.md": {}}}\n')
+        (indexes / 'kept.json').write_text('{}\n')
+        (indexes / 'session-digest.json').write_text('{}\n')
+        self.write_master({
+            'data/videos/': {'index_file': '.claude/indexes/videos.json', 'file_count': 2},
+            'data/kept/': {'index_file': '.hal8000/indexes/kept.json', 'file_count': 0},
+        })
+
+    def write_master(self, directories):
+        (self.root / indexer.MASTER_INDEX).write_text(json.dumps(
+            {'version': '2.0-hierarchical', 'directories': directories, 'statistics': {}}))
+
+    def master(self):
+        return json.loads((self.root / indexer.MASTER_INDEX).read_text())
+
+    def update(self, **kwargs):
+        return indexer.update_indexes(self.root, **kwargs)
+
+    def test_entry_for_missing_directory_is_removed_with_its_index(self):
+        report = self.update()
+
+        directories = self.master()['directories']
+        self.assertNotIn('data/videos/', directories)
+        self.assertIn('data/kept/', directories)
+        self.assertIn('data/research/', directories)
+        self.assertFalse((self.root / indexer.INDEXES_DIR / 'videos.json').exists())
+        self.assertTrue((self.root / indexer.INDEXES_DIR / 'kept.json').exists())
+        self.assertTrue((self.root / indexer.INDEXES_DIR / 'session-digest.json').exists())
+        self.assertEqual(report['removed'], {'data/videos/': '.hal8000/indexes/videos.json'})
+
+    def test_pruning_runs_when_nothing_else_changed(self):
+        self.update()
+        self.write_master(dict(self.master()['directories'],
+                               **{'data/gone/': {'index_file': '.hal8000/indexes/kept.json'}}))
+
+        report = self.update()
+
+        self.assertNotIn('data/gone/', self.master()['directories'])
+        self.assertEqual(report['removed'], {'data/gone/': None})     # kept.json is still in use
+        self.assertTrue((self.root / indexer.INDEXES_DIR / 'kept.json').exists())
+
+    def test_dry_run_reports_without_removing(self):
+        with redirect_stdout(io.StringIO()) as output:
+            indexer.print_report(self.update(dry_run=True), dry_run=True)
+
+        self.assertIn('data/videos/', self.master()['directories'])
+        self.assertTrue((self.root / indexer.INDEXES_DIR / 'videos.json').exists())
+        self.assertIn('data/videos/: directory no longer exists, entry and '
+                      '.hal8000/indexes/videos.json to remove', output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
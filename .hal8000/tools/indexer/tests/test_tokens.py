@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the token counter's method selection and calibration.
+
+tokens.py is loaded fresh with a stand-in tiktoken module, so the tests
+do not need tiktoken or its downloaded BPE table.
+
+Run:
+    python3 -m pytest .hal8000/tools/indexer/tests
+"""
+
+import importlib.util
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+TOKENS_PY = Path(__file__).resolve().parents[1] / 'tokens.py'
+
+class WordEncoding:
+    """Stand-in encoder: one token per whitespace-separated word"""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+def load_tokens(get_encoding):
+    """Import a fresh copy of tokens.py with a fake tiktoken installed"""
+    fake = types.ModuleType('tiktoken')
+    fake.get_encoding = get_encoding
+    spec = importlib.util.spec_from_file_location('tokens_under_test', TOKENS_PY)
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(sys.modules, {'tiktoken': fake}):
+        spec.loader.exec_module(module)
+    return module
+
+def offline(name):
+    raise ConnectionError(f"could not download {name}")
+
+class MethodTests(unittest.TestCase):
+
+    def test_unloadable_encoding_falls_back_to_approximation(self):
+        tokens = load_tokens(offline)
+
+        self.assertFalse(tokens.TIKTOKEN_AVAILABLE)
+        self.assertTrue(tokens.METHOD.startswith('approx-v'))
+        self.assertEqual(tokens.count_tokens('hello world'), tokens.approximate_tokens('hello world'))
+
+    def test_loaded_encoding_counts_exactly(self):
+        tokens = load_tokens(lambda name: WordEncoding())
+
+        self.assertTrue(tokens.TIKTOKEN_AVAILABLE)
+        self.assertEqual(tokens.METHOD, 'tiktoken:cl100k_base')
+        self.assertEqual(tokens.count_tokens('one two three'), 3)
+
+    def test_calibrate_refuses_without_encoding(self):
+        tokens = load_tokens(offline)
+
+        with self.assertRaisesRegex(RuntimeError, 'needs tiktoken'):
+            tokens.calibrate('.')
+
+class CalibrateTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.repo = Path(self.tmp.name) / 'repo'
+        (self.repo / '.hal8000' / 'indexes').mkdir(parents=True)
+        (self.repo / 'notes.md').write_text('# Notes\n\nSome words here.\n\nMore words, and 2026.\n')
+        (self.repo / 'tool.py').write_text('def main():\n    return 42\n')
+        (self.repo / '.hal8000' / 'indexes' / 'master.json').write_text('{"generated": "index"}\n')
+        (self.repo / 'untracked.md').write_text('not part of the corpus\n')
+        for args in (['init', '-q'], ['add', 'notes.md', 'tool.py', '.hal8000'],
+                     ['-c', 'user.name=test', '-c', 'user.email=test@example.com', 'commit', '-qm', 'corpus']):
+            subprocess.run(['git'] + args, cwd=self.repo, check=True)
+        self.commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=self.repo,
+                                     capture_output=True, text=True, check=True).stdout.strip()
+
+    def test_tracked_corpus_skips_untracked_and_indexes(self):
+        tokens = load_tokens(lambda name: WordEncoding())
+
+        names = [path.name for path, _ in tokens.corpus_files(self.repo, tracked=True)]
+
+        self.assertEqual(names, ['notes.md', 'tool.py'])
+
+    def test_calibration_saves_its_error(self):
+        tokens = load_tokens(lambda name: WordEncoding())
+        root = Path(self.tmp.name) / 'hal'
+
+        with redirect_stdout(io.StringIO()) as output:
+            tokens.calibrate(self.repo, root=root, tracked=True)
+
+        saved = json.loads((root / tokens.CALIBRATION_FILE).read_text())
+        self.assertEqual(saved['corpus'], f'tracked files at {self.commit} (2 files)')
+        self.assertEqual(set(saved['error']), {'total_error', 'mean_file_error'})
+        self.assertEqual(saved['id'], tokens.calibration_id(saved['coefficients']))
+        self.assertIn('Error after fit', output.getvalue())
+
+        coefficients, calibration = tokens.load_coefficients(root)
+        self.assertEqual(calibration['mean_file_error'], saved['error']['mean_file_error'])
+        self.assertEqual(coefficients, saved['coefficients'])
+
+if __name__ == '__main__':
+    unittest.main()
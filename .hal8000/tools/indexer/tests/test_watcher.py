@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests for the watch daemon's event loop (watcher.watch_inotify): bursts
+are debounced into one update, and a kernel queue overflow triggers a
+full rescan instead of stopping the loop.
+
+Run:
+    python3 -m pytest .hal8000/tools/indexer/tests
+"""
+
+import io
+import sys
+import time
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import watcher
+
+class StopLoop(Exception):
+    pass
+
+class FakeWatcher:
+    """Replays scripted read_events results, then stops the loop"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.paths = {}
+        self.closed = False
+
+    def read_events(self, timeout):
+        if not self.batches:
+            raise StopLoop()
+        batch = self.batches.pop(0)
+        if batch == 'quiet':
+            time.sleep(timeout)
+            return set()
+        return batch
+
+    def close(self):
+        self.closed = True
+
+class WatchLoopTests(unittest.TestCase):
+
+    def run_loop(self, batches):
+        fake = FakeWatcher(batches)
+        updates = []
+        with mock.patch.object(watcher, 'InotifyWatcher', lambda root, roots: fake), \
+                mock.patch.object(watcher, 'run_update', lambda root, targets: updates.append(targets)), \
+                redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(StopLoop):
+                watcher.watch_inotify('/nonexistent')
+        self.assertTrue(fake.closed)
+        return updates, stderr.getvalue()
+
+    def test_queue_overflow_triggers_full_rescan(self):
+        updates, log = self.run_loop([None, 'quiet'])
+
+        self.assertEqual(updates, [None])
+        self.assertIn('overflow', log)
+
+    def test_overflow_during_burst_rescans_everything_once(self):
+        updates, _ = self.run_loop([{'data/research/a.md'}, None, {'data/research/b.md'}, 'quiet'])
+
+        self.assertEqual(updates, [None])
+
+    def test_burst_is_debounced_into_one_update(self):
+        updates, _ = self.run_loop([{'data/research/a.md'}, {'data/research/b.md'}, 'quiet'])
+
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0], {watcher.indexer.monitored_target('data/research/a.md')})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Token Counter
+
+Shared token estimation for the index writers and the MCP control tool.
+
+With tiktoken installed, counts are exact for the cl100k_base BPE table.
+Without it, a calibrated approximation is used: text is split the way a
+BPE pre-tokenizer splits it (words, digit groups, punctuation runs,
+whitespace runs, non-ASCII characters) and each piece class has a token
+cost. The default costs were fitted against cl100k_base on this
+repository's own text (see DEFAULT_CALIBRATION for the measured error);
+`tokens.py calibrate` refits them on another corpus and saves them, with
+their error, to indexes/.token-calibration.json.
+
+Counts are cached per content hash (indexes/.token-cache.json), so a file
+is only tokenized again when its content changes.
+
+Usage:
+    python3 .hal8000/tools/indexer/tokens.py FILE [FILE ...]
+    python3 .hal8000/tools/indexer/tokens.py bench [DIR]
+    python3 .hal8000/tools/indexer/tokens.py calibrate [--tracked] [DIR]   # needs tiktoken
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# HAL root: .hal8000/tools/indexer/tokens.py -> three levels up
+HAL_ROOT = Path(__file__).resolve().parents[3]
+
+CACHE_FILE = '.hal8000/indexes/.token-cache.json'
+CALIBRATION_FILE = '.hal8000/indexes/.token-calibration.json'
+CACHE_VERSION = 1
+MAX_CACHE_ENTRIES = 50000
+
+ENCODING = 'cl100k_base'
+APPROXIMATION_VERSION = 1
+
+BENCH_DIRECTORY = 'data/reference-manual'
+
+# Pre-tokenizer piece classes (one regex pass per class)
+WORD = re.compile(r'[A-Za-z]+')
+DIGITS = re.compile(r'\d+')
+PUNCTUATION = re.compile(r'[!-/:-@\[-`{-~]+')
+SPACE_RUN = re.compile(r'[ \t]{2,}')
+NEWLINE_RUN = re.compile(r'[\r\n]+')
+NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+# Short words (up to this many letters) are almost always one token
+SHORT_WORD = 6
+
+FEATURES = ('words', 'long_word_chars', 'digit_groups', 'punctuation_chars',
+            'punctuation_runs', 'space_runs', 'newline_runs', 'non_ascii_chars')
+
+# Token cost per feature unit, fitted against tiktoken cl100k_base on the
+# files git tracks at commit 7a89300 (markdown, Python, JSON; the generated
+# .hal8000/indexes excluded). Reproduce with:
+#   git worktree add /tmp/hal-7a89300 7a89300
+#   python3 .hal8000/tools/indexer/tokens.py calibrate --tracked /tmp/hal-7a89300
+# which prints these values and saves them with the error below.
+DEFAULT_COEFFICIENTS = {
+    'words': 1.0162,            # a word with its leading space
+    'long_word_chars': 0.0705,  # letters beyond SHORT_WORD split into more pieces
+    'digit_groups': 1.3342,     # numbers are split into groups of up to 3 digits
+    'punctuation_chars': 0.2075,
+    'punctuation_runs': 0.4846, # '**', '</', '="' are usually one token
+    'space_runs': 0.2341,       # indentation
+    'newline_runs': 1.2154,
+    'non_ascii_chars': 0.6412,
+}
+
+# Error of DEFAULT_COEFFICIENTS on that corpus, as calibrate reports it.
+# On BENCH_DIRECTORY alone (`tokens.py bench` with tiktoken): total -0.7%,
+# mean |error| per file 2.6%.
+DEFAULT_CALIBRATION = {
+    'corpus': 'tracked files at 7a89300 (569 files)',
+    'total_error': 0.0045,
+    'mean_file_error': 0.0378,
+}
+
+def features(text):
+    """
+    Count pre-tokenizer pieces by class.
+
+    Returns:
+        Dict of feature name -> count (see FEATURES)
+    """
+    words = WORD.findall(text)
+    punctuation = PUNCTUATION.findall(text)
+    return {
+        'words': len(words),
+        'long_word_chars': sum(len(w) - SHORT_WORD for w in words if len(w) > SHORT_WORD),
+        'digit_groups': sum((len(d) + 2) // 3 for d in DIGITS.findall(text)),
+        'punctuation_chars': sum(map(len, punctuation)),
+        'punctuation_runs': len(punctuation),
+        'space_runs': len(SPACE_RUN.findall(text)),
+        'newline_runs': len(NEWLINE_RUN.findall(text)),
+        'non_ascii_chars': len(NON_ASCII.findall(text)) if not text.isascii() else 0,
+    }
+
+def calibration_id(coefficients):
+    """Short hash naming a coefficient set (part of METHOD, so caches follow it)"""
+    return hashlib.sha256(json.dumps(coefficients, sort_keys=True).encode()).hexdigest()[:8]
+
+def load_coefficients(root=HAL_ROOT):
+    """
+    Calibrated coefficients if a calibration file exists, else the defaults.
+
+    Returns:
+        (coefficients, calibration) where calibration has id, corpus and,
+        when it was measured, total_error and mean_file_error
+    """
+    try:
+        with open(Path(root) / CALIBRATION_FILE, encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved.get('version') == APPROXIMATION_VERSION:
+            calibration = {'id': saved.get('id', 'calibrated'), 'corpus': saved.get('corpus')}
+            calibration.update(saved.get('error', {}))
+            return {**DEFAULT_COEFFICIENTS, **saved['coefficients']}, calibration
+    except (OSError, ValueError, KeyError):
+        pass
+    return dict(DEFAULT_COEFFICIENTS), {'id': f'default-{calibration_id(DEFAULT_COEFFICIENTS)}',
+                                        **DEFAULT_CALIBRATION}
+
+_coefficients, _calibration = load_coefficients()
+
+# The BPE table is downloaded on first use; without it (offline, blocked)
+# the approximation is used, as if tiktoken were not installed
+_encoder = None
+if TIKTOKEN_AVAILABLE:
+    try:
+        _encoder = tiktoken.get_encoding(ENCODING)
+    except Exception:
+        TIKTOKEN_AVAILABLE = False
+
+if TIKTOKEN_AVAILABLE:
+    METHOD = f'tiktoken:{ENCODING}'
+else:
+    METHOD = f'approx-v{APPROXIMATION_VERSION}:{_calibration["id"]}'
+
+def approximate_tokens(text, coefficients=None):
+    """Token estimate from piece counts (no tokenizer needed)"""
+    coefficients = coefficients or _coefficients
+    counts = features(text)
+    return max(0, round(sum(coefficients[name] * counts[name] for name in FEATURES)))
+
+def exact_tokens(text):
+    """Exact cl100k_base count (requires tiktoken and its BPE table)"""
+    return len(_encoder.encode(text, disallowed_special=()))
+
+def count_tokens(text):
+    """
+    Token count for text with the best available method (see METHOD).
+
+    Args:
+        text: Any text
+
+    Returns:
+        Integer token count
+    """
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        return exact_tokens(text)
+    return approximate_tokens(text)
+
+class TokenCache:
+    """
+    Per-content-hash token counts, persisted across runs.
+
+    The cache is tied to METHOD: counts from another method (or another
+    calibration) are discarded on load.
+    """
+
+    def __init__(self, root=HAL_ROOT):
+        """root=None gives an in-memory cache that is never saved"""
+        self.path = Path(root) / CACHE_FILE if root is not None else None
+        self.counts = {}
+        self.dirty = False
+        self.hits = self.misses = 0
+        if self.path is None:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get('version') == CACHE_VERSION and saved.get('method') == METHOD:
+                self.counts = saved['counts']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def count(self, text, digest=None):
+        """
+        Token count for text, from the cache when its hash is known.
+
+        Args:
+            text: File content
+            digest: sha256 hex digest of the UTF-8 content, if already known
+        """
+        digest = digest or hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+        cached = self.counts.get(digest)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        value = count_tokens(text)
+        self.counts[digest] = value
+        self.dirty = True
+        return value
+
+    def count_file(self, path):
+        """Token count for a file (read as UTF-8, undecodable bytes replaced)"""
+        data = Path(path).read_bytes()
+        return self.count(data.decode('utf-8', errors='replace'), hashlib.sha256(data).hexdigest())
+
+    def save(self):
+        """Write the cache if it changed (atomic; oldest entries dropped past the cap)"""
+        if not self.dirty or self.path is None:
+            return
+        counts = self.counts
+        if len(counts) > MAX_CACHE_ENTRIES:
+            counts = dict(list(counts.items())[-MAX_CACHE_ENTRIES:])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f'.{self.path.name}.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'method': METHOD, 'counts': counts}, f,
+                      separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+def tracked_paths(directory):
+    """Files git tracks in a checkout, without the generated indexes"""
+    listing = subprocess.run(['git', 'ls-files', '-z'], cwd=directory, capture_output=True, check=True).stdout
+    names = [name for name in listing.decode('utf-8').split('\0')
+             if name and not name.startswith('.hal8000/indexes/')]
+    return [Path(directory) / name for name in sorted(names)]
+
+def corpus_files(directory, tracked=False):
+    """
+    Text files under directory (files containing NUL bytes are skipped).
+
+    tracked=True takes the files git tracks in the checkout at directory
+    (the corpus DEFAULT_COEFFICIENTS were fitted on) instead of walking it.
+    """
+    files = []
+    if tracked:
+        paths = [path for path in tracked_paths(directory) if path.is_file()]
+    else:
+        paths = [path for path in sorted(Path(directory).rglob('*'))
+                 if path.is_file() and not any(part.startswith('.') for part in path.parts[-2:])]
+    for path in paths:
+        data = path.read_bytes()
+        if b'\0' in data:
+            continue
+        files.append((path, data.decode('utf-8', errors='replace')))
+    return files
+
+def approximation_error(texts, exact_counts, coefficients=None):
+    """
+    Error of the approximation against exact counts.
+
+    Returns:
+        (total error, mean |error| per text) as fractions
+    """
+    approx = [approximate_tokens(text, coefficients) for text in texts]
+    errors = [(a - n) / n for a, n in zip(approx, exact_counts) if n]
+    total = sum(exact_counts)
+    return (sum(approx) - total) / total, sum(map(abs, errors)) / len(errors)
+
+def bench(directory):
+    """
+    Throughput of the counter on a corpus: cold (tokenize everything) and
+    warm (every file a cache hit), compared with the chars / 4 heuristic.
+    """
+    files = corpus_files(directory)
+    total_bytes = sum(len(text.encode('utf-8')) for _, text in files)
+    megabytes = total_bytes / 1e6
+    print(f"Corpus: {directory} ({len(files)} text files, {megabytes:.2f} MB)")
+    print(f"Method: {METHOD}")
+
+    started = time.perf_counter()
+    counts = [count_tokens(text) for _, text in files]
+    cold = time.perf_counter() - started
+
+    cache = TokenCache(None)
+    for _, text in files:
+        cache.count(text)
+    started = time.perf_counter()
+    for _, text in files:
+        cache.count(text)
+    warm = time.perf_counter() - started
+
+    started = time.perf_counter()
+    heuristic = sum(len(text) // 4 for _, text in files)
+    heuristic_seconds = time.perf_counter() - started
+
+    total = sum(counts)
+    print(f"Tokens: {total:,} (chars/4 heuristic: {heuristic:,}, {(heuristic - total) / total:+.1%})")
+    print(f"Cold:   {cold * 1000:8.1f} ms  {megabytes / cold:8.1f} MB/s")
+    print(f"Warm:   {warm * 1000:8.1f} ms  {megabytes / warm:8.1f} MB/s  (cache hits incl. sha256)")
+    print(f"chars/4:{heuristic_seconds * 1000:8.1f} ms")
+
+    if TIKTOKEN_AVAILABLE:
+        total_error, mean_error = approximation_error([text for _, text in files], counts)
+        print(f"Approximation vs exact: total {total_error:+.1%}, mean |error| per file {mean_error:.1%}")
+    if 'mean_file_error' in _calibration:
+        print(f"Approximation error at calibration ({_calibration['id']}, {_calibration['corpus']}): "
+              f"total {_calibration['total_error']:+.1%}, "
+              f"mean |error| per file {_calibration['mean_file_error']:.1%}")
+
+def solve(matrix, vector):
+    """Solve a small dense linear system (Gaussian elimination, partial pivoting)"""
+    n = len(vector)
+    a = [row[:] + [vector[i]] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        if abs(a[col][col]) < 1e-12:
+            continue
+        for r in range(n):
+            if r != col:
+                factor = a[r][col] / a[col][col]
+                a[r] = [x - factor * y for x, y in zip(a[r], a[col])]
+    return [a[i][n] / a[i][i] if abs(a[i][i]) > 1e-12 else 0.0 for i in range(n)]
+
+def calibrate(directory, root=HAL_ROOT, tracked=False):
+    """
+    Fit the approximation's coefficients to exact cl100k_base counts on a
+    corpus (ridge least squares towards the defaults) and save them.
+
+    With tracked=True the corpus is the files git tracks in the checkout
+    at directory (see corpus_files).
+    """
+    if not TIKTOKEN_AVAILABLE:
+        raise RuntimeError(f"calibrate needs tiktoken and its {ENCODING} table (pip install tiktoken)")
+
+    files = corpus_files(directory, tracked)
+    corpus = f'{directory} ({len(files)} files)'
+    if tracked:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=directory,
+                                capture_output=True, text=True).stdout.strip()
+        corpus = f'tracked files at {commit or "unknown commit"} ({len(files)} files)'
+    samples = []
+    for _, text in files:
+        # Paragraph-sized samples give the fit more rows than whole files
+        for chunk in re.split(r'\n\s*\n', text):
+            if chunk.strip():
+                f = features(chunk)
+                samples.append(([f[name] for name in FEATURES], exact_tokens(chunk)))
+
+    n = len(FEATURES)
+    prior = [DEFAULT_COEFFICIENTS[name] for name in FEATURES]
+    ridge = 1e-3 * max(1, len(samples))
+    matrix = [[ridge if i == j else 0.0 for j in range(n)] for i in range(n)]
+    vector = [ridge * p for p in prior]
+    for x, y in samples:
+        for i in range(n):
+            vector[i] += x[i] * y
+            for j in range(n):
+                matrix[i][j] += x[i] * x[j]
+    solution = solve(matrix, vector)
+
+    coefficients = {name: round(max(0.0, value), 4) for name, value in zip(FEATURES, solution)}
+    texts = [text for _, text in files]
+    total_error, mean_error = approximation_error(texts, [exact_tokens(text) for text in texts], coefficients)
+    path = Path(root) / CALIBRATION_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'version': APPROXIMATION_VERSION, 'id': calibration_id(coefficients),
+                                'corpus': corpus, 'samples': len(samples),
+                                'coefficients': coefficients,
+                                'error': {'total_error': round(total_error, 4),
+                                          'mean_file_error': round(mean_error, 4)}},
+                               indent=2) + '\n', encoding='utf-8')
+
+    print(f"[OK] Calibrated on {len(samples)} samples from {len(files)} files in {directory}")
+    print(f"     Error after fit: total {total_error:+.2%}, mean |error| per file {mean_error:.2%}")
+    for name in FEATURES:
+        print(f"     {name:<18} {DEFAULT_COEFFICIENTS[name]:>6} -> {coefficients[name]}")
+    print(f"     Saved {path}")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='HAL8000-Assistant token counter (tiktoken when installed, calibrated approximation otherwise)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  Count tokens in files:
+    %(prog)s data/research/*.md
+
+  Throughput benchmark (default corpus: {BENCH_DIRECTORY}):
+    %(prog)s bench
+
+  Refit the approximation against tiktoken:
+    %(prog)s calibrate data/
+
+  Refit on every file git tracks in a checkout (how the defaults were fitted):
+    %(prog)s calibrate --tracked .
+        """
+    )
+
+    if len(sys.argv) > 1 and sys.argv[1] in ('bench', 'calibrate'):
+        action = sys.argv[1]
+        rest = sys.argv[2:]
+        tracked = action == 'calibrate' and '--tracked' in rest
+        rest = [arg for arg in rest if arg != '--tracked'] if tracked else rest
+        default = HAL_ROOT if tracked else HAL_ROOT / BENCH_DIRECTORY
+        directory = rest[0] if rest else str(default)
+        try:
+            if action == 'bench':
+                bench(directory)
+            else:
+                calibrate(directory, tracked=tracked)
+        except Exception as e:
+            print(f"Fatal error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    parser.add_argument(
+        'files',
+        nargs='+',
+        help='Files to count'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or update the token cache'
+    )
+
+    args = parser.parse_args()
+
+    cache = TokenCache(None if args.no_cache else HAL_ROOT)
+    total = 0
+    for name in args.files:
+        try:
+            value = cache.count_file(name)
+        except OSError as e:
+            print(f"[ERROR] {name}: {e}", file=sys.stderr)
+            continue
+        total += value
+        print(f"{value:>10,}  {name}")
+    if len(args.files) > 1:
+        print(f"{total:>10,}  total ({METHOD})")
+    cache.save()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
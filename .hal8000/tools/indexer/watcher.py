@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant Index Watcher
+
+Keeps the indexes fresh between /HAL-index-update runs. Watches the
+monitored directories (indexer.DIRECTORIES and the library sources) with
+inotify on Linux, or by periodic stat scans elsewhere, and applies
+incremental indexer updates to the affected directory index and
+master.json.
+
+Events are debounced: an update runs once the tree has been quiet for
+DEBOUNCE_SECONDS, and at the latest MAX_DELAY_SECONDS after the first
+event, so a burst such as a git checkout becomes one rewrite per index.
+
+Usage:
+    python3 .hal8000/tools/indexer/indexer.py watch
+    python3 .hal8000/tools/indexer/indexer.py watch --poll 2
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from pathlib import Path
+
+import indexer
+
+# Quiet period before an update, and upper bound on event-to-index latency
+DEBOUNCE_SECONDS = 0.25
+MAX_DELAY_SECONDS = 1.0
+
+# Polling fallback interval (a full stat scan costs a few milliseconds)
+POLL_INTERVAL_SECONDS = 1.0
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+def log(message):
+    """Print to stderr with the watcher prefix"""
+    print(f"[HAL-INDEX] {time.strftime('%H:%M:%S')} {message}", file=sys.stderr, flush=True)
+
+def watch_roots():
+    """Top-level directories to watch (monitored directories and library sources)"""
+    roots = list(indexer.DIRECTORIES) + [c['path'] for c in indexer.LIBRARY_SOURCES.values()]
+    return sorted(set(roots))
+
+class InotifyWatcher:
+    """
+    Recursive inotify watch over a set of directories, via ctypes.
+
+    inotify watches single directories, so every subdirectory gets its own
+    watch; directories created later are added as their IN_CREATE arrives.
+    """
+
+    def __init__(self, root, directories):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.libc.inotify_init1.argtypes = [ctypes.c_int]
+        self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.root = Path(root)
+        self.paths = {}          # watch descriptor -> relative directory ('data/research/')
+        for directory in directories:
+            self.add_tree(directory)
+
+    def add_watch(self, rel_dir):
+        """Watch one directory; returns False if it cannot be watched"""
+        path = os.fsencode(str(self.root / rel_dir))
+        wd = self.libc.inotify_add_watch(self.fd, path, WATCH_MASK)
+        if wd < 0:
+            return False
+        self.paths[wd] = rel_dir
+        return True
+
+    def add_tree(self, rel_dir):
+        """Watch a directory and all its subdirectories"""
+        if not self.add_watch(rel_dir):
+            return
+        for current, dirs, _ in os.walk(self.root / rel_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+            base = Path(current).relative_to(self.root).as_posix()
+            for name in dirs:
+                self.add_watch(f"{base}/{name}/")
+
+    def read_events(self, timeout):
+        """
+        Wait up to timeout seconds and return the changed relative paths.
+
+        Returns:
+            Set of relative paths, or None if the kernel queue overflowed
+            (events were lost and a full scan is needed)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        overflow = False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+
+            directory = self.paths.get(wd)
+            if directory is None:
+                continue
+            if not name:
+                changed.add(directory)
+                continue
+            if name.startswith('.') or name == '__pycache__':
+                continue
+
+            rel = f"{directory}{name}"
+            changed.add(rel)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(rel + '/')
+
+        return None if overflow else changed
+
+    def close(self):
+        os.close(self.fd)
+
+def run_update(root, targets):
+    """Apply one incremental update and log what changed"""
+    try:
+        report = indexer.update_indexes(root, targets=targets)
+    except Exception as e:
+        log(f"Update failed: {e}")
+        return
+    if report['directories']:
+        changed = ', '.join(report['directories'])
+        rewritten = ', '.join(Path(p).name for p in report['rewritten']) or 'none'
+        log(f"Updated {changed} -> {rewritten} ({report['seconds'] * 1000:.1f} ms)")
+
+def watch_inotify(root):
+    """Event loop: collect inotify events, debounce, update affected indexes"""
+    watcher = InotifyWatcher(root, watch_roots())
+    log(f"Watching {len(watcher.paths)} directories with inotify")
+
+    pending = set()
+    first_event = last_event = None
+    try:
+        while True:
+            if pending:
+                now = time.monotonic()
+                timeout = max(0.0, min(last_event + DEBOUNCE_SECONDS, first_event + MAX_DELAY_SECONDS) - now)
+            else:
+                timeout = None
+
+            changed = watcher.read_events(timeout)
+            now = time.monotonic()
+
+            if changed is None:
+                log("Event queue overflow - rescanning everything")
+                pending.add(None)
+                first_event = first_event or now
+                last_event = now
+                changed = set()
+            for rel in changed:
+                target = indexer.monitored_target(rel)
+                if target:
+                    pending.add(target)
+            if changed and pending:
+                first_event = first_event or now
+                last_event = now
+
+            if pending and (now - last_event >= DEBOUNCE_SECONDS or now - first_event >= MAX_DELAY_SECONDS):
+                targets = None if None in pending else set(pending)
+                pending.clear()
+                first_event = last_event = None
+                run_update(root, targets)
+    finally:
+        watcher.close()
+
+def watch_polling(root, interval=POLL_INTERVAL_SECONDS):
+    """Fallback loop: an incremental update (a stat scan) every interval seconds"""
+    log(f"Watching by polling every {interval}s")
+    while True:
+        run_update(root, None)
+        time.sleep(interval)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='indexer.py watch',
+        description='Keep HAL8000-Assistant indexes fresh as files change'
+    )
+    parser.add_argument(
+        '--poll',
+        type=float,
+        metavar='SECONDS',
+        help='Use stat polling at this interval instead of inotify'
+    )
+    parser.add_argument(
+        '--root',
+        default=str(indexer.HAL_ROOT),
+        help='HAL root directory (default: derived from this script location)'
+    )
+    args = parser.parse_args(argv)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    # Catch up on anything that changed while nobody was watching
+    run_update(args.root, None)
+
+    try:
+        if args.poll is None and sys.platform.startswith('linux'):
+            try:
+                watch_inotify(args.root)
+            except OSError as e:
+                log(f"inotify unavailable ({e}) - falling back to polling")
+        watch_polling(args.root, args.poll or POLL_INTERVAL_SECONDS)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,9 +5,44 @@ HAL8000-Assistant MCP Control - Dynamic MCP server management for RAM optimizati
 Manages selective loading of MCP servers via .claude/settings.local.json and .mcp.json
 """
 
+import fcntl
+import hashlib
 import json
 import os
+import queue
+import re
+import signal
+import stat
+import subprocess
 import sys
+import tempfile
+import threading
+import time
+
+# Shared token counter (.hal8000/tools/indexer/tokens.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "indexer"))
+import tokens
+
+# Token cost of a server whose tools are not listed in the registry
+DEFAULT_SERVER_TOKENS = 500
+
+# Average JSON-schema overhead of one tool definition beyond its name
+TOOL_SCHEMA_TOKENS = 120
+
+# Measured server profiles (written by 'profile', read by 'status')
+PROFILE_CACHE = os.path.join(".hal8000", "indexes", ".mcp-profiles.json")
+PROFILE_CACHE_VERSION = 1
+
+# MCP protocol version offered in the initialize handshake
+PROTOCOL_VERSION = "2024-11-05"
+
+# Seconds to wait for a server to answer (first npx run downloads the package)
+PROFILE_TIMEOUT = 120
+
+AGENTS_DIR = os.path.join(".hal8000", "agents")
+
+# Stdio shim of the shared server pool (mux.py); 'mux on' points .mcp.json at it
+MUX_SCRIPT = os.path.join(".hal8000", "tools", "mcp", "mux.py")
 
 def get_absolute_paths():
     """Get absolute paths for configuration files"""
@@ -21,6 +56,10 @@ def get_absolute_paths():
 
     return hal_root, registry_path, settings_path, mcp_config_path
 
+def lock_path_for(mcp_config_path):
+    """Advisory lock file guarding both configuration files"""
+    return mcp_config_path + ".lock"
+
 def safe_file_operation(file_path, operation, data=None):
     """Safe file operations with error handling"""
     try:
@@ -40,6 +79,137 @@ def safe_file_operation(file_path, operation, data=None):
     except Exception as e:
         return f"ERROR: Unexpected error with {file_path}: {str(e)}"
 
+class ConfigError(Exception):
+    """Configuration transaction failure (message is printed as-is)"""
+
+def atomic_write_json(file_path, data):
+    """
+    Write JSON to a temp file in the same directory, fsync it, then
+    rename it over the target so readers never see a partial file. The
+    target's permission bits are kept (mkstemp creates files as 0600).
+    """
+    directory = os.path.dirname(file_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            try:
+                os.fchmod(f.fileno(), stat.S_IMODE(os.stat(file_path).st_mode))
+            except FileNotFoundError:
+                pass
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    fsync_directory(directory)
+
+def fsync_directory(directory):
+    """Persist a rename (best effort; not every filesystem allows it)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class ConfigTransaction:
+    """
+    Locked, all-or-nothing update of settings.local.json and .mcp.json.
+
+    Entering takes an exclusive advisory lock (fcntl.flock on
+    .mcp.json.lock) and reads both files; callers modify .settings and
+    .mcp_config in place and call commit(). Commit writes each changed file
+    exactly once (temp file + fsync + rename). If the second rename fails
+    the first file is restored from its original content, so parallel
+    sessions never see one file updated without the other.
+
+    Usage:
+        with ConfigTransaction(settings_path, mcp_config_path) as txn:
+            txn.settings["enabledMcpjsonServers"].append("replicate")
+            txn.commit()
+    """
+
+    def __init__(self, settings_path, mcp_config_path):
+        self.paths = {"settings": settings_path, "mcp_config": mcp_config_path}
+        self.lock_path = lock_path_for(mcp_config_path)
+        self.lock_file = None
+        self.original = {}
+        self.settings = None
+        self.mcp_config = None
+
+    def __enter__(self):
+        try:
+            self.lock_file = open(self.lock_path, 'a')
+            fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX)
+        except OSError as e:
+            self.release()
+            raise ConfigError(f"ERROR: Could not lock {self.lock_path}: {e}")
+
+        try:
+            for key, path in self.paths.items():
+                data = safe_file_operation(path, "read")
+                if isinstance(data, str) and data.startswith("ERROR"):
+                    raise ConfigError(data)
+                self.original[key] = data
+                setattr(self, key, json.loads(json.dumps(data)))
+        except BaseException:
+            self.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def release(self):
+        """Drop the advisory lock"""
+        if self.lock_file:
+            try:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self.lock_file.close()
+                self.lock_file = None
+
+    def changed(self):
+        """Keys of the files whose content differs from what was read"""
+        return [key for key in self.paths if getattr(self, key) != self.original[key]]
+
+    def commit(self):
+        """
+        Write every changed file once, all or nothing.
+
+        Returns:
+            Number of files written
+
+        Raises:
+            ConfigError: Nothing was changed on disk
+        """
+        written = []
+        try:
+            for key in self.changed():
+                atomic_write_json(self.paths[key], getattr(self, key))
+                written.append(key)
+        except OSError as e:
+            rollback_errors = []
+            for key in written:
+                try:
+                    atomic_write_json(self.paths[key], self.original[key])
+                except OSError as rollback_error:
+                    rollback_errors.append(f"{self.paths[key]}: {rollback_error}")
+            message = f"ERROR: Could not write configuration ({e}); no changes applied"
+            if rollback_errors:
+                message = (f"ERROR: Could not write configuration ({e}) and rollback failed: "
+                           f"{'; '.join(rollback_errors)}")
+            raise ConfigError(message)
+        return len(written)
+
 def load_env_file(hal_root):
     """Load environment variables from .env file"""
     env_path = os.path.join(hal_root, ".env")
@@ -61,7 +231,7 @@ def load_env_file(hal_root):
 def validate_environment():
     """Validate script is in expected location"""
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    expected_suffix = os.path.join(".claude", "tools", "mcp")
+    expected_suffix = os.path.join(".hal8000", "tools", "mcp")
 
     if not script_dir.endswith(expected_suffix):
         return f"ERROR: Script not in expected location.\nFound: {script_dir}\nExpected to end with: {expected_suffix}"
@@ -79,11 +249,29 @@ def load_registry(registry_path):
 
     return registry["servers"], None
 
-def build_mcp_config(server_name, server_def, hal_root):
-    """Build .mcp.json configuration for a server"""
+def routed_through_mux(entry):
+    """Whether an .mcp.json server entry runs the multiplexer shim"""
+    args = entry.get("args") or []
+    return len(args) >= 2 and args[0].endswith("mux.py") and args[1] == "connect"
+
+def mux_active(mcp_config):
+    """Mux mode is on while any .mcp.json server is routed through the shim"""
+    return any(routed_through_mux(entry) for entry in mcp_config.get("mcpServers", {}).values())
+
+def build_mcp_config(server_name, server_def, hal_root, mux=False):
+    """
+    Build .mcp.json configuration for a server
+
+    With mux=True a stdio server is reached through the shared server pool
+    (mux.py connect), which launches the real command with the .env keys.
+    """
     config = {}
 
-    if server_def["type"] == "stdio":
+    if server_def["type"] == "stdio" and mux:
+        config["command"] = "python3"
+        config["args"] = [os.path.join(hal_root, MUX_SCRIPT), "connect", server_name]
+
+    elif server_def["type"] == "stdio":
         config["command"] = server_def["command"]
         config["args"] = server_def.get("args", [])
 
@@ -123,110 +311,629 @@ def check_required_env_vars(hal_root, server_def):
 
     return None
 
-def enable_server(server_name, servers, hal_root, settings_path, mcp_config_path):
-    """Enable an MCP server"""
-    if server_name not in servers:
-        available = ", ".join(servers.keys())
-        return f"ERROR: Server '{server_name}' not in registry.\nAvailable: {available}"
-
-    server_def = servers[server_name]
-
-    # Check environment variables
-    env_error = check_required_env_vars(hal_root, server_def)
-    if env_error:
-        return env_error
-
-    # Load current settings
-    settings = safe_file_operation(settings_path, "read")
-    if isinstance(settings, str) and settings.startswith("ERROR"):
-        return settings
-
-    # Ensure selective control is enabled
-    settings["enableAllProjectMcpServers"] = False
-
-    # Add to enabled servers list
-    enabled_servers = settings.get("enabledMcpjsonServers", [])
-    if server_name in enabled_servers:
-        return f"✓ Server '{server_name}' already enabled"
+def unknown_servers(server_names, servers):
+    """Error message for names missing from the registry, or None"""
+    unknown = [name for name in server_names if name not in servers]
+    if not unknown:
+        return None
+    available = ", ".join(servers.keys())
+    names = ", ".join(f"'{name}'" for name in unknown)
+    return f"ERROR: Server {names} not in registry.\nAvailable: {available}"
+
+def enable_servers(server_names, servers, hal_root, settings_path, mcp_config_path):
+    """
+    Enable one or more MCP servers in a single locked transaction.
+
+    Every name is validated (registry entry, required env vars) before
+    anything is written; each configuration file is then written once.
+    """
+    error = unknown_servers(server_names, servers)
+    if error:
+        return error
 
-    enabled_servers.append(server_name)
-    settings["enabledMcpjsonServers"] = enabled_servers
+    for server_name in server_names:
+        env_error = check_required_env_vars(hal_root, servers[server_name])
+        if env_error:
+            return f"{env_error} (server '{server_name}')"
 
-    # Load and update .mcp.json
-    mcp_config = safe_file_operation(mcp_config_path, "read")
-    if isinstance(mcp_config, str) and mcp_config.startswith("ERROR"):
-        return mcp_config
+    lines = []
+    try:
+        with ConfigTransaction(settings_path, mcp_config_path) as txn:
+            # Ensure selective control is enabled
+            txn.settings["enableAllProjectMcpServers"] = False
+            enabled_servers = txn.settings.setdefault("enabledMcpjsonServers", [])
+            mcp_servers = txn.mcp_config.setdefault("mcpServers", {})
+            mux = mux_active(txn.mcp_config)
+
+            for server_name in server_names:
+                if server_name in enabled_servers:
+                    lines.append(f"✓ Server '{server_name}' already enabled")
+                    continue
+                enabled_servers.append(server_name)
+                mcp_servers[server_name] = build_mcp_config(server_name, servers[server_name], hal_root, mux)
+                lines.append(f"✓ Server '{server_name}' enabled")
+
+            written = txn.commit()
+    except ConfigError as e:
+        return str(e)
+
+    if written:
+        lines.append("⚠ Restart session to apply changes")
+    return "\n".join(lines)
+
+def disable_servers(server_names, servers, settings_path, mcp_config_path):
+    """
+    Disable one or more MCP servers in a single locked transaction.
+
+    Nothing is written if any of the servers is marked required.
+    """
+    error = unknown_servers(server_names, servers)
+    if error:
+        return error
 
-    # Add server definition
-    if "mcpServers" not in mcp_config:
-        mcp_config["mcpServers"] = {}
+    # Check if any server is required
+    for server_name in server_names:
+        server_def = servers[server_name]
+        if server_def.get("required", False):
+            return f"WARNING: '{server_name}' is marked as required for core functionality.\nDisabling may break agents: {', '.join(server_def.get('used_by', []))}\nContinue anyway? (You'll need to manually confirm this action)"
 
-    mcp_config["mcpServers"][server_name] = build_mcp_config(server_name, server_def, hal_root)
+    lines = []
+    try:
+        with ConfigTransaction(settings_path, mcp_config_path) as txn:
+            # Ensure selective control is enabled
+            txn.settings["enableAllProjectMcpServers"] = False
+            enabled_servers = txn.settings.setdefault("enabledMcpjsonServers", [])
+            mcp_servers = txn.mcp_config.get("mcpServers", {})
+
+            for server_name in server_names:
+                if server_name not in enabled_servers:
+                    lines.append(f"✓ Server '{server_name}' already disabled")
+                    continue
+                enabled_servers.remove(server_name)
+                mcp_servers.pop(server_name, None)
+                lines.append(f"✓ Server '{server_name}' disabled")
+
+            written = txn.commit()
+    except ConfigError as e:
+        return str(e)
+
+    if written:
+        lines.append("⚠ Restart session to apply changes")
+    return "\n".join(lines)
+
+class ProfileError(Exception):
+    """A server could not be launched or did not complete the handshake"""
+
+class StdioServer:
+    """
+    Minimal MCP client for one stdio server process.
+
+    Messages are newline-delimited JSON-RPC on stdin/stdout; a reader
+    thread queues everything the server prints so requests can time out.
+    The server runs in its own process group, so close() also stops the
+    node processes that npx spawns.
+    """
+
+    def __init__(self, argv, env, cwd):
+        try:
+            self.process = subprocess.Popen(
+                argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                env=env, cwd=cwd, start_new_session=True)
+        except OSError as e:
+            raise ProfileError(f"Could not start {argv[0]}: {e}")
+        self.messages = queue.Queue()
+        self.next_id = 1
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            try:
+                self.messages.put(json.loads(line))
+            except ValueError:
+                continue  # log output on stdout
+        self.messages.put(None)
+
+    def send(self, message):
+        try:
+            self.process.stdin.write((json.dumps(message) + "\n").encode())
+            self.process.stdin.flush()
+        except OSError as e:
+            raise ProfileError(f"Server closed its input: {e}")
+
+    def notify(self, method, params=None):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        self.send(message)
+
+    def request(self, method, params, timeout):
+        """Send a request and wait for its result (server requests are answered inline)"""
+        request_id = self.next_id
+        self.next_id += 1
+        self.send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                message = self.messages.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise ProfileError(f"No answer to '{method}' within {timeout}s")
+            if message is None:
+                try:
+                    code = self.process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    code = None
+                raise ProfileError(f"Server closed its output during '{method}' (exit code {code})")
+            if message.get("id") == request_id and "method" not in message:
+                if "error" in message:
+                    raise ProfileError(f"'{method}' failed: {message['error'].get('message', message['error'])}")
+                return message.get("result", {})
+            if "method" in message and "id" in message:
+                # Server-to-client request (ping, roots/list, ...): answer minimally
+                if message["method"] == "ping":
+                    self.send({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+                else:
+                    self.send({"jsonrpc": "2.0", "id": message["id"],
+                               "error": {"code": -32601, "message": "Method not found"}})
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(self.process.pid, signal.SIGTERM)
+                self.process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                try:
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                self.process.wait()
+
+def process_tree_rss_kb(pid):
+    """Resident memory of a process and all its descendants in KB (Linux /proc), or None"""
+    children = {}
+    rss = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                status = f.read()
+        except OSError:
+            continue
+        ppid = re.search(r"^PPid:\s+(\d+)", status, re.MULTILINE)
+        vmrss = re.search(r"^VmRSS:\s+(\d+)", status, re.MULTILINE)
+        if ppid:
+            children.setdefault(int(ppid.group(1)), []).append(int(entry))
+        rss[int(entry)] = int(vmrss.group(1)) if vmrss else 0
+
+    if pid not in rss:
+        return None
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += rss.get(current, 0)
+        pending.extend(children.get(current, []))
+    return total
+
+def server_signature(server_def):
+    """Hash of what launches a server; a profile is only valid for the same launch"""
+    launch = {key: server_def.get(key) for key in ("type", "command", "args", "url")}
+    return hashlib.sha256(json.dumps(launch, sort_keys=True).encode()).hexdigest()[:16]
+
+def tool_definition_tokens(tool):
+    """Context cost of one tool definition as the client presents it to the model"""
+    definition = {key: tool[key] for key in ("name", "description", "inputSchema") if key in tool}
+    return tokens.count_tokens(json.dumps(definition, separators=(",", ":")))
+
+def profile_server(server_name, server_def, hal_root, timeout=PROFILE_TIMEOUT):
+    """
+    Launch one stdio server and measure it.
+
+    Runs initialize, notifications/initialized and tools/list (following
+    nextCursor pages), then reads the process tree's RSS.
+
+    Returns:
+        Dict: version, tools (names), tokens, startup_ms, handshake_ms,
+        rss_kb, token_method, profiled_at
+
+    Raises:
+        ProfileError: Launch or handshake failed
+    """
+    if server_def["type"] != "stdio":
+        raise ProfileError(f"Only stdio servers can be profiled ('{server_name}' is {server_def['type']})")
+
+    env = dict(os.environ)
+    env.update(load_env_file(hal_root))
+
+    started = time.perf_counter()
+    server = StdioServer([server_def["command"]] + server_def.get("args", []), env, hal_root)
+    try:
+        init = server.request("initialize", {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "hal8000-mcp-control", "version": "1.0.0"},
+        }, timeout)
+        startup_ms = (time.perf_counter() - started) * 1000
+        server.notify("notifications/initialized")
+
+        tools_list, cursor = [], None
+        while True:
+            result = server.request("tools/list", {"cursor": cursor} if cursor else {}, timeout)
+            tools_list.extend(result.get("tools", []))
+            cursor = result.get("nextCursor")
+            if not cursor:
+                break
+        handshake_ms = (time.perf_counter() - started) * 1000
+        rss_kb = process_tree_rss_kb(server.process.pid)
+    finally:
+        server.close()
+
+    return {
+        "version": str(init.get("serverInfo", {}).get("version") or "unknown"),
+        "tools": [tool["name"] for tool in tools_list],
+        "tokens": sum(tool_definition_tokens(tool) for tool in tools_list),
+        "startup_ms": round(startup_ms, 1),
+        "handshake_ms": round(handshake_ms, 1),
+        "rss_kb": rss_kb,
+        "token_method": tokens.METHOD,
+        "profiled_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def load_profiles(hal_root):
+    """Profile cache: {server: {signature, latest, versions: {version: profile}}}"""
+    cache = safe_file_operation(os.path.join(hal_root, PROFILE_CACHE), "read")
+    if not isinstance(cache, dict) or cache.get("version") != PROFILE_CACHE_VERSION:
+        return {}
+    return cache.get("servers", {})
+
+def current_profile(server_name, server_def, profiles):
+    """Latest measured profile for a server as the registry launches it now, or None"""
+    entry = profiles.get(server_name)
+    if not entry or entry.get("signature") != server_signature(server_def):
+        return None
+    return entry["versions"].get(entry.get("latest"))
+
+def profile_servers(server_names, servers, hal_root, timeout=PROFILE_TIMEOUT):
+    """
+    Profile servers (all stdio servers when none are named) and update the cache.
+
+    Each result is stored under the version the server reported, so a
+    package upgrade adds a new entry instead of overwriting the old one.
+    """
+    error = unknown_servers(server_names, servers)
+    if error:
+        return error
+    names = server_names or [name for name, config in servers.items() if config["type"] == "stdio"]
 
-    # Save both files
-    result = safe_file_operation(mcp_config_path, "write", mcp_config)
-    if isinstance(result, str) and result.startswith("ERROR"):
-        return result
+    results = {}
+    lines = []
+    for server_name in names:
+        try:
+            results[server_name] = profile_server(server_name, servers[server_name], hal_root, timeout)
+        except ProfileError as e:
+            lines.append(f"ERROR: {server_name}: {e}")
+            continue
+        measured = results[server_name]
+        rss = f"{measured['rss_kb'] / 1024:.1f} MB" if measured["rss_kb"] is not None else "n/a"
+        lines.append(f"✓ {server_name} {measured['version']}: {len(measured['tools'])} tools, "
+                     f"~{measured['tokens']:,} tokens, startup {measured['startup_ms']:.0f} ms, RSS {rss}")
+
+    if results:
+        profiles = load_profiles(hal_root)
+        for server_name, measured in results.items():
+            entry = profiles.get(server_name)
+            signature = server_signature(servers[server_name])
+            if not entry or entry.get("signature") != signature:
+                entry = {"signature": signature, "versions": {}}
+            entry["versions"][measured["version"]] = measured
+            entry["latest"] = measured["version"]
+            profiles[server_name] = entry
+        try:
+            atomic_write_json(os.path.join(hal_root, PROFILE_CACHE),
+                              {"version": PROFILE_CACHE_VERSION, "servers": profiles})
+        except OSError as e:
+            lines.append(f"ERROR: Could not save profiles: {e}")
+        else:
+            lines.append(f"Profiles saved to {PROFILE_CACHE}")
+
+    return "\n".join(lines)
+
+def set_mux(enabled, servers, hal_root, settings_path, mcp_config_path):
+    """
+    Route every enabled registry stdio server through the shared server
+    pool (mux.py), or back to its own command, in one transaction.
+    """
+    lines = []
+    try:
+        with ConfigTransaction(settings_path, mcp_config_path) as txn:
+            mcp_servers = txn.mcp_config.setdefault("mcpServers", {})
+            stdio_servers = [name for name, server_def in servers.items()
+                             if name in mcp_servers and server_def["type"] == "stdio"]
+            if enabled and not stdio_servers:
+                return "ERROR: No enabled stdio servers to route through the mux (enable servers first)"
+            for server_name in stdio_servers:
+                entry = build_mcp_config(server_name, servers[server_name], hal_root, enabled)
+                if mcp_servers[server_name] != entry:
+                    mcp_servers[server_name] = entry
+                    lines.append(f"✓ Server '{server_name}' {'routed through mux' if enabled else 'launched directly'}")
+            written = txn.commit()
+    except ConfigError as e:
+        return str(e)
+
+    if not written:
+        lines.append(f"✓ Mux already {'on' if enabled else 'off'}")
+    else:
+        lines.append("⚠ Restart session to apply changes")
+    return "\n".join(lines)
+
+def estimate_server_tokens(server_name, config, profiles=None):
+    """
+    Boot-time context cost of one server's tool definitions.
+
+    Uses the server's measured profile when one matches its registry
+    entry, then the registry's 'token_cost'; otherwise counts the server's
+    listed tool names and description with the shared tokenizer and adds
+    TOOL_SCHEMA_TOKENS per tool.
+
+    Returns:
+        (tokens, source) where source is 'profiled <version>', 'measured'
+        or 'estimated'
+    """
+    profile = current_profile(server_name, config, profiles or {})
+    if profile:
+        return profile["tokens"], f"profiled {profile['version']}"
+
+    if config.get("token_cost"):
+        return int(config["token_cost"]), "measured"
+
+    tools = config.get("tools", [])
+    if not tools:
+        return DEFAULT_SERVER_TOKENS, "estimated"
+
+    text = "\n".join([server_name, config.get("description", "")] + tools)
+    return tokens.count_tokens(text) + len(tools) * TOOL_SCHEMA_TOKENS, "estimated"
+
+def agent_tools(hal_root, agent):
+    """
+    Tools listed in an agent's frontmatter (inline or as a YAML list).
+
+    Returns:
+        List of tool names, or None if the agent file does not exist
+    """
+    try:
+        with open(os.path.join(hal_root, AGENTS_DIR, f"{agent}.md")) as f:
+            text = f.read()
+    except OSError:
+        return None
+
+    match = re.match(r"---\s*\n(.*?)\n---", text, re.DOTALL)
+    if not match:
+        return []
+    lines = match.group(1).splitlines()
+    for number, line in enumerate(lines):
+        if not line.startswith("tools:"):
+            continue
+        inline = line[len("tools:"):].strip()
+        if inline:
+            return [tool.strip() for tool in inline.split(",") if tool.strip()]
+        listed = []
+        for item in lines[number + 1:]:
+            if not item.strip().startswith("-"):
+                break
+            listed.append(item.strip()[1:].strip())
+        return listed
+    return []
+
+def server_tools(server_name, config, profiles):
+    """MCP tool names a server provides (profiled list first, then the registry)"""
+    profile = current_profile(server_name, config, profiles)
+    if profile:
+        provided = {f"mcp__{server_name}__{tool}" for tool in profile["tools"]}
+    else:
+        provided = set(config.get("tools", []))
+    provided.add(f"mcp__{server_name}__*")
+    return provided
+
+def agent_requirements(agent, servers, hal_root):
+    """
+    MCP tools an agent needs.
+
+    Taken from the agent's frontmatter; an agent without a definition file
+    needs some tool of every server that lists it in 'used_by'.
+    """
+    listed = agent_tools(hal_root, agent)
+    if listed is None:
+        return {f"mcp__{name}__*" for name, config in servers.items() if agent in config.get("used_by", [])}
+    return {tool for tool in listed if tool.startswith("mcp__")}
+
+def cheapest_cover(agents, servers, hal_root, profiles):
+    """
+    Cheapest server set providing every MCP tool the agents use.
+
+    Greedy weighted set cover: repeatedly take the server with the lowest
+    token cost per still-needed tool.
+
+    Returns:
+        (server names, uncovered tool names)
+    """
+    needed = set()
+    for agent in agents:
+        needed |= agent_requirements(agent, servers, hal_root)
+
+    provides = {name: server_tools(name, config, profiles) for name, config in servers.items()}
+    cost = {name: max(estimate_server_tokens(name, config, profiles)[0], 1) for name, config in servers.items()}
+    coverable = set().union(*provides.values()) if provides else set()
+
+    # Tool names are namespaced mcp__<server>__<tool>: a tool missing from every
+    # tool list still belongs to the registry server it is named after
+    for tool in list(needed - coverable):
+        namespace = tool.split("__")[1] if tool.count("__") >= 2 else None
+        if namespace in servers:
+            needed.discard(tool)
+            needed.add(f"mcp__{namespace}__*")
+    uncovered = needed - coverable
+    needed &= coverable
+
+    chosen = []
+    while needed:
+        best = min((name for name in servers if provides[name] & needed),
+                   key=lambda name: (cost[name] / len(provides[name] & needed), name))
+        chosen.append(best)
+        needed -= provides[best]
+    return chosen, sorted(uncovered)
+
+def load_server_sets(registry_path):
+    """Named server sets from the registry's 'profiles' key ({} if there are none)"""
+    registry = safe_file_operation(registry_path, "read")
+    if not isinstance(registry, dict):
+        return {}
+    return registry.get("profiles", {})
+
+def unknown_agents(agents, servers, hal_root):
+    """Error message for agents with neither a definition file nor a 'used_by' entry, or None"""
+    known_users = {agent for config in servers.values() for agent in config.get("used_by", [])}
+    unknown = [agent for agent in agents
+               if agent_tools(hal_root, agent) is None and agent not in known_users]
+    if not unknown:
+        return None
+    return f"ERROR: Unknown agent {', '.join(repr(agent) for agent in unknown)} (no file in {AGENTS_DIR})"
+
+def resolve_server_set(agents, server_names, servers, hal_root):
+    """
+    Servers needed for a set of agents plus explicitly named servers.
+
+    Returns:
+        (server names in registry order, warning lines)
+    """
+    profiles = load_profiles(hal_root)
+    covered, uncovered = cheapest_cover(agents, servers, hal_root, profiles)
+    chosen = set(covered) | set(server_names)
+
+    warnings = []
+    if uncovered:
+        warnings.append(f"⚠ No registry server provides: {', '.join(uncovered)}")
+    for name, config in servers.items():
+        if config.get("required", False) and name not in chosen:
+            affected = ", ".join(config.get("used_by", [])) or "no listed agents"
+            warnings.append(f"⚠ Required server '{name}' left disabled (affects: {affected})")
+    return [name for name in servers if name in chosen], warnings
+
+def apply_server_set(server_names, servers, hal_root, settings_path, mcp_config_path, force=False):
+    """
+    Enable exactly the given registry servers and disable the rest, in one
+    locked transaction.
+
+    Like disable, nothing is written if this would turn off an enabled
+    required server, unless force is set. Entries in either file that are
+    not in the registry are left alone.
+    """
+    for server_name in server_names:
+        env_error = check_required_env_vars(hal_root, servers[server_name])
+        if env_error:
+            return f"{env_error} (server '{server_name}')"
+
+    lines = []
+    try:
+        with ConfigTransaction(settings_path, mcp_config_path) as txn:
+            enable_all = txn.settings.get("enableAllProjectMcpServers", False)
+            txn.settings["enableAllProjectMcpServers"] = False
+            enabled_servers = txn.settings.setdefault("enabledMcpjsonServers", [])
+            mcp_servers = txn.mcp_config.setdefault("mcpServers", {})
+            mux = mux_active(txn.mcp_config)
+
+            turned_off = [name for name, config in servers.items()
+                          if config.get("required", False) and name not in server_names
+                          and (enable_all or name in enabled_servers)]
+            if turned_off and not force:
+                affected = sorted({agent for name in turned_off for agent in servers[name].get("used_by", [])})
+                raise ConfigError(
+                    f"ERROR: This would disable required server {', '.join(repr(n) for n in turned_off)} "
+                    f"(used by: {', '.join(affected) or 'no listed agents'}); nothing changed.\n"
+                    f"Add it to the set, or repeat with --force to disable it anyway")
+
+            for server_name in servers:
+                if server_name in server_names:
+                    if server_name not in enabled_servers:
+                        enabled_servers.append(server_name)
+                        lines.append(f"✓ Server '{server_name}' enabled")
+                    mcp_servers[server_name] = build_mcp_config(server_name, servers[server_name], hal_root, mux)
+                elif server_name in enabled_servers or server_name in mcp_servers:
+                    if server_name in enabled_servers:
+                        enabled_servers.remove(server_name)
+                        lines.append(f"✓ Server '{server_name}' disabled")
+                    mcp_servers.pop(server_name, None)
+
+            written = txn.commit()
+    except ConfigError as e:
+        return str(e)
+
+    if not lines:
+        lines.append("✓ Server set already active")
+    if written:
+        lines.append("⚠ Restart session to apply changes")
+    return "\n".join(lines)
+
+def use_server_set(set_name, server_sets, servers, hal_root, settings_path, mcp_config_path, force=False):
+    """Apply a named server set from the registry ('agents' and/or 'servers')"""
+    if set_name not in server_sets:
+        available = ", ".join(server_sets.keys()) or "none defined"
+        return f"ERROR: Profile '{set_name}' not in registry.\nAvailable: {available}"
+
+    server_set = server_sets[set_name]
+    agents = server_set.get("agents", [])
+    error = unknown_servers(server_set.get("servers", []), servers) or unknown_agents(agents, servers, hal_root)
+    if error:
+        return error
 
-    result = safe_file_operation(settings_path, "write", settings)
-    if isinstance(result, str) and result.startswith("ERROR"):
+    chosen, warnings = resolve_server_set(agents, server_set.get("servers", []), servers, hal_root)
+    header = f"Profile '{set_name}': {', '.join(chosen) or 'no servers'}"
+    result = apply_server_set(chosen, servers, hal_root, settings_path, mcp_config_path, force)
+    if result.startswith("ERROR"):
         return result
+    return "\n".join([header] + warnings + [result])
 
-    return f"✓ Server '{server_name}' enabled\n⚠ Restart session to apply changes"
-
-def disable_server(server_name, servers, settings_path, mcp_config_path):
-    """Disable an MCP server"""
-    if server_name not in servers:
-        available = ", ".join(servers.keys())
-        return f"ERROR: Server '{server_name}' not in registry.\nAvailable: {available}"
-
-    # Check if server is required
-    server_def = servers[server_name]
-    if server_def.get("required", False):
-        return f"WARNING: '{server_name}' is marked as required for core functionality.\nDisabling may break agents: {', '.join(server_def.get('used_by', []))}\nContinue anyway? (You'll need to manually confirm this action)"
-
-    # Load current settings
-    settings = safe_file_operation(settings_path, "read")
-    if isinstance(settings, str) and settings.startswith("ERROR"):
-        return settings
-
-    # Ensure selective control is enabled
-    settings["enableAllProjectMcpServers"] = False
-
-    # Remove from enabled servers list
-    enabled_servers = settings.get("enabledMcpjsonServers", [])
-    if server_name not in enabled_servers:
-        return f"✓ Server '{server_name}' already disabled"
-
-    enabled_servers.remove(server_name)
-    settings["enabledMcpjsonServers"] = enabled_servers
-
-    # Load and update .mcp.json
-    mcp_config = safe_file_operation(mcp_config_path, "read")
-    if isinstance(mcp_config, str) and mcp_config.startswith("ERROR"):
-        return mcp_config
-
-    # Remove server definition
-    if "mcpServers" in mcp_config and server_name in mcp_config["mcpServers"]:
-        del mcp_config["mcpServers"][server_name]
-
-    # Save both files
-    result = safe_file_operation(mcp_config_path, "write", mcp_config)
-    if isinstance(result, str) and result.startswith("ERROR"):
-        return result
+def auto_server_set(agents, servers, hal_root, settings_path, mcp_config_path, force=False):
+    """Apply the cheapest server set covering the given agents' MCP tools"""
+    error = unknown_agents(agents, servers, hal_root)
+    if error:
+        return error
 
-    result = safe_file_operation(settings_path, "write", settings)
-    if isinstance(result, str) and result.startswith("ERROR"):
+    chosen, warnings = resolve_server_set(agents, [], servers, hal_root)
+    header = f"Agents {', '.join(agents)} need: {', '.join(chosen) or 'no servers'}"
+    result = apply_server_set(chosen, servers, hal_root, settings_path, mcp_config_path, force)
+    if result.startswith("ERROR"):
         return result
-
-    return f"✓ Server '{server_name}' disabled\n⚠ Restart session to apply changes"
-
-def list_servers(servers, settings_path):
+    return "\n".join([header] + warnings + [result])
+
+def parse_agents(args):
+    """Agent names from 'auto' arguments: --agents a,b or --agents=a,b or bare names"""
+    agents = []
+    for arg in args:
+        if arg in ("--agents", "--force"):
+            continue
+        if arg.startswith("--agents="):
+            arg = arg[len("--agents="):]
+        agents.extend(agent.strip() for agent in arg.split(",") if agent.strip())
+    return agents
+
+def list_servers(servers, server_sets, hal_root, settings_path):
     """List all available servers and their status"""
     settings = safe_file_operation(settings_path, "read")
     if isinstance(settings, str) and settings.startswith("ERROR"):
         return settings
 
+    profiles = load_profiles(hal_root)
+
     enabled_servers = settings.get("enabledMcpjsonServers", [])
     enable_all = settings.get("enableAllProjectMcpServers", False)
 
@@ -241,6 +948,10 @@ def list_servers(servers, settings_path):
     else:
         result += "✓ CONTROL MODE: Selective loading (enableAllProjectMcpServers=false)\n\n"
 
+    mcp_config = safe_file_operation(os.path.join(hal_root, ".mcp.json"), "read")
+    if isinstance(mcp_config, dict) and mux_active(mcp_config):
+        result += "✓ MUX: Stdio servers shared through mux.py (see 'mux status')\n\n"
+
     # List servers
     for name, config in servers.items():
         is_enabled = name in enabled_servers or enable_all
@@ -255,6 +966,15 @@ def list_servers(servers, settings_path):
         if config.get("used_by"):
             result += f"  Used by: {', '.join(config['used_by'])}\n"
 
+        server_tokens, source = estimate_server_tokens(name, config, profiles)
+        result += f"  Token cost: ~{server_tokens} ({source})\n"
+
+        profile = current_profile(name, config, profiles)
+        if profile:
+            rss = f"{profile['rss_kb'] / 1024:.1f} MB" if profile["rss_kb"] is not None else "n/a"
+            result += (f"  Startup: {profile['startup_ms']:.0f} ms, RSS: {rss}, "
+                       f"{len(profile['tools'])} tools (profiled {profile['profiled_at']})\n")
+
         if config.get("env_vars"):
             result += f"  Requires: {', '.join(config['env_vars'])}"
             if config.get("env_file"):
@@ -264,12 +984,38 @@ def list_servers(servers, settings_path):
         result += "\n"
 
     # Summary
+    enabled = [name for name in servers if name in enabled_servers or enable_all]
     enabled_count = len(enabled_servers) if not enable_all else len(servers)
-    estimated_tokens = enabled_count * 500
+    estimated_tokens = sum(estimate_server_tokens(name, servers[name], profiles)[0] for name in enabled)
+    unprofiled = [name for name in enabled if not current_profile(name, servers[name], profiles)]
+
+    # Cheapest set serving the agents that depend on required servers
+    agents = sorted({agent for config in servers.values() if config.get("required", False)
+                     for agent in config.get("used_by", [])})
+    recommended, uncovered = cheapest_cover(agents, servers, hal_root, profiles)
+    recommended_tokens = sum(estimate_server_tokens(name, servers[name], profiles)[0] for name in recommended)
 
     result += "───────────────────────────────────────────────────────────\n"
     result += f"Currently Enabled: {enabled_count}/{len(servers)} servers\n"
-    result += f"Estimated RAM Cost: ~{estimated_tokens} tokens on boot\n"
+    result += f"Boot Cost: ~{estimated_tokens} tokens"
+    if unprofiled:
+        result += f" (estimated for {', '.join(unprofiled)}; run 'profile' to measure)"
+    result += "\n"
+    if agents:
+        result += (f"Recommended: {', '.join(recommended) or 'none'} (~{recommended_tokens} tokens) "
+                   f"covers {', '.join(agents)}\n")
+        if uncovered:
+            result += f"  ⚠ No registry server provides: {', '.join(uncovered)}\n"
+    if server_sets:
+        result += "Profiles (use <name>):\n"
+        for set_name, server_set in server_sets.items():
+            chosen, _ = resolve_server_set(server_set.get("agents", []), server_set.get("servers", []),
+                                           servers, hal_root)
+            set_tokens = sum(estimate_server_tokens(name, servers[name], profiles)[0] for name in chosen)
+            result += f"  {set_name}: {', '.join(chosen) or 'no servers'} (~{set_tokens} tokens)"
+            if server_set.get("description"):
+                result += f" - {server_set['description']}"
+            result += "\n"
     result += "───────────────────────────────────────────────────────────\n"
 
     return result
@@ -291,32 +1037,73 @@ def main():
         print(error)
         return 1
 
+    server_sets = load_server_sets(registry_path)
+
     # Parse command
     if len(sys.argv) < 2:
-        print("Usage: /HAL-mcp-control [status|enable|disable] [server_name]")
+        print("Usage: /HAL-mcp-control [status|enable|disable|profile|use|auto|mux] [server_name ...]")
         return 1
 
     action = sys.argv[1]
 
     if action == "status":
-        print(list_servers(servers, settings_path))
+        print(list_servers(servers, server_sets, hal_root, settings_path))
     elif action == "enable":
         if len(sys.argv) < 3:
             print("ERROR: Server name required for enable action")
-            print("Usage: /HAL-mcp-control enable <server_name>")
+            print("Usage: /HAL-mcp-control enable <server_name> [server_name ...]")
             return 1
-        server_name = sys.argv[2]
-        print(enable_server(server_name, servers, hal_root, settings_path, mcp_config_path))
+        print(enable_servers(sys.argv[2:], servers, hal_root, settings_path, mcp_config_path))
     elif action == "disable":
         if len(sys.argv) < 3:
             print("ERROR: Server name required for disable action")
-            print("Usage: /HAL-mcp-control disable <server_name>")
+            print("Usage: /HAL-mcp-control disable <server_name> [server_name ...]")
+            return 1
+        print(disable_servers(sys.argv[2:], servers, settings_path, mcp_config_path))
+    elif action == "profile":
+        output = profile_servers(sys.argv[2:], servers, hal_root)
+        print(output)
+        if output.startswith("ERROR") or "\nERROR" in output:
+            return 1
+    elif action == "use":
+        if len(sys.argv) < 3:
+            print("ERROR: Profile name required for use action")
+            print(f"Usage: /HAL-mcp-control use <{'|'.join(server_sets) or 'profile'}> [--force]")
+            return 1
+        force = "--force" in sys.argv[3:]
+        output = use_server_set(sys.argv[2], server_sets, servers, hal_root, settings_path, mcp_config_path,
+                                force)
+        print(output)
+        if output.startswith("ERROR"):
+            return 1
+    elif action == "auto":
+        agents = parse_agents(sys.argv[2:])
+        if not agents:
+            print("ERROR: Agent names required for auto action")
+            print("Usage: /HAL-mcp-control auto --agents <agent>[,<agent> ...] [--force]")
+            return 1
+        output = auto_server_set(agents, servers, hal_root, settings_path, mcp_config_path,
+                                 "--force" in sys.argv[2:])
+        print(output)
+        if output.startswith("ERROR"):
+            return 1
+    elif action == "mux":
+        mode = sys.argv[2] if len(sys.argv) > 2 else "status"
+        if mode == "status":
+            import mux
+            mux.print_status(mux.control_request(hal_root, {"control": "status"}))
+        elif mode in ("on", "off"):
+            output = set_mux(mode == "on", servers, hal_root, settings_path, mcp_config_path)
+            print(output)
+            if output.startswith("ERROR"):
+                return 1
+        else:
+            print(f"ERROR: Unknown mux mode '{mode}'")
+            print("Usage: /HAL-mcp-control mux [on|off|status]")
             return 1
-        server_name = sys.argv[2]
-        print(disable_server(server_name, servers, settings_path, mcp_config_path))
     else:
         print(f"ERROR: Unknown action '{action}'")
-        print("Usage: /HAL-mcp-control [status|enable|disable] [server_name]")
+        print("Usage: /HAL-mcp-control [status|enable|disable|profile|use|auto|mux] [server_name ...]")
         return 1
 
     return 0
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant MCP Multiplexer - one warm backend per server, shared by all sessions
+
+Every session that enables an MCP server normally spawns its own copy
+(`npx -y ...`: seconds of package resolution, one process tree per
+session). The multiplexer is a local daemon on a Unix socket that starts
+each registry server once, keeps it warm, and fans requests from any
+number of sessions into that one backend:
+
+- request ids (and progress tokens) are rewritten per client, so answers
+  go back to the session that asked
+- each client's `initialize` is answered from the backend's cached
+  handshake; notifications from the backend go to all of its clients
+- a backend with no clients stops after an idle timeout; the daemon exits
+  once it has neither backends nor clients
+
+Sessions reach it through the stdio shim `mux.py connect <server>`, which
+`control.py mux on` writes into .mcp.json in place of the server command.
+The shim starts the daemon when none is running.
+
+Note: clients share one server instance, so per-connection server state
+(e.g. roots, subscriptions) is shared as well.
+
+Usage:
+    python3 .hal8000/tools/mcp/mux.py connect omnisearch     # stdio shim (used by .mcp.json)
+    python3 .hal8000/tools/mcp/mux.py status
+    python3 .hal8000/tools/mcp/mux.py warm omnisearch filesystem
+    python3 .hal8000/tools/mcp/mux.py stop
+    python3 .hal8000/tools/mcp/mux.py serve --idle 600      # run the daemon in the foreground
+"""
+
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# The shim runs at every session boot, so this module stays light: the
+# daemon (asyncio, control.py) lives in muxd.py and is imported only by
+# 'serve'.
+
+# HAL root: .hal8000/tools/mcp/mux.py -> three levels up
+HAL_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Seconds a backend without clients stays warm
+IDLE_TIMEOUT = 600
+
+# Seconds connect waits for a freshly spawned daemon's socket
+SPAWN_TIMEOUT = 5
+
+def runtime_paths(hal_root):
+    """
+    Socket, lock and log paths for this HAL root.
+
+    They live in XDG_RUNTIME_DIR (or the temp directory) rather than in the
+    repository, because Unix sockets cannot be created on Windows-mounted
+    drives (/mnt/d under WSL).
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    tag = hashlib.sha256(os.path.abspath(hal_root).encode()).hexdigest()[:12]
+    stem = os.path.join(base, f"hal8000-mcp-mux-{os.getuid()}-{tag}")
+    return stem + ".sock", stem + ".lock", stem + ".log"
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+def error_response(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+def open_socket(hal_root, spawn=True):
+    """
+    Connected socket to the daemon, starting it first if needed.
+
+    Returns:
+        socket, or None when no daemon is running and spawn is False
+    """
+    socket_path, _, log_path = runtime_paths(hal_root)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return sock
+    except OSError:
+        if not spawn:
+            sock.close()
+            return None
+
+    with open(log_path, "a") as log:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve"],
+                         stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                         cwd=hal_root, start_new_session=True)
+
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while True:
+        try:
+            sock.connect(socket_path)
+            return sock
+        except OSError:
+            if time.monotonic() > deadline:
+                sock.close()
+                raise RuntimeError(f"MCP multiplexer did not start (see {log_path})")
+            time.sleep(0.01)
+
+def connect(hal_root, server_name):
+    """
+    Stdio shim: relay this process's stdin/stdout to the daemon.
+
+    Returns:
+        Exit code (1 if the daemon went away while stdin was still open)
+    """
+    sock = open_socket(hal_root)
+    sock.sendall(encode({"server": server_name}))
+    stdin_closed = threading.Event()
+
+    def pump_stdin():
+        try:
+            for line in sys.stdin.buffer:
+                sock.sendall(line)
+        except OSError:
+            pass
+        stdin_closed.set()
+        try:
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+    threading.Thread(target=pump_stdin, daemon=True).start()
+    stdout = sys.stdout.buffer
+    while True:
+        try:
+            data = sock.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            break
+        stdout.write(data)
+        stdout.flush()
+    sock.close()
+    return 0 if stdin_closed.is_set() else 1
+
+def control_request(hal_root, message, spawn=False):
+    """Send a control command; returns the daemon's answer or None if it is not running"""
+    sock = open_socket(hal_root, spawn=spawn)
+    if sock is None:
+        return None
+    with sock:
+        sock.sendall(encode(message))
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data) if data else None
+
+def print_status(status):
+    """Human-readable daemon status"""
+    if status is None:
+        print("MCP multiplexer: not running")
+        return
+    print(f"MCP multiplexer: pid {status['pid']}, {status['clients']} clients, "
+          f"idle timeout {status['idle_timeout']}s")
+    if not status["backends"]:
+        print("  No backends running")
+    for name, backend in status["backends"].items():
+        state = f"pid {backend['pid']}" if backend["alive"] else "stopped"
+        line = (f"  {name}: {state}, {backend['clients']} clients, {backend['requests']} requests, "
+                f"up {backend['uptime_s']:.0f}s")
+        if backend["version"]:
+            line += f", version {backend['version']}"
+        if not backend["clients"] and backend["alive"]:
+            line += f", idle {backend['idle_s']:.0f}s"
+        print(line)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Shared warm MCP server pool for concurrent HAL sessions',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  Route .mcp.json through the multiplexer (writes 'mux.py connect <server>' entries):
+    python3 .hal8000/tools/mcp/control.py mux on
+
+  Start servers ahead of the next session:
+    %(prog)s warm omnisearch filesystem
+
+  Show running backends and connected sessions:
+    %(prog)s status
+        """
+    )
+
+    parser.add_argument(
+        'action',
+        choices=['connect', 'serve', 'status', 'warm', 'stop'],
+        help='connect: stdio shim for one server; serve: run the daemon; '
+             'status / warm / stop: talk to the running daemon'
+    )
+
+    parser.add_argument(
+        'servers',
+        nargs='*',
+        help='Server name (connect) or names (warm)'
+    )
+
+    parser.add_argument(
+        '--idle',
+        type=int,
+        default=IDLE_TIMEOUT,
+        help=f'Seconds an unused backend stays warm (serve, default: {IDLE_TIMEOUT})'
+    )
+
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print status as JSON'
+    )
+
+    args = parser.parse_args()
+    hal_root = HAL_ROOT
+
+    try:
+        if args.action == 'connect':
+            if len(args.servers) != 1:
+                print("ERROR: connect takes exactly one server name", file=sys.stderr)
+                return 1
+            return connect(hal_root, args.servers[0])
+
+        if args.action == 'serve':
+            import muxd
+            return muxd.serve(hal_root, args.idle)
+
+        if args.action == 'warm':
+            if not args.servers:
+                print("ERROR: warm needs at least one server name", file=sys.stderr)
+                return 1
+            answer = control_request(hal_root, {"control": "warm", "servers": args.servers}, spawn=True)
+            for name, result in answer["warm"].items():
+                marker = "[OK]" if result == "warm" else "[ERROR]"
+                print(f"{marker} {name}: {result}")
+            return 0 if all(r == "warm" for r in answer["warm"].values()) else 1
+
+        if args.action == 'stop':
+            answer = control_request(hal_root, {"control": "stop"})
+            print("[OK] MCP multiplexer stopping" if answer else "[INFO] MCP multiplexer not running")
+            return 0
+
+        status = control_request(hal_root, {"control": "status"})
+    except Exception as e:
+        print(f"Fatal error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(status, indent=2))
+    else:
+        print_status(status)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
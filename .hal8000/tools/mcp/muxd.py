@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+HAL8000-Assistant MCP Multiplexer Daemon
+
+The long-running half of mux.py: a Unix-socket server holding one warm
+process per MCP server and fanning any number of sessions into it.
+Started on demand by `mux.py connect` (or `mux.py serve` in the
+foreground); see mux.py for the protocol handling overview.
+
+Usage:
+    python3 .hal8000/tools/mcp/mux.py serve --idle 600
+"""
+
+import asyncio
+import fcntl
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import control
+from mux import IDLE_TIMEOUT, encode, error_response, runtime_paths
+
+# Seconds the daemon lingers with no backends and no clients
+DAEMON_LINGER = 60
+
+# Seconds to wait for a backend's initialize answer
+BACKEND_TIMEOUT = control.PROFILE_TIMEOUT
+
+# Largest JSON-RPC line accepted from a backend or client
+LINE_LIMIT = 64 * 1024 * 1024
+
+class Client:
+    """One connected session"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.requests = {}      # client request id -> backend request id
+
+    def send(self, message):
+        if self.writer.is_closing():
+            return
+        try:
+            self.writer.write(encode(message))
+        except (ConnectionError, RuntimeError):
+            pass
+
+class Backend:
+    """One warm MCP server process shared by its clients"""
+
+    def __init__(self, mux, name, server_def):
+        self.mux = mux
+        self.name = name
+        self.server_def = server_def
+        self.process = None
+        self.clients = set()
+        self.pending = {}       # backend id -> (client, client id, progress token)
+        self.progress = {}      # backend progress token -> (client, client token)
+        self.ids = itertools.count(1)
+        self.init_result = None
+        self.ready = None
+        self.started = None
+        self.idle_since = time.monotonic()
+        self.requests = 0
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self, client_init=None):
+        """Launch the server and run the initialize handshake once"""
+        if self.ready is None:
+            self.ready = asyncio.ensure_future(self._start(client_init or {}))
+        ready = self.ready
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), BACKEND_TIMEOUT)
+        except Exception:
+            if self.ready is ready:
+                self.ready = None
+                ready.cancel()
+                await self.stop()
+            raise
+
+    async def _start(self, client_init):
+        env = dict(os.environ)
+        env.update(control.load_env_file(self.mux.hal_root))
+        argv = [self.server_def["command"]] + self.server_def.get("args", [])
+        self.process = await asyncio.create_subprocess_exec(
+            *argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            env=env, cwd=self.mux.hal_root, start_new_session=True, limit=LINE_LIMIT)
+        self.started = time.monotonic()
+        self.mux.log(f"{self.name}: started pid {self.process.pid}")
+        asyncio.ensure_future(self._read())
+
+        init_id = next(self.ids)
+        answer = asyncio.get_running_loop().create_future()
+        self.pending[init_id] = (None, answer, None)
+        self.write({"jsonrpc": "2.0", "id": init_id, "method": "initialize", "params": {
+            "protocolVersion": client_init.get("protocolVersion", control.PROTOCOL_VERSION),
+            "capabilities": {},
+            "clientInfo": {"name": "hal8000-mcp-mux", "version": "1.0.0"},
+        }})
+        message = await answer
+        if "error" in message:
+            raise RuntimeError(f"initialize failed: {message['error'].get('message')}")
+        self.init_result = message["result"]
+        self.write({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    def write(self, message):
+        try:
+            self.process.stdin.write(encode(message))
+        except (ConnectionError, RuntimeError, AttributeError):
+            pass
+
+    async def _read(self):
+        stdout = self.process.stdout
+        while True:
+            try:
+                line = await stdout.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                continue
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue  # log output on stdout
+            self.dispatch(message)
+        await self.process.wait()
+        self.mux.log(f"{self.name}: exited with code {self.process.returncode}")
+        self.fail_pending("MCP server exited")
+        self.ready = None
+
+    def dispatch(self, message):
+        """Route one message from the server"""
+        if "method" not in message:
+            entry = self.pending.pop(message.get("id"), None)
+            if not entry:
+                return
+            client, client_id, token = entry
+            if client is None:
+                if not client_id.done():
+                    client_id.set_result(message)
+                return
+            self.progress.pop(token, None)
+            client.requests.pop(client_id, None)
+            client.send(dict(message, id=client_id))
+            return
+
+        if "id" in message:
+            # Server-to-client request: no single session owns it
+            if message["method"] == "ping":
+                self.write({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+            else:
+                self.write(error_response(message["id"], -32601, "Method not found"))
+            return
+
+        token = message.get("params", {}).get("progressToken")
+        if message["method"] == "notifications/progress" and token in self.progress:
+            client, client_token = self.progress[token]
+            params = dict(message["params"], progressToken=client_token)
+            client.send(dict(message, params=params))
+            return
+        for client in list(self.clients):
+            client.send(message)
+
+    def forward(self, client, message):
+        """Send a client request or notification to the server with ids rewritten"""
+        if "id" in message:
+            backend_id = next(self.ids)
+            params = message.get("params") or {}
+            token = None
+            meta = params.get("_meta") or {}
+            if "progressToken" in meta:
+                token = f"mux-{backend_id}"
+                self.progress[token] = (client, meta["progressToken"])
+                params = dict(params, _meta=dict(meta, progressToken=token))
+            self.pending[backend_id] = (client, message["id"], token)
+            client.requests[message["id"]] = backend_id
+            self.requests += 1
+            self.write(dict(message, id=backend_id, params=params) if "params" in message
+                       else dict(message, id=backend_id))
+            return
+
+        if message["method"] == "notifications/cancelled":
+            params = message.get("params") or {}
+            backend_id = client.requests.get(params.get("requestId"))
+            if backend_id is None:
+                return
+            message = dict(message, params=dict(params, requestId=backend_id))
+        self.write(message)
+
+    def detach(self, client):
+        """Forget a disconnected client and anything in flight for it"""
+        self.clients.discard(client)
+        for backend_id in list(client.requests.values()):
+            entry = self.pending.pop(backend_id, None)
+            if entry:
+                self.progress.pop(entry[2], None)
+                self.write({"jsonrpc": "2.0", "method": "notifications/cancelled",
+                            "params": {"requestId": backend_id, "reason": "client disconnected"}})
+        client.requests.clear()
+        if not self.clients:
+            self.idle_since = time.monotonic()
+
+    def fail_pending(self, reason):
+        for backend_id, (client, client_id, _) in list(self.pending.items()):
+            if client is None:
+                if not client_id.done():
+                    client_id.set_result({"error": {"message": reason}})
+            else:
+                client.requests.pop(client_id, None)
+                client.send(error_response(client_id, -32603, reason))
+        self.pending.clear()
+        self.progress.clear()
+
+    async def stop(self):
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), 2)
+        except (asyncio.TimeoutError, ConnectionError, RuntimeError):
+            for sig in (signal.SIGTERM, signal.SIGKILL):
+                try:
+                    os.killpg(self.process.pid, sig)
+                    await asyncio.wait_for(self.process.wait(), 5)
+                    break
+                except (OSError, asyncio.TimeoutError):
+                    continue
+
+    def describe(self):
+        now = time.monotonic()
+        return {
+            "pid": self.process.pid if self.alive else None,
+            "alive": self.alive,
+            "clients": len(self.clients),
+            "requests": self.requests,
+            "uptime_s": round(now - self.started, 1) if self.alive else 0,
+            "idle_s": round(now - self.idle_since, 1) if not self.clients else 0,
+            "version": (self.init_result or {}).get("serverInfo", {}).get("version"),
+        }
+
+class Mux:
+    """Unix-socket daemon holding the backends"""
+
+    def __init__(self, hal_root, servers, idle_timeout=IDLE_TIMEOUT):
+        self.hal_root = hal_root
+        self.servers = servers
+        self.idle_timeout = idle_timeout
+        self.backends = {}
+        self.clients = 0
+        self.last_activity = time.monotonic()
+        self.stopping = None
+
+    def log(self, text):
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {text}", file=sys.stderr, flush=True)
+
+    def backend(self, name):
+        backend = self.backends.get(name)
+        if backend is None:
+            backend = self.backends[name] = Backend(self, name, self.servers[name])
+        return backend
+
+    async def handle(self, reader, writer):
+        """One connection: a hello line, then JSON-RPC lines (or a control command)"""
+        self.clients += 1
+        client = Client(writer)
+        backend = None
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            if "control" in hello:
+                await self.control(hello, client)
+                return
+
+            name = hello.get("server")
+            if name not in self.servers or self.servers[name]["type"] != "stdio":
+                client.send(error_response(None, -32600, f"Unknown stdio server '{name}'"))
+                return
+            backend = self.backend(name)
+            backend.clients.add(client)
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    client.send(error_response(None, -32700, "Parse error"))
+                    continue
+                await self.route(backend, client, message)
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            if backend:
+                backend.detach(client)
+            self.clients -= 1
+            self.last_activity = time.monotonic()
+            writer.close()
+
+    async def route(self, backend, client, message):
+        """Handle one client message"""
+        method = message.get("method")
+        if method == "initialize" and "id" in message:
+            try:
+                await backend.start(message.get("params"))
+            except Exception as e:
+                client.send(error_response(message["id"], -32603, f"{backend.name} unavailable: {e}"))
+                return
+            client.send({"jsonrpc": "2.0", "id": message["id"], "result": backend.init_result})
+        elif method == "notifications/initialized":
+            return
+        elif method == "ping" and "id" in message:
+            client.send({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+        elif method is None:
+            return  # answer to a server request the mux already handled
+        else:
+            if not backend.alive or backend.init_result is None:
+                try:
+                    await backend.start()
+                except Exception as e:
+                    if "id" in message:
+                        client.send(error_response(message["id"], -32603, f"{backend.name} unavailable: {e}"))
+                    return
+            backend.forward(client, message)
+
+    async def control(self, hello, client):
+        """status / warm / stop commands from mux.py itself"""
+        command = hello["control"]
+        if command == "warm":
+            results = {}
+            for name in hello.get("servers") or []:
+                if name not in self.servers or self.servers[name]["type"] != "stdio":
+                    results[name] = "unknown stdio server"
+                    continue
+                try:
+                    await self.backend(name).start()
+                    results[name] = "warm"
+                except Exception as e:
+                    results[name] = f"failed: {e}"
+            client.send({"warm": results})
+        elif command == "stop":
+            client.send({"stopping": True})
+            self.stopping.set()
+        else:
+            client.send({
+                "pid": os.getpid(),
+                "clients": self.clients - 1,
+                "idle_timeout": self.idle_timeout,
+                "backends": {name: backend.describe() for name, backend in self.backends.items()},
+            })
+        await client.writer.drain()
+
+    async def reap(self):
+        """Stop idle backends; end the daemon when nothing is left"""
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), min(self.idle_timeout, 10))
+            except asyncio.TimeoutError:
+                pass
+            now = time.monotonic()
+            for name, backend in list(self.backends.items()):
+                if not backend.clients and now - backend.idle_since >= self.idle_timeout:
+                    self.log(f"{name}: idle for {self.idle_timeout}s, stopping")
+                    await backend.stop()
+                    del self.backends[name]
+                elif not backend.alive and backend.ready is None and not backend.clients:
+                    del self.backends[name]
+            if (not self.backends and not self.clients
+                    and now - self.last_activity >= min(DAEMON_LINGER, self.idle_timeout)):
+                self.log("no backends and no clients, exiting")
+                self.stopping.set()
+
+    async def serve(self, socket_path):
+        self.stopping = asyncio.Event()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=socket_path, limit=LINE_LIMIT)
+        os.chmod(socket_path, 0o600)
+        self.log(f"listening on {socket_path}")
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        await self.reap()
+        server.close()
+        for backend in list(self.backends.values()):
+            await backend.stop()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+def serve(hal_root, idle_timeout=IDLE_TIMEOUT):
+    """
+    Run the daemon in the foreground.
+
+    An exclusive lock on the lock file makes a second daemon for the same
+    HAL root exit immediately.
+
+    Returns:
+        Exit code
+    """
+    _, registry_path, _, _ = control.get_absolute_paths()
+    servers, error = control.load_registry(registry_path)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+
+    socket_path, lock_path, _ = runtime_paths(hal_root)
+    lock_file = open(lock_path, "a")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print("[INFO] MCP multiplexer already running", file=sys.stderr)
+        return 0
+    try:
+        asyncio.run(Mux(hal_root, servers, idle_timeout).serve(socket_path))
+    finally:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        lock_file.close()
+    return 0
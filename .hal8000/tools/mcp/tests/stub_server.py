@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Stub MCP stdio server for the control.py tests.
+
+Speaks newline-delimited JSON-RPC: initialize, tools/list (paged with
+nextCursor), tools/call (echoes its arguments and pid) and ping. A log
+line is printed on stdout first, as some real servers do.
+
+Usage:
+    python3 stub_server.py [--tools N] [--page-size N] [--version V | --version-file PATH]
+                           [--name NAME] [--exit-on-initialize]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub MCP stdio server')
+    parser.add_argument('--tools', type=int, default=3)
+    parser.add_argument('--page-size', type=int, default=0, help='Tools per tools/list page (0: all)')
+    parser.add_argument('--version', default='1.0.0')
+    parser.add_argument('--version-file', help='Read the reported version from this file')
+    parser.add_argument('--name', default='stub')
+    parser.add_argument('--exit-on-initialize', action='store_true')
+    args = parser.parse_args()
+
+    version = args.version
+    if args.version_file:
+        with open(args.version_file) as f:
+            version = f.read().strip()
+
+    tools = [{
+        'name': f'tool_{number}',
+        'description': f'Stub tool number {number}: looks things up and returns them',
+        'inputSchema': {'type': 'object',
+                        'properties': {'query': {'type': 'string', 'description': 'What to look up'}},
+                        'required': ['query']},
+    } for number in range(args.tools)]
+
+    print(f'{args.name} stub starting', flush=True)
+    for line in sys.stdin:
+        message = json.loads(line)
+        if 'id' not in message:
+            continue
+        method = message.get('method')
+        if method == 'initialize':
+            if args.exit_on_initialize:
+                return 3
+            result = {'protocolVersion': message['params']['protocolVersion'],
+                      'capabilities': {'tools': {}},
+                      'serverInfo': {'name': args.name, 'version': version}}
+        elif method == 'tools/list':
+            start = int((message.get('params') or {}).get('cursor') or 0)
+            end = start + args.page_size if args.page_size else len(tools)
+            result = {'tools': tools[start:end]}
+            if end < len(tools):
+                result['nextCursor'] = str(end)
+        elif method == 'tools/call':
+            params = message['params']
+            text = f"{args.name}:{params['name']}:{json.dumps(params.get('arguments'))}:pid{os.getpid()}"
+            result = {'content': [{'type': 'text', 'text': text}]}
+        elif method == 'ping':
+            result = {}
+        else:
+            print(json.dumps({'jsonrpc': '2.0', 'id': message['id'],
+                              'error': {'code': -32601, 'message': 'Method not found'}}), flush=True)
+            continue
+        print(json.dumps({'jsonrpc': '2.0', 'id': message['id'], 'result': result}), flush=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the configuration transaction (control.py enable / disable / use):
+atomic writes that keep file modes, all-or-nothing commits, and the
+guard against turning off required servers.
+
+Run:
+    python3 -m pytest .hal8000/tools/mcp/tests
+"""
+
+import json
+import os
+import stat
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import control
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+class ConfigTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.settings_path = os.path.join(self.tmp.name, "settings.local.json")
+        self.mcp_config_path = os.path.join(self.tmp.name, ".mcp.json")
+        self.settings = {"enabledMcpjsonServers": ["omnisearch"], "enableAllProjectMcpServers": False}
+        self.mcp_config = {"mcpServers": {"omnisearch": {"command": "run-omnisearch.sh"}}}
+        for path, data in ((self.settings_path, self.settings), (self.mcp_config_path, self.mcp_config)):
+            with open(path, "w") as f:
+                json.dump(data, f)
+        self.servers = {
+            "omnisearch": {"type": "stdio", "command": "run-omnisearch.sh", "description": "Search"},
+            "filesystem": {"type": "stdio", "command": "npx", "args": ["-y", "server-filesystem"],
+                           "description": "Files"},
+        }
+
+    def read(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def test_atomic_write_keeps_existing_mode(self):
+        os.chmod(self.settings_path, 0o644)
+
+        control.atomic_write_json(self.settings_path, {"changed": True})
+
+        self.assertEqual(self.read(self.settings_path), {"changed": True})
+        self.assertEqual(mode(self.settings_path), 0o644)
+
+    def test_atomic_write_leaves_no_temp_file(self):
+        control.atomic_write_json(os.path.join(self.tmp.name, "new.json"), {})
+
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), [".mcp.json", "new.json", "settings.local.json"])
+
+    def test_enable_writes_both_files(self):
+        output = control.enable_servers(["filesystem"], self.servers, self.tmp.name,
+                                        self.settings_path, self.mcp_config_path)
+
+        self.assertIn("✓ Server 'filesystem' enabled", output)
+        self.assertEqual(self.read(self.settings_path)["enabledMcpjsonServers"], ["omnisearch", "filesystem"])
+        self.assertIn("filesystem", self.read(self.mcp_config_path)["mcpServers"])
+
+    def test_failed_second_write_rolls_back_first(self):
+        real_write = control.atomic_write_json
+
+        def failing_write(file_path, data):
+            if file_path == self.mcp_config_path and data != self.mcp_config:
+                raise OSError("disk full")
+            real_write(file_path, data)
+
+        with mock.patch.object(control, "atomic_write_json", failing_write):
+            output = control.enable_servers(["filesystem"], self.servers, self.tmp.name,
+                                            self.settings_path, self.mcp_config_path)
+
+        self.assertIn("no changes applied", output)
+        self.assertEqual(self.read(self.settings_path), self.settings)
+        self.assertEqual(self.read(self.mcp_config_path), self.mcp_config)
+
+    def test_unknown_server_writes_nothing(self):
+        output = control.enable_servers(["filesystem", "nope"], self.servers, self.tmp.name,
+                                        self.settings_path, self.mcp_config_path)
+
+        self.assertTrue(output.startswith("ERROR"))
+        self.assertEqual(self.read(self.settings_path), self.settings)
+
+    def test_server_set_refuses_to_disable_required_server(self):
+        self.servers["omnisearch"]["required"] = True
+        self.servers["omnisearch"]["used_by"] = ["research-synthesizer"]
+
+        output = control.use_server_set("minimal", {"minimal": {"servers": []}}, self.servers, self.tmp.name,
+                                        self.settings_path, self.mcp_config_path)
+
+        self.assertTrue(output.startswith("ERROR"))
+        self.assertIn("'omnisearch' (used by: research-synthesizer)", output)
+        self.assertIn("--force", output)
+        self.assertEqual(self.read(self.settings_path), self.settings)
+        self.assertEqual(self.read(self.mcp_config_path), self.mcp_config)
+
+    def test_server_set_disables_required_server_with_force(self):
+        self.servers["omnisearch"]["required"] = True
+
+        output = control.use_server_set("minimal", {"minimal": {"servers": []}}, self.servers, self.tmp.name,
+                                        self.settings_path, self.mcp_config_path, force=True)
+
+        self.assertIn("✓ Server 'omnisearch' disabled", output)
+        self.assertEqual(self.read(self.settings_path)["enabledMcpjsonServers"], [])
+        self.assertNotIn("omnisearch", self.read(self.mcp_config_path)["mcpServers"])
+
+    def test_server_set_refuses_when_all_servers_auto_load(self):
+        self.servers["omnisearch"]["required"] = True
+        self.settings = {"enabledMcpjsonServers": [], "enableAllProjectMcpServers": True}
+        with open(self.settings_path, "w") as f:
+            json.dump(self.settings, f)
+
+        output = control.apply_server_set(["filesystem"], self.servers, self.tmp.name,
+                                          self.settings_path, self.mcp_config_path)
+
+        self.assertTrue(output.startswith("ERROR"))
+        self.assertEqual(self.read(self.settings_path), self.settings)
+
+    def test_required_server_already_disabled_only_warns(self):
+        self.servers["filesystem"]["required"] = True
+
+        output = control.use_server_set("search", {"search": {"servers": ["omnisearch"]}}, self.servers,
+                                        self.tmp.name, self.settings_path, self.mcp_config_path)
+
+        self.assertIn("⚠ Required server 'filesystem' left disabled", output)
+        self.assertNotIn("ERROR", output)
+
+    def test_force_is_not_an_agent_name(self):
+        self.assertEqual(control.parse_agents(["--agents", "a,b", "--force"]), ["a", "b"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for server profiling (control.py profile) and how 'status' uses the
+measured numbers: the MCP handshake, nextCursor paging, the per-version
+profile cache and its launch-signature check.
+
+Servers are tests/stub_server.py launched with this Python, in a
+temporary HAL root.
+
+Run:
+    python3 -m pytest .hal8000/tools/mcp/tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import control
+
+STUB_SERVER = str(Path(__file__).resolve().parent / "stub_server.py")
+
+def stub_server(*args, **config):
+    """Registry entry launching the stub server"""
+    entry = {"type": "stdio", "command": sys.executable, "args": [STUB_SERVER] + list(args),
+             "description": "Stub server for tests"}
+    entry.update(config)
+    return entry
+
+class ProfileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.hal_root = self.tmp.name
+        os.makedirs(os.path.join(self.hal_root, ".hal8000", "indexes"))
+        os.makedirs(os.path.join(self.hal_root, control.AGENTS_DIR))
+        os.makedirs(os.path.join(self.hal_root, ".claude"))
+        self.settings_path = os.path.join(self.hal_root, ".claude", "settings.local.json")
+        with open(self.settings_path, "w") as f:
+            json.dump({"enabledMcpjsonServers": [], "enableAllProjectMcpServers": False}, f)
+
+    def profile(self, servers, names=None):
+        return control.profile_servers(names or list(servers), servers, self.hal_root, timeout=10)
+
+    def cache(self):
+        with open(os.path.join(self.hal_root, control.PROFILE_CACHE)) as f:
+            return json.load(f)
+
+    def test_handshake_follows_tool_pages(self):
+        server_def = stub_server("--tools", "5", "--page-size", "2", "--version", "1.2.3")
+
+        measured = control.profile_server("docs", server_def, self.hal_root, timeout=10)
+
+        self.assertEqual(measured["version"], "1.2.3")
+        self.assertEqual(measured["tools"], [f"tool_{number}" for number in range(5)])
+        self.assertGreater(measured["tokens"], 0)
+        self.assertGreater(measured["startup_ms"], 0)
+        self.assertGreaterEqual(measured["handshake_ms"], measured["startup_ms"])
+        self.assertEqual(measured["token_method"], control.tokens.METHOD)
+        if sys.platform.startswith("linux"):
+            self.assertGreater(measured["rss_kb"], 0)
+
+    def test_tokens_scale_with_tool_definitions(self):
+        small = control.profile_server("docs", stub_server("--tools", "1"), self.hal_root, timeout=10)
+        large = control.profile_server("docs", stub_server("--tools", "4"), self.hal_root, timeout=10)
+
+        self.assertGreater(large["tokens"], 3 * small["tokens"])
+
+    def test_profile_writes_cache(self):
+        servers = {"docs": stub_server("--tools", "3", "--version", "1.2.3")}
+
+        output = self.profile(servers)
+
+        self.assertIn("✓ docs 1.2.3: 3 tools", output)
+        entry = self.cache()["servers"]["docs"]
+        self.assertEqual(entry["latest"], "1.2.3")
+        self.assertEqual(entry["signature"], control.server_signature(servers["docs"]))
+        self.assertEqual(entry["versions"]["1.2.3"]["tools"], ["tool_0", "tool_1", "tool_2"])
+
+    def test_new_version_adds_cache_entry(self):
+        version_file = os.path.join(self.hal_root, "version")
+        servers = {"docs": stub_server("--tools", "2", "--version-file", version_file)}
+        Path(version_file).write_text("1.0.0")
+        self.profile(servers)
+        Path(version_file).write_text("2.0.0")
+
+        self.profile(servers)
+
+        entry = self.cache()["servers"]["docs"]
+        self.assertEqual(sorted(entry["versions"]), ["1.0.0", "2.0.0"])
+        self.assertEqual(entry["latest"], "2.0.0")
+        profile = control.current_profile("docs", servers["docs"], control.load_profiles(self.hal_root))
+        self.assertEqual(profile["version"], "2.0.0")
+
+    def test_changed_launch_invalidates_profile(self):
+        servers = {"docs": stub_server("--tools", "2")}
+        self.profile(servers)
+        profiles = control.load_profiles(self.hal_root)
+        self.assertIsNotNone(control.current_profile("docs", servers["docs"], profiles))
+
+        changed = stub_server("--tools", "2", "--name", "other")
+
+        self.assertIsNone(control.current_profile("docs", changed, profiles))
+        self.assertEqual(control.estimate_server_tokens("docs", changed, profiles),
+                         (control.DEFAULT_SERVER_TOKENS, "estimated"))
+
+    def test_profiling_again_after_launch_change_drops_old_versions(self):
+        servers = {"docs": stub_server("--tools", "2", "--version", "1.0.0")}
+        self.profile(servers)
+        servers = {"docs": stub_server("--tools", "2", "--version", "1.1.0")}
+
+        self.profile(servers)
+
+        entry = self.cache()["servers"]["docs"]
+        self.assertEqual(list(entry["versions"]), ["1.1.0"])
+
+    def test_failures_are_reported_and_not_cached(self):
+        servers = {
+            "crashes": stub_server("--exit-on-initialize"),
+            "missing": {"type": "stdio", "command": os.path.join(self.hal_root, "no-such-server"),
+                        "args": [], "description": "Not installed"},
+        }
+
+        output = self.profile(servers)
+
+        self.assertIn("ERROR: crashes: Server closed its output during 'initialize' (exit code 3)", output)
+        self.assertIn("ERROR: missing: Could not start", output)
+        self.assertFalse(os.path.exists(os.path.join(self.hal_root, control.PROFILE_CACHE)))
+
+    def test_unknown_server_is_rejected(self):
+        output = self.profile({"docs": stub_server()}, names=["nope"])
+
+        self.assertTrue(output.startswith("ERROR"))
+        self.assertIn("nope", output)
+
+    def test_status_uses_profiled_cost(self):
+        servers = {
+            "docs": stub_server("--tools", "3", "--version", "1.2.3", required=True, used_by=["researcher"]),
+            "spare": stub_server("--tools", "1", "--name", "spare"),
+        }
+        Path(self.hal_root, control.AGENTS_DIR, "researcher.md").write_text(
+            "---\nname: researcher\ntools: Read, mcp__docs__tool_1\n---\nResearch agent\n")
+
+        before = control.list_servers(servers, {}, self.hal_root, self.settings_path)
+        self.profile(servers, names=["docs"])
+        after = control.list_servers(servers, {}, self.hal_root, self.settings_path)
+
+        docs_tokens = self.cache()["servers"]["docs"]["versions"]["1.2.3"]["tokens"]
+        self.assertIn(f"~{control.DEFAULT_SERVER_TOKENS} (estimated)", before)
+        self.assertNotIn("Startup:", before)
+        self.assertIn(f"Token cost: ~{docs_tokens} (profiled 1.2.3)", after)
+        self.assertIn("  Startup: ", after)
+        self.assertIn("3 tools (profiled ", after)
+        self.assertIn(f"Recommended: docs (~{docs_tokens} tokens) covers researcher", after)
+        self.assertNotIn("No registry server provides", after)
+
+if __name__ == "__main__":
+    unittest.main()